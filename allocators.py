@@ -0,0 +1,184 @@
+# Built-in implementations of the benchmark's allocation region, selectable
+# by name instead of writing allocation_code. Each defines the three arrays
+# a, b, c of N doubles plus allocate_arrays() and free_arrays(); the harness
+# initializes the arrays afterwards (serially, so pages are placed on first
+# touch here unless a strategy touches them itself).
+
+_CHECKED = """static void *checked(void *p, const char *what) {
+    if (p == NULL) {
+        fprintf(stderr, "%s failed for %zu bytes\\n", what, (size_t)N * sizeof(double));
+        exit(1);
+    }
+    return p;
+}"""
+
+_FREE = """void free_arrays() {
+    free(a);
+    free(b);
+    free(c);
+}"""
+
+_UNMAP = """void free_arrays() {
+    munmap(a, array_bytes());
+    munmap(b, array_bytes());
+    munmap(c, array_bytes());
+}"""
+
+
+def _aligned(huge_page_bytes: int, numa_nodes: list):
+    return f"""double *a, *b, *c;
+
+{_CHECKED}
+
+void allocate_arrays() {{
+    // Cache-line aligned, size rounded up as aligned_alloc requires
+    size_t bytes = ((N * sizeof(double) + 63) / 64) * 64;
+    a = checked(aligned_alloc(64, bytes), "aligned_alloc");
+    b = checked(aligned_alloc(64, bytes), "aligned_alloc");
+    c = checked(aligned_alloc(64, bytes), "aligned_alloc");
+}}
+
+{_FREE}"""
+
+
+def _thp(huge_page_bytes: int, numa_nodes: list):
+    return f"""#include <sys/mman.h>
+
+double *a, *b, *c;
+
+{_CHECKED}
+
+static double *huge_array(void) {{
+    size_t bytes = ((N * sizeof(double) + {huge_page_bytes} - 1) / {huge_page_bytes}) * {huge_page_bytes};
+    void *p = NULL;
+    if (posix_memalign(&p, {huge_page_bytes}, bytes) != 0) p = NULL;
+    checked(p, "posix_memalign");
+    // Ask for transparent huge pages even when THP is in "madvise" mode
+    if (madvise(p, bytes, MADV_HUGEPAGE) != 0) perror("madvise(MADV_HUGEPAGE)");
+    return p;
+}}
+
+void allocate_arrays() {{
+    a = huge_array();
+    b = huge_array();
+    c = huge_array();
+}}
+
+{_FREE}"""
+
+
+def _hugetlbfs(huge_page_bytes: int, numa_nodes: list):
+    return f"""#include <sys/mman.h>
+
+double *a, *b, *c;
+
+{_CHECKED}
+
+static size_t array_bytes(void) {{
+    return ((N * sizeof(double) + {huge_page_bytes} - 1) / {huge_page_bytes}) * {huge_page_bytes};
+}}
+
+static double *hugetlb_array(void) {{
+    void *p = mmap(NULL, array_bytes(), PROT_READ | PROT_WRITE,
+                   MAP_PRIVATE | MAP_ANONYMOUS | MAP_HUGETLB, -1, 0);
+    if (p == MAP_FAILED) {{
+        // No (or too few) pages reserved in /proc/sys/vm/nr_hugepages
+        perror("mmap(MAP_HUGETLB), falling back to normal pages");
+        p = mmap(NULL, array_bytes(), PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0);
+    }}
+    return checked(p == MAP_FAILED ? NULL : p, "mmap");
+}}
+
+void allocate_arrays() {{
+    a = hugetlb_array();
+    b = hugetlb_array();
+    c = hugetlb_array();
+}}
+
+{_UNMAP}"""
+
+
+def _numa_interleave(huge_page_bytes: int, numa_nodes: list):
+    nodes = [n['node'] for n in numa_nodes] or [0]
+    words = max(nodes) // 64 + 1
+    mask = [0] * words
+    for node in nodes:
+        mask[node // 64] |= 1 << (node % 64)
+    mask_init = ", ".join(f"{m:#x}UL" for m in mask)
+    return f"""#include <sys/mman.h>
+#include <sys/syscall.h>
+#include <unistd.h>
+
+double *a, *b, *c;
+
+{_CHECKED}
+
+static size_t array_bytes(void) {{
+    return ((N * sizeof(double) + 4095) / 4096) * 4096;
+}}
+
+// Pages are spread round-robin over all NUMA nodes ({nodes}), so every
+// memory controller serves a share of each array (MPOL_INTERLEAVE = 3)
+static double *interleaved_array(void) {{
+    void *p = mmap(NULL, array_bytes(), PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0);
+    checked(p == MAP_FAILED ? NULL : p, "mmap");
+    unsigned long nodemask[{words}] = {{{mask_init}}};
+    if (syscall(SYS_mbind, p, array_bytes(), 3, nodemask, {words * 64 + 1}, 0) != 0) perror("mbind");
+    return p;
+}}
+
+void allocate_arrays() {{
+    a = interleaved_array();
+    b = interleaved_array();
+    c = interleaved_array();
+}}
+
+{_UNMAP}"""
+
+
+def _first_touch_parallel(huge_page_bytes: int, numa_nodes: list):
+    return f"""double *a, *b, *c;
+
+{_CHECKED}
+
+void allocate_arrays() {{
+    size_t bytes = ((N * sizeof(double) + 63) / 64) * 64;
+    a = checked(aligned_alloc(64, bytes), "aligned_alloc");
+    b = checked(aligned_alloc(64, bytes), "aligned_alloc");
+    c = checked(aligned_alloc(64, bytes), "aligned_alloc");
+    // Each thread touches the block a static schedule later gives it, placing
+    // those pages on its own NUMA node
+    #pragma omp parallel for schedule(static)
+    for (long i = 0; i < N; i++) {{
+        a[i] = 1.0;
+        b[i] = 2.0;
+        c[i] = 0.0;
+    }}
+}}
+
+{_FREE}"""
+
+
+# name -> (description, code generator taking the huge page size and the NUMA nodes)
+STRATEGIES = {
+    'aligned': ("64-byte aligned aligned_alloc", _aligned),
+    'thp': ("Huge-page aligned posix_memalign plus madvise(MADV_HUGEPAGE) for transparent huge pages",
+            _thp),
+    'hugetlbfs': ("mmap(MAP_HUGETLB) from the reserved huge page pool (vm.nr_hugepages); "
+                  "falls back to normal pages with a warning on stderr", _hugetlbfs),
+    'numa_interleave': ("mmap plus mbind(MPOL_INTERLEAVE) over all NUMA nodes", _numa_interleave),
+    'first_touch_parallel': ("Aligned arrays initialized by an OpenMP parallel loop so each thread's "
+                             "pages land on its NUMA node; only parallel when built with -fopenmp",
+                             _first_touch_parallel),
+}
+
+
+def allocation_code(name: str, huge_page_bytes: int = None, numa_nodes: list = None):
+    """Code for the allocation region implementing the named strategy, or an error message."""
+    if name not in STRATEGIES:
+        return f"Error: unknown allocation strategy '{name}' (available: {list(STRATEGIES)})"
+    return STRATEGIES[name][1](huge_page_bytes or 2 * 2**20, numa_nodes or [])
+
+
+def list_allocators():
+    return [{'name': name, 'description': description} for name, (description, _) in STRATEGIES.items()]
@@ -0,0 +1,197 @@
+import asyncio
+import os
+import platform
+import random
+
+import compilers
+import experiments
+import implementation
+
+# Each dimension lists mutually exclusive choices; "" means "leave the flag out".
+# A configuration picks one choice per dimension and joins them into CFLAGS.
+# Dimensions named "<unit>:<name>" (e.g. "triad:unroll") apply to that unit only.
+# A dimension named "allocation" chooses a built-in allocation strategy (see allocators.py).
+DEFAULT_SPACE = {
+    'opt': ["-O2", "-O3", "-Ofast"],
+    # aarch64 gcc prefers -mcpu=native; on x86 -mcpu is deprecated
+    'arch': ["", "-mcpu=native", "-march=native"] if platform.machine() == "aarch64"
+            else ["", "-march=native", "-mtune=native"],
+    'unroll': ["", "-funroll-loops", "-funroll-all-loops"],
+    'vectorize': ["", "-fno-tree-vectorize", "-fvect-cost-model=unlimited"],
+    'prefetch': ["", "-fprefetch-loop-arrays"],
+    'parallel': ["", "-fopenmp", f"-ftree-parallelize-loops={os.cpu_count() or 1}"],
+}
+
+
+def _cflags(space: dict, genome: tuple):
+    """(global CFLAGS, {unit: per-unit flags}) selected by genome."""
+    flags = {}
+    for dimension, g in zip(space, genome):
+        if dimension == "allocation":
+            continue
+        unit = dimension.split(":", 1)[0] if ":" in dimension else None
+        if space[dimension][g]:
+            flags.setdefault(unit, []).append(space[dimension][g])
+    cflags = " ".join(flags.pop(None, []))
+    return cflags, {unit: " ".join(f) for unit, f in flags.items()}
+
+
+async def _prune_space(space: dict, CC: str):
+    """Drop choices the compiler rejects, so no evaluation is spent on them. Returns the dropped choices."""
+    probes = {}
+    for dimension, choices in space.items():
+        if dimension == "allocation":
+            continue
+        for choice in choices:
+            if choice and choice not in probes:
+                probes[choice] = compilers.check_flags(CC, choice)
+    reports = dict(zip(probes, await asyncio.gather(*probes.values())))
+    # An unknown compiler fails every build anyway; leave the space alone
+    if any(isinstance(r, str) for r in reports.values()):
+        return []
+    dropped = []
+    for dimension, choices in space.items():
+        for choice in list(choices):
+            if dimension != "allocation" and choice and not reports[choice]['ok']:
+                choices.remove(choice)
+                dropped.append(choice)
+    for dimension in [d for d, choices in space.items() if not choices]:
+        del space[dimension]
+    return dropped
+
+
+def _random_genome(space: dict, rng):
+    return tuple(rng.randrange(len(choices)) for choices in space.values())
+
+
+def _crossover(a: tuple, b: tuple, rng):
+    return tuple(x if rng.random() < 0.5 else y for x, y in zip(a, b))
+
+
+def _mutate(space: dict, genome: tuple, rate: float, rng):
+    return tuple(rng.randrange(len(choices)) if rng.random() < rate else g
+                 for g, choices in zip(genome, space.values()))
+
+
+async def autotune(space: dict = None, budget: int = 30, population: int = 8,
+                   rank_by: str = "triad", CC: str = "gcc", LDFLAGS: str = "",
+                   base_cflags: str = "", kernels: dict = None,
+                   n: int = None, ntimes: int = None,
+                   reuse_measurements: bool = True, seed: int = None,
+                   abort_below: float = None,
+                   stop_at_peak: float = None,
+                   workspace: str = implementation.DEFAULT_WORKSPACE):
+    """
+    Genetic search over compiler flags. Each generation is built concurrently
+    and timed serially via sweep_build_configs; configurations are never
+    evaluated twice, and full-size configurations already in the experiment
+    database are reused when reuse_measurements is set. Stops after budget
+    evaluations (including reused ones) or when the space is exhausted.
+    abort_below kills runs that fall below that fraction of the best known
+    rank_by bandwidth; they count as failed evaluations. Choices the compiler
+    rejects outright (see compilers.check_flags) are dropped before the search.
+    With stop_at_peak (e.g. 0.95), the search ends once a configuration
+    reaches that fraction of the host's calibrated rank_by peak.
+    """
+    space = {d: list(choices) for d, choices in (space or DEFAULT_SPACE).items() if choices}
+    dropped = await _prune_space(space, CC)
+    kernels = {k: v for k, v in (kernels or {}).items() if v}
+    rng = random.Random(seed)
+    key = f"{rank_by}{experiments.KERNEL_SUFFIX}"
+    space_size = 1
+    for choices in space.values():
+        space_size *= len(choices)
+    budget = min(budget, space_size)
+    mutation_rate = 1.0 / max(1, len(space))
+    full_n, full_ntimes = implementation.default_problem_size()
+
+    scores = {}   # genome -> bandwidth (None if the build or run failed)
+    rows = {}     # genome -> result row
+
+    def candidate(genome):
+        cflags, kernel_cflags = _cflags(space, genome)
+        cflags = " ".join(f for f in (base_cflags, cflags) if f)
+        c = {'CC': CC, 'CFLAGS': cflags, 'LDFLAGS': LDFLAGS,
+             **{f"{k}_code": v for k, v in kernels.items()}}
+        if kernel_cflags:
+            c['kernel_cflags'] = kernel_cflags
+        allocation = dict(zip(space, genome)).get("allocation")
+        if allocation is not None and space['allocation'][allocation]:
+            c['allocation'] = space['allocation'][allocation]
+        return c
+
+    async def evaluate(genomes):
+        pending = []
+        for genome in genomes:
+            c = candidate(genome)
+            # Candidates with kernel code or per-kernel flags are built as separate units (see _sweep_build)
+            build_mode = experiments.UNITS_BUILD if kernels or c.get('kernel_cflags') else None
+            known = experiments.find_runs(c['CC'], c['CFLAGS'], c['LDFLAGS'], kernels,
+                                          n=full_n, ntimes=full_ntimes,
+                                          kernel_cflags=c.get('kernel_cflags'), build_mode=build_mode) \
+                if reuse_measurements and not (n or ntimes or c.get('allocation')) else []
+            known = [r for r in known if rank_by in r['GB_s']]
+            if known:
+                best = max(known, key=lambda r: r['GB_s'][rank_by])
+                scores[genome] = best['GB_s'][rank_by]
+                rows[genome] = {**c, 'status': "reused", key: scores[genome], 'run_id': best['run_id']}
+            else:
+                pending.append(genome)
+        if pending:
+            results = await implementation.sweep_build_configs(
+                [candidate(g) for g in pending], rank_by, n=n, ntimes=ntimes,
+                abort_below=abort_below, workspace=workspace)
+            for row in results:
+                genome = pending[row['index']]
+                scores[genome] = row.get(key) if row['status'] == "ok" else None
+                rows[genome] = {k: v for k, v in row.items() if k not in ('index', 'rank', 'stats')}
+
+    def fitness(genome):
+        return scores.get(genome) if scores.get(genome) is not None else float("-inf")
+
+    # First generation: the all-defaults configuration plus random ones
+    generation = [tuple(0 for _ in space)]
+    while len(generation) < min(population, budget):
+        genome = _random_genome(space, rng)
+        if genome not in generation:
+            generation.append(genome)
+
+    calibration = experiments.calibration() if stop_at_peak else None
+    target = stop_at_peak * calibration['peak_GB_s'].get(rank_by, 0) if calibration else None
+    stopped = None
+
+    history = []
+    while generation:
+        await evaluate(generation)
+        ranked = sorted(scores, key=fitness, reverse=True)
+        history.append({'generation': len(history),
+                        'evaluated': len(generation),
+                        'best': rows[ranked[0]].get(key) if ranked else None})
+        if target and ranked and scores[ranked[0]] is not None and scores[ranked[0]] >= target:
+            stopped = f"reached {stop_at_peak:g} x the calibrated peak of {target / stop_at_peak:.2f} GB/s"
+            break
+        remaining = budget - len(scores)
+        if remaining <= 0:
+            break
+        # Elitism plus tournament selection, uniform crossover and mutation
+        parents = ranked[:max(2, population // 2)]
+        generation = []
+        attempts = 0
+        while len(generation) < min(population, remaining) and attempts < 100 * population:
+            attempts += 1
+            a = max(rng.sample(parents, min(2, len(parents))), key=fitness)
+            b = max(rng.sample(parents, min(2, len(parents))), key=fitness)
+            child = _mutate(space, _crossover(a, b, rng), mutation_rate, rng)
+            if child not in scores and child not in generation:
+                generation.append(child)
+
+    ranked = sorted(scores, key=fitness, reverse=True)
+    best = rows[ranked[0]] if ranked and scores[ranked[0]] is not None else None
+    return {
+        'best': best,
+        'evaluations': len(scores),
+        'generations': history,
+        'dropped_flags': dropped,
+        'stopped': stopped,
+        'top': [rows[g] for g in ranked[:10]],
+    }
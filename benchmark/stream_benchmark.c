@@ -1,9 +1,27 @@
 #include <stdio.h>
 #include <stdlib.h>
+#include <string.h>
 #include <time.h>
 
+// Array size and repetitions can be overridden at build time with -DN= / -DNTIMES=
+#ifndef N
 #define N 200000000
+#endif
+#ifndef NTIMES
 #define NTIMES 20
+#endif
+// Correctness builds (-DGUARD=k) leave the last k elements untouched by the
+// kernels and report sampled values, so out-of-bounds writes become visible
+#ifndef GUARD
+#define GUARD 0
+#endif
+#define ACTIVE_N (N - GUARD)
+// Bytes each STREAM kernel moves per call; must match bytes_moved in
+// kernels.py, which the builds check
+#define COPY_BYTES (2.0 * ACTIVE_N * sizeof(double))
+#define SCALE_BYTES (2.0 * ACTIVE_N * sizeof(double))
+#define ADD_BYTES (3.0 * ACTIVE_N * sizeof(double))
+#define TRIAD_BYTES (3.0 * ACTIVE_N * sizeof(double))
 
 // ALLOCATION_START
 double *a, *b, *c;
@@ -53,66 +71,197 @@ void triad_kernel(double *a, double *b, double *c, int n) {
 }
 // TRIAD_END
 
-int main(int argc, char *argv[]) {
-    allocate_arrays();
+// Registered kernels beyond STREAM (see kernels.py) are inserted here and below
+// EXTRA_KERNELS_START
+// EXTRA_KERNELS_END
 
+static void reset_arrays(void) {
     for (int i = 0; i < N; i++) {
         a[i] = 1.0;
         b[i] = 2.0;
         c[i] = 0.0;
     }
+}
+
+// Whether the GUARD elements still hold their initial values
+static inline int guard_intact(void) {
+    for (long i = ACTIVE_N; i < N; i++) {
+        if (a[i] != 1.0 || b[i] != 2.0 || c[i] != 0.0) return 0;
+    }
+    return 1;
+}
+
+static double elapsed(struct timespec *start, struct timespec *end) {
+    return (end->tv_sec - start->tv_sec) + (end->tv_nsec - start->tv_nsec) / 1e9;
+}
+
+// One JSON line per timed iteration on stderr, so the server can follow
+// (and abort) a run while it is in progress; stdout keeps the final result
+static void report_progress(const char *name, int k, double bytes, double t) {
+    fprintf(stderr, "{\"progress\": \"%s\", \"iteration\": %d, \"of\": %d, \"GB_s\": %.4f}\n",
+            name, k, NTIMES, bytes / t / 1e9);
+}
+
+static void print_samples(const char *name, double bytes, double *times) {
+    printf("\"%s\": [", name);
+    for (int k = 0; k < NTIMES; k++) {
+        printf("%s%.4f", k ? ", " : "", bytes / times[k] / 1e9);
+    }
+    printf("]");
+}
+
+static void print_check_values(void) {
+    // Head, evenly spaced interior points, the tail of the active range and the guard
+    long idx[64];
+    int m = 0;
+    for (long i = 0; i < 8 && i < N; i++) idx[m++] = i;
+    for (int k = 1; k < 16; k++) idx[m++] = (long)N * k / 16;
+    for (long i = ACTIVE_N - 8; i < N && m < 64; i++) {
+        if (i >= 8) idx[m++] = i;
+    }
+    printf("\"check\": {\"n\": %d, \"active_n\": %d, \"indices\": [", N, ACTIVE_N);
+    for (int j = 0; j < m; j++) printf("%s%ld", j ? ", " : "", idx[j]);
+    printf("], \"a\": [");
+    for (int j = 0; j < m; j++) printf("%s%.17g", j ? ", " : "", a[idx[j]]);
+    printf("], \"b\": [");
+    for (int j = 0; j < m; j++) printf("%s%.17g", j ? ", " : "", b[idx[j]]);
+    printf("], \"c\": [");
+    for (int j = 0; j < m; j++) printf("%s%.17g", j ? ", " : "", c[idx[j]]);
+    printf("]}");
+}
+
+// Working-set sweep (stream_benchmark --sweep n1 n2 ...): the STREAM kernels
+// on the first n elements of the arrays for each n. Each timed sample repeats
+// the kernel until it lasts at least SWEEP_MIN_TIME seconds, so cache-resident
+// sizes keep their timing resolution.
+#ifndef SWEEP_MIN_TIME
+#define SWEEP_MIN_TIME 1e-3
+#endif
+
+static void sweep_copy(int n) { copy_kernel(a, b, n); }
+static void sweep_scale(int n) { scale_kernel(b, a, n); }
+static void sweep_add(int n) { add_kernel(c, a, b, n); }
+static void sweep_triad(int n) { triad_kernel(a, b, c, n); }
+
+static double sweep_time(void (*kernel)(int), int n, long reps, double *sum) {
+    struct timespec start, end;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    for (long r = 0; r < reps; r++) {
+        kernel(n);
+        *sum += a[n/2] + b[n/2] + c[n/2];
+    }
+    clock_gettime(CLOCK_MONOTONIC, &end);
+    return elapsed(&start, &end);
+}
+
+static void run_sweep(int count, char **sizes) {
+    const char *names[4] = {"copy", "scale", "add", "triad"};
+    void (*kernels[4])(int) = {sweep_copy, sweep_scale, sweep_add, sweep_triad};
+    const double arrays[4] = {2.0, 2.0, 3.0, 3.0};
+    double times[NTIMES];
+    double sum = 0.0;
+    printf("{\"sweep\": [");
+    for (int s = 0; s < count; s++) {
+        long n = atol(sizes[s]);
+        if (n < 1) n = 1;
+        if (n > ACTIVE_N) n = ACTIVE_N;
+        printf("%s{\"n\": %ld", s ? ", " : "", n);
+        for (int j = 0; j < 4; j++) {
+            // Doubling the repetitions until a sample is long enough also warms the caches
+            long reps = 1;
+            while (sweep_time(kernels[j], (int)n, reps, &sum) < SWEEP_MIN_TIME && reps < (1L << 30)) reps *= 2;
+            for (int k = 0; k < NTIMES; k++) times[k] = sweep_time(kernels[j], (int)n, reps, &sum);
+            double bytes = arrays[j] * n * sizeof(double) * reps;
+            printf(", \"%s\": {\"reps\": %ld, \"GB_s\": [", names[j], reps);
+            for (int k = 0; k < NTIMES; k++) printf("%s%.4f", k ? ", " : "", bytes / times[k] / 1e9);
+            printf("]}");
+        }
+        printf("}");
+        fprintf(stderr, "{\"progress\": \"sweep\", \"n\": %ld, \"point\": %d, \"of\": %d}\n", n, s, count);
+    }
+    printf("], \"n\": %d, \"ntimes\": %d, \"sum\": %.1f}\n", ACTIVE_N, NTIMES, sum);
+}
+
+int main(int argc, char *argv[]) {
+    allocate_arrays();
+    reset_arrays();
+
+    if (argc > 1 && strcmp(argv[1], "--sweep") == 0) {
+        run_sweep(argc - 2, argv + 2);
+        free_arrays();
+        return 0;
+    }
 
     struct timespec start, end;
     double time;
     double sum = 0.0;
+    // Per-iteration timings so the server can discard warm-up and compute statistics
+    double copy_times[NTIMES], scale_times[NTIMES], add_times[NTIMES], triad_times[NTIMES];
+
+    // Registered kernels each start from freshly reset arrays and leave them
+    // reset, so the STREAM sequence below is unaffected
+    // EXTRA_RUNS_START
+    // EXTRA_RUNS_END
 
     // Copy: a[i] = b[i]
     sum = 0.0;
-    clock_gettime(CLOCK_MONOTONIC, &start);
+    time = 0.0;
     for (int k = 0; k < NTIMES; k++) {
-        copy_kernel(a, b, N);
-        sum += a[N/2];
+        clock_gettime(CLOCK_MONOTONIC, &start);
+        copy_kernel(a, b, ACTIVE_N);
+        sum += a[ACTIVE_N/2];
+        clock_gettime(CLOCK_MONOTONIC, &end);
+        copy_times[k] = elapsed(&start, &end);
+        time += copy_times[k];
+        report_progress("copy", k, COPY_BYTES, copy_times[k]);
     }
-    clock_gettime(CLOCK_MONOTONIC, &end);
     if (sum < 0.0) return 1;
-    time = (end.tv_sec - start.tv_sec) + (end.tv_nsec - start.tv_nsec) / 1e9;
-    double copy_bw = (2 * N * sizeof(double) * NTIMES / time) / 1e9;
+    double copy_bw = (COPY_BYTES * NTIMES / time) / 1e9;
 
     // Scale: b[i] = 2.0 * a[i]
     sum = 0.0;
-    clock_gettime(CLOCK_MONOTONIC, &start);
+    time = 0.0;
     for (int k = 0; k < NTIMES; k++) {
-        scale_kernel(b, a, N);
-        sum += b[N/2];
+        clock_gettime(CLOCK_MONOTONIC, &start);
+        scale_kernel(b, a, ACTIVE_N);
+        sum += b[ACTIVE_N/2];
+        clock_gettime(CLOCK_MONOTONIC, &end);
+        scale_times[k] = elapsed(&start, &end);
+        time += scale_times[k];
+        report_progress("scale", k, SCALE_BYTES, scale_times[k]);
     }
-    clock_gettime(CLOCK_MONOTONIC, &end);
     if (sum < 0.0) return 1;
-    time = (end.tv_sec - start.tv_sec) + (end.tv_nsec - start.tv_nsec) / 1e9;
-    double scale_bw = (2 * N * sizeof(double) * NTIMES / time) / 1e9;
+    double scale_bw = (SCALE_BYTES * NTIMES / time) / 1e9;
 
     // Add: c[i] = a[i] + b[i]
     sum = 0.0;
-    clock_gettime(CLOCK_MONOTONIC, &start);
+    time = 0.0;
     for (int k = 0; k < NTIMES; k++) {
-        add_kernel(c, a, b, N);
-        sum += c[N/2];
+        clock_gettime(CLOCK_MONOTONIC, &start);
+        add_kernel(c, a, b, ACTIVE_N);
+        sum += c[ACTIVE_N/2];
+        clock_gettime(CLOCK_MONOTONIC, &end);
+        add_times[k] = elapsed(&start, &end);
+        time += add_times[k];
+        report_progress("add", k, ADD_BYTES, add_times[k]);
     }
-    clock_gettime(CLOCK_MONOTONIC, &end);
     if (sum < 0.0) return 1;
-    time = (end.tv_sec - start.tv_sec) + (end.tv_nsec - start.tv_nsec) / 1e9;
-    double add_bw = (3 * N * sizeof(double) * NTIMES / time) / 1e9;
+    double add_bw = (ADD_BYTES * NTIMES / time) / 1e9;
 
     // Triad: a[i] = b[i] + 3.0 * c[i]
     sum = 0.0;
-    clock_gettime(CLOCK_MONOTONIC, &start);
+    time = 0.0;
     for (int k = 0; k < NTIMES; k++) {
-        triad_kernel(a, b, c, N);
-        sum += a[N/2];
+        clock_gettime(CLOCK_MONOTONIC, &start);
+        triad_kernel(a, b, c, ACTIVE_N);
+        sum += a[ACTIVE_N/2];
+        clock_gettime(CLOCK_MONOTONIC, &end);
+        triad_times[k] = elapsed(&start, &end);
+        time += triad_times[k];
+        report_progress("triad", k, TRIAD_BYTES, triad_times[k]);
     }
-    clock_gettime(CLOCK_MONOTONIC, &end);
     if (sum < 0.0) return 1;
-    time = (end.tv_sec - start.tv_sec) + (end.tv_nsec - start.tv_nsec) / 1e9;
-    double triad_bw = (3 * N * sizeof(double) * NTIMES / time) / 1e9;
+    double triad_bw = (TRIAD_BYTES * NTIMES / time) / 1e9;
 
     // Compute checksum
     double checksum = 0.0;
@@ -120,8 +269,25 @@ int main(int argc, char *argv[]) {
         checksum += a[i] + b[i] + c[i];
     }
 
-    printf("{\"copy_GB_s\": %.2f, \"scale_GB_s\": %.2f, \"add_GB_s\": %.2f, \"triad_GB_s\": %.2f, \"checksum\": %.1f}\n",
+    printf("{\"copy_GB_s\": %.2f, \"scale_GB_s\": %.2f, \"add_GB_s\": %.2f, \"triad_GB_s\": %.2f, \"checksum\": %.1f, \"samples\": {",
            copy_bw, scale_bw, add_bw, triad_bw, checksum);
+    print_samples("copy", COPY_BYTES, copy_times);
+    printf(", ");
+    print_samples("scale", SCALE_BYTES, scale_times);
+    printf(", ");
+    print_samples("add", ADD_BYTES, add_times);
+    printf(", ");
+    print_samples("triad", TRIAD_BYTES, triad_times);
+    // EXTRA_SAMPLES_START
+    // EXTRA_SAMPLES_END
+    printf("}");
+    // EXTRA_VALUES_START
+    // EXTRA_VALUES_END
+    if (GUARD > 0) {
+        printf(", ");
+        print_check_values();
+    }
+    printf("}\n");
 
     free_arrays();
     return 0;
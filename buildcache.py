@@ -0,0 +1,108 @@
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+
+# Content-addressed store of compiled benchmark binaries. Point CACHE_DIR at a
+# directory outside /tmp (e.g. a mounted volume) to keep it across container restarts.
+CACHE_DIR = "/tmp/benchmark_cache"
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+
+def build_key(compiler_id: str, CFLAGS: str, LDFLAGS: str, source: str, recipe: str = "", host: str = ""):
+    """
+    Hash everything that determines the binary: compiler, flags, final C
+    source and build recipe, plus the host CPU for flags tuned to it (host).
+    """
+    h = hashlib.sha256()
+    for part in (compiler_id, CFLAGS, LDFLAGS, recipe, source, host):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _entry_path(key: str):
+    return os.path.join(CACHE_DIR, key)
+
+
+def restore(key: str, dest: str):
+    """Copy a cached binary to dest. Returns False on a cache miss."""
+    entry = _entry_path(key)
+    if not os.path.exists(entry):
+        _stats['misses'] += 1
+        return False
+    try:
+        shutil.copy2(entry, dest)
+        os.chmod(dest, 0o755)
+        # Touch the entry so eviction sees it as recently used
+        os.utime(entry)
+    except OSError as e:
+        print(f"Build cache restore failed: {e}", file=sys.stderr)
+        _stats['misses'] += 1
+        return False
+    _stats['hits'] += 1
+    return True
+
+
+def store(key: str, binary_path: str):
+    """Add a freshly built binary to the cache, then evict down to CACHE_MAX_BYTES."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Write to a temp file and rename so concurrent readers never see a partial binary
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=".tmp-")
+        os.close(fd)
+        shutil.copy2(binary_path, tmp_path)
+        os.replace(tmp_path, _entry_path(key))
+        _stats['stores'] += 1
+    except OSError as e:
+        print(f"Build cache store failed: {e}", file=sys.stderr)
+        return
+    _evict()
+
+
+def _entries():
+    entries = []
+    if os.path.isdir(CACHE_DIR):
+        for name in os.listdir(CACHE_DIR):
+            if name.startswith("."):
+                continue
+            path = os.path.join(CACHE_DIR, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+    return entries
+
+
+def _evict():
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+            _stats['evictions'] += 1
+        except OSError:
+            pass
+        total -= size
+
+
+def stats():
+    entries = _entries()
+    return {
+        'cache_dir': CACHE_DIR,
+        'entries': len(entries),
+        'size_bytes': sum(size for _, size, _ in entries),
+        'max_bytes': CACHE_MAX_BYTES,
+        **_stats,
+    }
+
+
+def clear():
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    return True
@@ -0,0 +1,164 @@
+import json
+import platform
+import sys
+import uuid
+
+import experiments
+import implementation
+import kernels as kernel_registry
+
+CALIBRATION_WORKSPACE = "calibration"
+CALIBRATION_CC = "gcc"
+
+# STREAM kernels as (destination, expression) over the harness's argument names
+_STREAM = {
+    'copy': ("a", "b[i]"),
+    'scale': ("b", "2.0 * a[i]"),
+    'add': ("c", "a[i] + b[i]"),
+    'triad': ("a", "b[i] + 3.0 * c[i]"),
+}
+
+# The same kernels with SSE2 intrinsics, for the non-temporal store variant
+_STREAM_SSE2 = {
+    'copy': "_mm_loadu_pd(&b[i])",
+    'scale': "_mm_mul_pd(_mm_set1_pd(2.0), _mm_loadu_pd(&a[i]))",
+    'add': "_mm_add_pd(_mm_loadu_pd(&a[i]), _mm_loadu_pd(&b[i]))",
+    'triad': "_mm_add_pd(_mm_loadu_pd(&b[i]), _mm_mul_pd(_mm_set1_pd(3.0), _mm_loadu_pd(&c[i])))",
+}
+
+# Cache-line aligned arrays, first touched by the threads that later stream them
+# so their pages land on those threads' NUMA nodes
+_ALLOCATION = """double *a, *b, *c;
+
+void allocate_arrays() {
+    size_t bytes = ((N * sizeof(double) + 63) / 64) * 64;
+    a = (double*)aligned_alloc(64, bytes);
+    b = (double*)aligned_alloc(64, bytes);
+    c = (double*)aligned_alloc(64, bytes);
+    #pragma omp parallel for schedule(static)
+    for (long i = 0; i < N; i++) {
+        a[i] = 1.0;
+        b[i] = 2.0;
+        c[i] = 0.0;
+    }
+}
+
+void free_arrays() {
+    free(a);
+    free(b);
+    free(c);
+}"""
+
+
+def _restrict(signature: str):
+    return signature.replace("double *", "double *restrict ")
+
+
+def _openmp_kernel(name: str):
+    destination, expression = _STREAM[name]
+    return f"""{_restrict(kernel_registry.REGISTRY[name].signature)} {{
+    #pragma omp parallel for simd schedule(static)
+    for (int i = 0; i < n; i++) {{
+        {destination}[i] = {expression};
+    }}
+}}"""
+
+
+def _streaming_kernel(name: str):
+    """Stores bypass the caches, saving the read-for-ownership of the destination line."""
+    destination, expression = _STREAM[name]
+    return f"""#include <emmintrin.h>
+{_restrict(kernel_registry.REGISTRY[name].signature)} {{
+    // Even i keeps the 16-byte stores aligned on the 64-byte aligned arrays
+    #pragma omp parallel for schedule(static)
+    for (int i = 0; i < (n & ~1); i += 2) {{
+        _mm_stream_pd(&{destination}[i], {_STREAM_SSE2[name]});
+    }}
+    if (n & 1) {{
+        int i = n - 1;
+        {destination}[i] = {expression};
+    }}
+    _mm_sfence();
+}}"""
+
+
+def _variants():
+    """Reference builds: (name, CFLAGS, kernel code). Non-temporal stores need x86 intrinsics."""
+    machine = platform.machine()
+    arch = "-mcpu=native" if machine == "aarch64" else "-march=native"
+    variants = [("openmp", f"-O3 {arch} -fopenmp", {k: _openmp_kernel(k) for k in _STREAM})]
+    if machine in ("x86_64", "AMD64"):
+        variants.append(("openmp_nontemporal", f"-O3 {arch} -fopenmp",
+                         {k: _streaming_kernel(k) for k in _STREAM}))
+    return variants
+
+
+def _thread_placements(topology: dict):
+    """OpenMP environments to try: one thread per physical core spread out, and every usable CPU."""
+    usable = topology.get('cpus_usable') or topology.get('cores_logical') or 1
+    cores = min(usable, max(1, usable // (topology.get('threads_per_core') or 1)))
+    placements = {'cores_spread': {'OMP_NUM_THREADS': cores, 'OMP_PROC_BIND': "spread", 'OMP_PLACES': "cores"}}
+    if usable != cores:
+        placements['threads_close'] = {'OMP_NUM_THREADS': usable, 'OMP_PROC_BIND': "close",
+                                       'OMP_PLACES': "threads"}
+    return placements
+
+
+async def calibrate(force: bool = False, n: int = None, ntimes: int = None, repeats: int = 3,
+                    CC: str = CALIBRATION_CC):
+    """
+    Measure the bandwidth this host can attain: STREAM kernels built with
+    OpenMP, with and without non-temporal stores, run on all cores with
+    pinned threads. The best mean per kernel becomes the host's peak, stored
+    in the experiment database (see experiments.calibration). Returns the
+    existing calibration unless force is set.
+    """
+    if not force:
+        existing = experiments.calibration()
+        if existing is not None:
+            return existing
+
+    topology = implementation.cpu_topology()
+    placements = _thread_placements(topology)
+    peaks, best, trials = {}, {}, []
+    # Unique per call and pinned until released, so concurrent calibrations never
+    # share a directory and eviction cannot remove the build before it is measured
+    workspace = f"{CALIBRATION_WORKSPACE}-{uuid.uuid4().hex[:8]}"
+    implementation._pinned_workspaces.add(workspace)
+    try:
+        for variant, cflags, kernel_code in _variants():
+            built = await implementation.make_custom_benchmark(
+                CC, cflags, "-fopenmp", _ALLOCATION, n=n, ntimes=ntimes,
+                kernel_code=kernel_code, workspace=workspace)
+            if built is not True:
+                trials.append({'variant': variant, 'error': str(built)[-1000:]})
+                continue
+            checked = implementation._parse_output(
+                await implementation.test_correctness(workspace=workspace)) or {}
+            if checked.get('correctness') != "PASS":
+                trials.append({'variant': variant, 'error': f"incorrect results: {checked.get('errors')}"})
+                continue
+            for placement, env in placements.items():
+                output = await implementation.test_speed(workspace=workspace, repeats=repeats,
+                                                         env=env, record=False)
+                result = implementation._parse_output(output)
+                if result is None:
+                    trials.append({'variant': variant, 'threads': placement, 'error': output[-1000:]})
+                    continue
+                gb_s = {k[:-len(experiments.KERNEL_SUFFIX)]: v for k, v in result.items()
+                        if k.endswith(experiments.KERNEL_SUFFIX)}
+                trials.append({'variant': variant, 'threads': placement, 'GB_s': gb_s})
+                for kernel, value in gb_s.items():
+                    if value > peaks.get(kernel, 0):
+                        peaks[kernel] = value
+                        best[kernel] = {'variant': variant, 'CFLAGS': cflags, 'env': env}
+    finally:
+        implementation._pinned_workspaces.discard(workspace)
+        implementation.release_workspace(workspace)
+    if not peaks:
+        print(f"Calibration failed: {trials}", file=sys.stderr)
+        return f"Error: Calibration failed: {json.dumps(trials)}"
+
+    details = {'n': n, 'ntimes': ntimes, 'CC': CC, 'best': best, 'trials': trials}
+    experiments.record_calibration(peaks, details)
+    return experiments.calibration()
@@ -0,0 +1,302 @@
+import asyncio
+import os
+import re
+import shlex
+import shutil
+import tempfile
+
+import compilers
+import implementation
+
+# Disassembly lines returned per hot loop
+MAX_LOOP_LINES = 64
+# Missed-optimization remarks returned per kernel
+MAX_MISSED_REMARKS = 20
+
+_X86_REGISTER_BYTES = {'zmm': 64, 'ymm': 32, 'xmm': 16}
+_ARM_VECTOR = re.compile(r"\bv\d+\.\d+[bhsd]\b")
+_ARM_SVE = re.compile(r"\bz\d+\.[bhsdq]\b")
+_BRANCH_TARGET = re.compile(r"\b([0-9a-f]+) <")
+
+
+def _remark_flags(identity: str):
+    """Flags making the compiler explain its vectorization decisions, or None if unknown."""
+    if "clang" in identity:
+        return ["-Rpass=loop-vectorize", "-Rpass-missed=loop-vectorize", "-Rpass-analysis=loop-vectorize"]
+    if "gcc" in identity or "Free Software Foundation" in identity:
+        return ["-fopt-info-vec-optimized", "-fopt-info-vec-missed"]
+    return None
+
+
+async def _remarks(CC: str, flags: str, source: str, kernel: str, work_dir: str):
+    """Vectorization remarks for one kernel, compiled alone with its build flags."""
+    remark_flags = _remark_flags(await compilers.compiler_identity(CC))
+    if remark_flags is None:
+        return {'error': f"No optimization remarks known for {CC}"}
+    unit = implementation._kernel_source(source, [kernel])
+    # Report line numbers relative to the kernel's own code
+    offset = unit[:unit.find(f"// {kernel.upper()}_START")].count("\n") + 1
+    path = os.path.join(work_dir, f"{kernel}.c")
+    with open(path, "w") as f:
+        f.write(unit)
+    result = await implementation._run(
+        shlex.split(CC) + shlex.split(flags) + remark_flags + ["-c", "-o", os.devnull, path],
+        cwd=work_dir
+    )
+    optimized, missed = [], []
+    for line in (result.stdout + result.stderr).splitlines():
+        match = re.match(rf"{re.escape(path)}:(\d+):(\d+): (.*)", line)
+        if not match:
+            continue
+        text = f"{int(match.group(1)) - offset}:{match.group(2)}: {match.group(3).strip()}"
+        if "optimized:" in text or ("remark:" in text and "vectorized loop" in text):
+            optimized.append(text)
+        elif "missed:" in text or "remark:" in text:
+            missed.append(text)
+    return {
+        'optimized': list(dict.fromkeys(optimized)),
+        'missed': list(dict.fromkeys(missed))[:MAX_MISSED_REMARKS],
+    }
+
+
+def _split_operands(operands: str):
+    """Split at top-level commas; AT&T memory operands contain commas in parentheses."""
+    parts, depth, current = [], 0, ""
+    for ch in operands:
+        if ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _disassemble(text: str, kernel: str):
+    """Instructions of <kernel>_kernel and its outlined parts (OpenMP bodies, clones) as (address, mnemonic, operands)."""
+    instructions = []
+    inside = False
+    for line in text.splitlines():
+        header = re.match(r"[0-9a-f]+ <([^>]+)>:", line)
+        if header:
+            inside = header.group(1).startswith(f"{kernel}_kernel")
+            continue
+        if not inside:
+            continue
+        match = re.match(r"\s*([0-9a-f]+):\s+(.*)", line)
+        if not match:
+            continue
+        # Drop objdump's trailing comments (x86 "# addr <sym>", aarch64 "// b.any")
+        body = re.split(r"\s+(#|//)\s", match.group(2))[0].strip()
+        if not body or body.startswith("(bad)"):
+            continue
+        mnemonic, _, operands = body.partition(" ")
+        if "\t" in mnemonic:
+            mnemonic, _, rest = mnemonic.partition("\t")
+            operands = f"{rest} {operands}"
+        instructions.append((int(match.group(1), 16), mnemonic.strip(), operands.strip()))
+    return instructions
+
+
+def _is_branch(mnemonic: str, arm: bool):
+    if arm:
+        return mnemonic == "b" or mnemonic.startswith(("b.", "cbz", "cbnz", "tbz", "tbnz"))
+    return mnemonic.startswith("j")
+
+
+def _loops(instructions: list, arm: bool):
+    """Innermost loops: (start index, end index) of backward branches containing no other loop."""
+    index = {address: i for i, (address, _, _) in enumerate(instructions)}
+    loops = []
+    for i, (address, mnemonic, operands) in enumerate(instructions):
+        target = _BRANCH_TARGET.search(operands)
+        if _is_branch(mnemonic, arm) and target and int(target.group(1), 16) <= address:
+            start = index.get(int(target.group(1), 16))
+            if start is not None:
+                loops.append((start, i))
+    return [(s, e) for s, e in loops
+            if not any((s, e) != (s2, e2) and s <= s2 and e2 <= e for s2, e2 in loops)]
+
+
+def _memory_access(mnemonic: str, operands: str, arm: bool, sve_bytes: int):
+    """(kind, bytes, base register) of a load or store, None otherwise. kind is "load", "store" or "prefetch"."""
+    parts = _split_operands(operands)
+    if arm:
+        if mnemonic.startswith(("prfm", "prfb", "prfh", "prfw", "prfd")):
+            return "prefetch", 0, None
+        memory = next((p for p in parts if p.startswith("[")), None)
+        if memory is None or not mnemonic.startswith(("ld", "st")):
+            return None
+        base = re.match(r"\[(\w+)", memory).group(1)
+        registers = " ".join(p for p in parts if not p.startswith("["))
+        if _ARM_SVE.search(registers):
+            width = sve_bytes
+        elif _ARM_VECTOR.search(registers) or re.search(r"\bq\d+\b", registers):
+            width = 16
+        elif re.search(r"\b[dx]\d+\b", registers):
+            width = 8
+        else:
+            width = 4
+        if mnemonic.startswith(("ldp", "stp", "ldnp", "stnp")):
+            width *= 2
+        return ("store" if mnemonic.startswith("st") else "load"), width, base
+    if mnemonic.startswith("prefetch"):
+        return "prefetch", 0, None
+    memory = [i for i, p in enumerate(parts) if "(" in p]
+    if not memory:
+        return None
+    base = re.search(r"\((%\w+)?", parts[memory[0]]).group(1)
+    register = next((r for p in parts for r in _X86_REGISTER_BYTES if f"%{r}" in p), None)
+    if mnemonic.endswith(("sd", "sq")) or mnemonic in ("movq", "mov") or register is None:
+        width = 8
+    elif mnemonic.endswith("ss"):
+        width = 4
+    else:
+        width = _X86_REGISTER_BYTES[register]
+    if memory[-1] == len(parts) - 1 and "mov" in mnemonic:
+        return "store", width, base
+    return "load", width, base
+
+
+def _loop_summary(body: list, arm: bool, sve_bytes: int):
+    loads, stores, bases = 0, 0, set()
+    streaming = prefetches = 0
+    vector_bits = 0
+    for _, mnemonic, operands in body:
+        access = _memory_access(mnemonic, operands, arm, sve_bytes)
+        if arm:
+            if _ARM_SVE.search(operands):
+                vector_bits = max(vector_bits, sve_bytes * 8)
+            elif _ARM_VECTOR.search(operands):
+                vector_bits = max(vector_bits, 128)
+            elif re.match(r"f(add|mul|mla|mls|madd|msub|sub|div)", mnemonic) or (access and access[1] == 8):
+                vector_bits = max(vector_bits, 64)
+        else:
+            packed = not mnemonic.endswith(("sd", "ss")) and mnemonic.startswith("v") \
+                or mnemonic.endswith(("pd", "ps"))
+            for register, size in _X86_REGISTER_BYTES.items():
+                if f"%{register}" in operands:
+                    vector_bits = max(vector_bits, size * 8 if packed else 64)
+        if mnemonic.startswith(("movnt", "vmovnt", "stnp", "stnt")):
+            streaming += 1
+        if access is None:
+            continue
+        kind, width, base = access
+        if kind == "prefetch":
+            prefetches += 1
+        elif kind == "store":
+            stores += width
+        else:
+            loads += width
+            bases.add(base)
+    # Elements of double arrays processed per iteration: from the bytes stored, or for
+    # reductions from the bytes loaded per input array
+    if stores:
+        elements = stores / 8
+    elif loads:
+        elements = loads / 8 / max(1, len(bases))
+    else:
+        elements = 0
+    return {
+        'instructions': len(body),
+        'vector_bits': vector_bits or None,
+        'elements_per_iteration': elements or None,
+        'instructions_per_element': round(len(body) / elements, 2) if elements else None,
+        'bytes_loaded_per_iteration': loads,
+        'bytes_stored_per_iteration': stores,
+        'streaming_stores': streaming,
+        'prefetches': prefetches,
+    }
+
+
+def _kernel_codegen(disassembly: str, kernel: str, arm: bool, sve_bytes: int, listing: bool):
+    instructions = _disassemble(disassembly, kernel)
+    if not instructions:
+        return {'error': f"{kernel}_kernel not found in the binary (inlined or renamed?)"}
+    loops = []
+    for start, end in _loops(instructions, arm):
+        body = instructions[start:end + 1]
+        summary = _loop_summary(body, arm, sve_bytes)
+        summary['start'] = hex(body[0][0])
+        if listing:
+            summary['disassembly'] = [f"{a:x}: {m} {o}".rstrip() for a, m, o in body[:MAX_LOOP_LINES]]
+        loops.append(summary)
+    # The hot loop is the widest one, then the one doing the most work per iteration
+    loops.sort(key=lambda l: (l['vector_bits'] or 0, l['elements_per_iteration'] or 0), reverse=True)
+    whole = _loop_summary(instructions, arm, sve_bytes)
+    return {
+        'instructions': len(instructions),
+        'loops': len(loops),
+        'hot_loop': loops[0] if loops else None,
+        'other_loops': [{k: v for k, v in l.items() if k != 'disassembly'} for l in loops[1:]],
+        'streaming_stores': whole['streaming_stores'] > 0,
+        'prefetches': whole['prefetches'] > 0,
+    }
+
+
+@implementation._workspace_locked
+async def codegen_report(kernels: list = None, disassembly: bool = True,
+                         workspace: str = implementation.DEFAULT_WORKSPACE):
+    """
+    Describe the code generated for each kernel of the workspace's last build:
+    the compiler's vectorization remarks (the kernel recompiled alone with
+    the same flags) and a summary of its innermost loops from objdump.
+    Returns a dict keyed by kernel, or an error message.
+    """
+    work_dir = implementation._ensure_work_dir(workspace)
+    build = implementation._read_build_info(work_dir)
+    binary_path = os.path.join(work_dir, "stream_benchmark")
+    if build is None or not os.path.exists(binary_path):
+        return "Error: No build in this workspace; run make_stream_benchmark or make_custom_benchmark first."
+    available = ["copy", "scale", "add", "triad"] + build.get('extra_kernels', [])
+    kernels = kernels or available
+    unknown = set(kernels) - set(available)
+    if unknown:
+        return f"Error: kernels {sorted(unknown)} are not in the last build (built: {available})"
+
+    custom = build.get('kernels') or build.get('extra_kernels') or build.get('kernel_cflags')
+    source_file = "stream_benchmark_custom.c" if custom else "stream_benchmark.c"
+    with open(os.path.join(work_dir, source_file), "r") as f:
+        source = f.read()
+
+    if shutil.which("objdump") is None:
+        listing = None
+    else:
+        result = await implementation._run(["objdump", "-d", "--no-show-raw-insn", binary_path], cwd=work_dir)
+        listing = result.stdout if result.returncode == 0 else None
+    topology = implementation.cpu_topology()
+    arm = topology.get('machine') == "aarch64"
+    sve_bytes = (topology.get('simd', {}).get('vector_bits') or 128) // 8
+
+    CC = build['CC']
+    size_flags = implementation._size_flags(build.get('n'), build.get('ntimes'))
+    kernel_cflags = build.get('kernel_cflags') or {}
+    scratch = tempfile.mkdtemp(prefix="codegen-")
+    try:
+        remarks = await asyncio.gather(*[
+            _remarks(CC, " ".join(f for f in (build['CFLAGS'], kernel_cflags.get(k)) if f) + size_flags,
+                     source, k, scratch)
+            for k in kernels
+        ])
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        'CC': CC,
+        'CFLAGS': build['CFLAGS'],
+        'kernel_cflags': kernel_cflags,
+        'kernels': {},
+    }
+    for kernel, kernel_remarks in zip(kernels, remarks):
+        entry = {'remarks': kernel_remarks}
+        if listing is None:
+            entry['codegen'] = {'error': "objdump not available"}
+        else:
+            entry['codegen'] = _kernel_codegen(listing, kernel, arm, sve_bytes, disassembly)
+        report['kernels'][kernel] = entry
+    return report
@@ -0,0 +1,263 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shlex
+import shutil
+import sys
+import tempfile
+
+# Probe results per compiler identity and flag, kept across restarts
+PROBE_CACHE_FILE = "/tmp/benchmark_flag_probes.json"
+
+# Compiler names looked for on PATH, optionally versioned (gcc-13, clang-17)
+_COMPILER_NAMES = re.compile(r"(gcc|clang|cc|icx|icc|fcc|armclang|nvc|craycc)(-\d+(\.\d+)*)?")
+
+# Options whose value is the next argument
+_OPTIONS_WITH_VALUE = {"-mllvm", "-Xclang", "-Xlinker", "-Xpreprocessor", "-include",
+                       "-isystem", "-I", "-L", "-D", "-U", "-x"}
+
+# A small vectorizable loop, so code-generation flags have something to act on
+_PROBE_SOURCE = """double a[64], b[64];
+int main(void) {
+    for (int i = 0; i < 64; i++) {
+        a[i] = 2.0 * b[i];
+    }
+    return (int)a[1];
+}
+"""
+
+_compiler_ids = {}
+_probes = None
+_host_features = None
+
+
+def _cpu_features():
+    """ISA extensions of this host's CPU from /proc/cpuinfo ("flags" on x86, "Features" on Arm)."""
+    global _host_features
+    if _host_features is None:
+        _host_features = set()
+        try:
+            with open("/proc/cpuinfo", "r") as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if key.strip() in ("flags", "Features"):
+                        _host_features = set(value.split())
+                        break
+        except OSError:
+            pass
+    return _host_features
+
+
+def _host_mismatch(flag: str):
+    """Why a binary built with an -m<extension> flag would not run here, or None."""
+    match = re.fullmatch(r"-m(\w+)", flag)
+    features = _cpu_features()
+    if not match or not features:
+        return None
+    extension = match.group(1)
+    # Only ISA extensions the kernel reports are checked, e.g. -mavx512f, -mavx2, -mfma
+    known = {"avx512f", "avx512bw", "avx512cd", "avx512dq", "avx512vl", "avx2", "avx", "fma",
+             "sse4_2", "sse4_1", "ssse3", "sse3", "f16c", "bmi2", "sve", "sve2"}
+    extension = extension.replace("sse4.", "sse4_")
+    if extension in known and extension not in features:
+        return f"This host's CPU lacks {extension}; the binary may die with SIGILL"
+    return None
+
+
+async def _run(cmd, cwd=None):
+    """Run a short compiler command; returns (returncode, stdout, stderr)."""
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=cwd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+    return process.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+
+async def compiler_identity(CC: str):
+    """
+    Resolved path plus `--version` output of a compiler, memoized per CC
+    string; CC itself if it names no runnable compiler.
+    """
+    if CC not in _compiler_ids:
+        try:
+            cmd = shlex.split(CC or "")
+        except ValueError:
+            return CC
+        if not cmd:
+            return CC
+        path = os.path.realpath(shutil.which(cmd[0]) or cmd[0])
+        try:
+            _, stdout, _ = await _run(cmd + ["--version"])
+        except (FileNotFoundError, PermissionError):
+            # Don't memoize: the compiler may be installed later
+            return CC
+        _compiler_ids[CC] = f"{CC}\n{path}\n{stdout}"
+    return _compiler_ids[CC]
+
+
+def _identity_hash(identity: str):
+    return hashlib.sha256(identity.encode()).hexdigest()[:16]
+
+
+async def list_compilers():
+    """
+    The C compilers on PATH: one entry per distinct executable, with the names
+    it is reachable under, its version line and target triple.
+    """
+    found = {}
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        for name in sorted(names):
+            path = os.path.join(directory, name)
+            if not _COMPILER_NAMES.fullmatch(name) or not os.access(path, os.X_OK):
+                continue
+            real = os.path.realpath(path)
+            # The first PATH entry is the one a bare name resolves to
+            if shutil.which(name) == path:
+                found.setdefault(real, []).append(name)
+
+    async def describe(real, names):
+        identity = await compiler_identity(names[0])
+        try:
+            _, target, _ = await _run(shlex.split(names[0]) + ["-dumpmachine"])
+        except OSError:
+            target = ""
+        version = identity.split("\n")[2] if identity.count("\n") >= 2 else ""
+        return {
+            'CC': names[0],
+            'aliases': names[1:],
+            'path': real,
+            'version': version,
+            'target': target.strip(),
+            'identity': _identity_hash(identity),
+        }
+
+    # Prefer the plain name (gcc over cc or gcc-12) as the one to pass as CC
+    return await asyncio.gather(*[
+        describe(real, sorted(names, key=lambda name: (name == "cc", "-" in name, name)))
+        for real, names in found.items()
+    ])
+
+
+def split_flags(flags: str):
+    """Split a flag string into single options, keeping options and their values together."""
+    tokens = shlex.split(flags or "")
+    grouped = []
+    for token in tokens:
+        if grouped and grouped[-1] in _OPTIONS_WITH_VALUE:
+            grouped[-1] += f" {shlex.quote(token)}"
+        else:
+            grouped.append(token)
+    return grouped
+
+
+def _load_probes():
+    global _probes
+    if _probes is None:
+        try:
+            with open(PROBE_CACHE_FILE, "r") as f:
+                _probes = json.load(f)
+        except (OSError, ValueError):
+            _probes = {}
+    return _probes
+
+
+def _save_probes():
+    try:
+        directory = os.path.dirname(PROBE_CACHE_FILE) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-probes-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(_probes, f)
+        os.replace(tmp_path, PROBE_CACHE_FILE)
+    except OSError as e:
+        print(f"Saving flag probes failed: {e}", file=sys.stderr)
+
+
+async def _probe(CC: str, flag: str, work_dir: str):
+    """Compile and link the probe program with one flag."""
+    output = os.path.join(work_dir, f"probe-{hashlib.sha256(flag.encode()).hexdigest()[:12]}")
+    returncode, stdout, stderr = await _run(
+        shlex.split(CC) + shlex.split(flag) + ["-o", output, os.path.join(work_dir, "probe.c")],
+        cwd=work_dir
+    )
+    message = (stdout + stderr).strip()[-1000:]
+    if returncode != 0:
+        return {'status': "unsupported", 'message': message}
+    # Compilers warn rather than fail for flags they ignore (clang: "optimization flag ... is not supported")
+    if message:
+        return {'status': "warning", 'message': message}
+    return {'status': "ok"}
+
+
+async def check_flags(CC: str, CFLAGS: str = "", LDFLAGS: str = ""):
+    """
+    Probe each of CFLAGS (and LDFLAGS as a whole) with a tiny compile-and-link.
+    Results are cached per compiler identity, so a flag is probed once per compiler.
+    Returns {"CC", "identity", "flags": [{"flag", "status", "message"}], "ok"}
+    where status is "ok", "warning" (accepted with a diagnostic, often meaning
+    ignored) or "unsupported"; or an error message if CC is not found.
+    """
+    if not CC or not CC.strip():
+        return "Error: CC is empty; name a C compiler, e.g. gcc or clang."
+    identity = await compiler_identity(CC)
+    if identity == CC:
+        return f"Error: compiler '{CC}' not found."
+    identity = _identity_hash(identity)
+    flags = split_flags(CFLAGS)
+    if LDFLAGS and LDFLAGS.strip():
+        flags.append(LDFLAGS.strip())
+    probes = _load_probes().setdefault(identity, {})
+    pending = [flag for flag in dict.fromkeys(flags) if flag not in probes]
+    if pending:
+        work_dir = tempfile.mkdtemp(prefix="flag-probe-")
+        try:
+            with open(os.path.join(work_dir, "probe.c"), "w") as f:
+                f.write(_PROBE_SOURCE)
+            results = await asyncio.gather(*[_probe(CC, flag, work_dir) for flag in pending])
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        probes.update(zip(pending, results))
+        _save_probes()
+    report = [{'flag': flag, **probes[flag]} for flag in flags]
+    for r in report:
+        mismatch = _host_mismatch(r['flag'])
+        if r['status'] == "ok" and mismatch:
+            r.update(status="warning", message=mismatch)
+    return {
+        'CC': CC,
+        'identity': identity,
+        'flags': report,
+        'ok': all(r['status'] != "unsupported" for r in report),
+    }
+
+
+async def reject_flags(CC: str, CFLAGS: str = "", LDFLAGS: str = "", kernel_cflags: dict = None):
+    """
+    Pre-build check: None if the compiler takes every flag, otherwise an error
+    message naming the unsupported ones. Flags that only draw warnings pass
+    but are logged.
+    """
+    all_cflags = " ".join([CFLAGS or ""] + [v for v in (kernel_cflags or {}).values() if v])
+    report = await check_flags(CC, all_cflags, LDFLAGS)
+    if isinstance(report, str):
+        return report
+    for r in report['flags']:
+        if r['status'] == "warning":
+            print(f"{CC} warns about {r['flag']}: {r['message']}", file=sys.stderr)
+    unsupported = [r for r in report['flags'] if r['status'] == "unsupported"]
+    if not unsupported:
+        return None
+    return f"Error: {CC} rejects " + "; ".join(f"{r['flag']}: {r['message']}" for r in unsupported)
@@ -0,0 +1,227 @@
+import asyncio
+import json
+import math
+import sys
+import uuid
+from urllib.parse import urlparse
+
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+import experiments
+
+# How often a worker's background job is polled, and the timeout of each MCP call
+POLL_INTERVAL = 5.0
+CALL_TIMEOUT = 60.0
+
+# Worker servers by MCP endpoint URL
+WORKERS = {}
+
+
+class WorkerError(Exception):
+    pass
+
+
+def _mcp_url(url: str):
+    """Accept host:port, http://host:port or a full endpoint URL; FastMCP serves on /mcp."""
+    if "://" not in url:
+        url = f"http://{url}"
+    parsed = urlparse(url)
+    if parsed.path in ("", "/"):
+        url = url.rstrip("/") + "/mcp"
+    return url
+
+
+def _decode(result):
+    """The value a worker tool returned, from its CallToolResult."""
+    structured = getattr(result, 'structuredContent', None)
+    if structured is not None:
+        return structured['result'] if set(structured) == {'result'} else structured
+    values = []
+    for item in result.content:
+        text = getattr(item, 'text', None)
+        try:
+            values.append(json.loads(text))
+        except (TypeError, ValueError):
+            values.append(text)
+    return values[0] if len(values) == 1 else values
+
+
+class Worker:
+    """A remote instance of this server, driven over streamable HTTP."""
+
+    def __init__(self, url: str):
+        self.url = _mcp_url(url)
+        self.topology = None
+        self.busy = False
+        self.healthy = True
+        self.last_error = None
+        self.evaluated = 0
+
+    @property
+    def host(self):
+        return (self.topology or {}).get('hostname') or urlparse(self.url).hostname
+
+    async def call(self, tool: str, arguments: dict = None):
+        # One short-lived session per call, so a restarted worker is picked up transparently
+        async with streamablehttp_client(self.url, timeout=CALL_TIMEOUT) as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                result = await session.call_tool(tool, arguments or {})
+        value = _decode(result)
+        if result.isError:
+            raise WorkerError(f"{self.url} {tool}: {value}")
+        return value
+
+    async def connect(self):
+        """Fetch the worker's host topology; marks the worker healthy or not."""
+        try:
+            topology = await self.call("list_cpu_info")
+            self.topology = json.loads(topology) if isinstance(topology, str) else topology
+            self.healthy = True
+            self.last_error = None
+        except Exception as e:
+            self.healthy = False
+            self.last_error = str(e)
+        return self.healthy
+
+    async def run_job(self, tool: str, arguments: dict):
+        """Run a tool as a background job on the worker and poll until it finishes."""
+        submitted = await self.call(tool, {**arguments, 'background': True})
+        if not isinstance(submitted, dict) or 'job_id' not in submitted:
+            raise WorkerError(f"{self.url} {tool}: {submitted}")
+        job_id = submitted['job_id']
+        try:
+            while True:
+                await asyncio.sleep(POLL_INTERVAL)
+                status = await self.call("job_status", {'job_id': job_id})
+                if not isinstance(status, dict):
+                    raise WorkerError(f"{self.url} job_status: {status}")
+                if status['state'] == "done":
+                    return await self.call("job_result", {'job_id': job_id})
+                if status['state'] in ("failed", "cancelled"):
+                    raise WorkerError(f"{self.url} {tool} {status['state']}: {status.get('error')}")
+        except asyncio.CancelledError:
+            # Don't leave the worker measuring for a campaign nobody waits for
+            try:
+                await asyncio.shield(self.call("cancel_job", {'job_id': job_id}))
+            except Exception:
+                pass
+            raise
+
+    def describe(self):
+        return {
+            'url': self.url,
+            'host': self.host,
+            'healthy': self.healthy,
+            'busy': self.busy,
+            'evaluated': self.evaluated,
+            'last_error': self.last_error,
+            'topology': self.topology,
+        }
+
+
+def add_worker(url: str):
+    worker = Worker(url)
+    return WORKERS.setdefault(worker.url, worker)
+
+
+async def register_worker(url: str):
+    """Add a worker and check that it answers. Returns its description."""
+    worker = add_worker(url)
+    await worker.connect()
+    return worker.describe()
+
+
+def remove_worker(url: str):
+    return WORKERS.pop(_mcp_url(url), None) is not None
+
+
+async def list_workers(refresh: bool = False):
+    if refresh:
+        await asyncio.gather(*[w.connect() for w in WORKERS.values() if not w.busy])
+    return [w.describe() for w in WORKERS.values()]
+
+
+async def distributed_sweep(candidates: list, rank_by: str = "triad",
+                            n: int = None, ntimes: int = None,
+                            abort_below: float = None, batch_size: int = None):
+    """
+    Evaluate candidates across all registered workers. Candidates are handed out
+    in batches from a shared queue to each worker's sweep_build_configs (which
+    builds a batch concurrently and measures it serially under the worker's
+    node-wide measurement lock), so faster nodes take more batches. A worker
+    that fails is dropped and its batch requeued. Returns the merged ranking,
+    each row tagged with the worker and host that measured it, plus the hosts'
+    topology.
+    """
+    if not WORKERS:
+        return "Error: No workers registered (start with --workers or call register_worker)."
+    await asyncio.gather(*[w.connect() for w in WORKERS.values() if w.topology is None or not w.healthy])
+    workers = [w for w in WORKERS.values() if w.healthy]
+    if not workers:
+        return "Error: No worker is reachable: " + "; ".join(f"{w.url}: {w.last_error}" for w in WORKERS.values())
+
+    batch_size = batch_size or max(1, math.ceil(len(candidates) / (2 * len(workers))))
+    queue = [list(range(i, min(i + batch_size, len(candidates)))) for i in range(0, len(candidates), batch_size)]
+    rows = []
+    # Unique per call, so concurrent sweeps sent to the same worker never share its work directories
+    workspace = f"distributed-{uuid.uuid4().hex[:8]}"
+
+    async def drive(worker):
+        worker.busy = True
+        try:
+            while queue:
+                batch = queue.pop(0)
+                try:
+                    result = await worker.run_job("sweep_build_configs", {
+                        'candidates': [candidates[i] for i in batch],
+                        'rank_by': rank_by,
+                        'n': n or 0,
+                        'ntimes': ntimes or 0,
+                        'abort_below': abort_below or 0,
+                        'workspace': workspace,
+                    })
+                    if isinstance(result, dict):
+                        result = [result]
+                    if not isinstance(result, list):
+                        raise WorkerError(f"{worker.url}: unexpected sweep result {result}")
+                except Exception as e:
+                    print(f"Worker {worker.url} failed: {e}", file=sys.stderr)
+                    worker.healthy = False
+                    worker.last_error = str(e)
+                    queue.insert(0, batch)
+                    return
+                for row in result:
+                    row['index'] = batch[row['index']]
+                    row['worker'] = worker.url
+                    row['host'] = worker.host
+                    row.pop('rank', None)
+                    rows.append(row)
+                worker.evaluated += len(batch)
+        finally:
+            worker.busy = False
+
+    # A batch requeued by a failing worker may arrive after the others went idle
+    while queue and workers:
+        await asyncio.gather(*[drive(w) for w in workers])
+        workers = [w for w in workers if w.healthy]
+    for batch in queue:
+        for i in batch:
+            rows.append({'index': i, **{k: candidates[i].get(k) for k in ('CC', 'CFLAGS', 'LDFLAGS')},
+                         'status': "worker_failed", 'error': "No healthy worker left"})
+
+    key = f"{rank_by}{experiments.KERNEL_SUFFIX}"
+    rows.sort(key=lambda r: -r[key] if r['status'] == "ok" and isinstance(r.get(key), (int, float))
+              else float("inf"))
+    for rank, row in enumerate(rows, 1):
+        row['rank'] = rank
+    hosts = {w.host: w.topology for w in WORKERS.values() if w.topology}
+    return {
+        'best': rows[0] if rows and rows[0]['status'] == "ok" else None,
+        'ranking': rows,
+        'hosts': hosts,
+        # Bandwidths are only comparable between identical nodes
+        'heterogeneous': len({json.dumps({k: t.get(k) for k in ('model_name', 'cores_logical')}, sort_keys=True)
+                              for t in hosts.values()}) > 1,
+    }
@@ -0,0 +1,241 @@
+import hashlib
+import json
+import socket
+import sqlite3
+import time
+
+# SQLite database recording every measured build. Point DB_PATH at a persistent
+# location to carry results across server restarts.
+DB_PATH = "/tmp/autotune_experiments.db"
+
+KERNEL_SUFFIX = "_GB_s"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp REAL NOT NULL,
+    host TEXT NOT NULL,
+    workspace TEXT,
+    build_hash TEXT,
+    config_hash TEXT NOT NULL,
+    CC TEXT,
+    CFLAGS TEXT,
+    LDFLAGS TEXT,
+    kernels TEXT,
+    n INTEGER,
+    ntimes INTEGER,
+    checksum REAL,
+    host_info TEXT,
+    raw TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    kernel TEXT NOT NULL,
+    gb_s REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calibrations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp REAL NOT NULL,
+    host TEXT NOT NULL,
+    peaks TEXT NOT NULL,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_config ON runs(config_hash);
+CREATE INDEX IF NOT EXISTS results_kernel ON results(kernel, gb_s);
+"""
+
+
+# Columns added after the first release, created on databases that predate them
+_ADDED_COLUMNS = {'n': "INTEGER", 'ntimes': "INTEGER", 'kernel_cflags': "TEXT", 'run_env': "TEXT",
+                  'mode': "TEXT", 'build_mode': "TEXT"}
+
+# Value of runs.mode for test_speed_resident runs; NULL marks a fresh benchmark process
+RESIDENT_MODE = "resident"
+
+# Value of runs.build_mode for builds compiled as separate units (make_custom_benchmark);
+# NULL marks a single translation unit (make_stream_benchmark), which the compiler optimizes as a whole
+UNITS_BUILD = "units"
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(_SCHEMA)
+    columns = {row['name'] for row in conn.execute("PRAGMA table_info(runs)")}
+    for name, kind in _ADDED_COLUMNS.items():
+        if name not in columns:
+            conn.execute(f"ALTER TABLE runs ADD COLUMN {name} {kind}")
+    return conn
+
+
+def config_hash(CC: str, CFLAGS: str, LDFLAGS: str, kernels: dict = None,
+                n: int = None, ntimes: int = None, kernel_cflags: dict = None,
+                run_env: dict = None, mode: str = None, build_mode: str = None):
+    """
+    Hash of what the agent controls: compiler name, flags, kernel overrides,
+    problem size, per-kernel flags, the run environment (thread count and
+    placement), how it was measured (mode, None = fresh process) and how it
+    was compiled (build_mode, None = single translation unit).
+    """
+    kernels = {k: v for k, v in (kernels or {}).items() if v}
+    kernel_cflags = {k: v for k, v in (kernel_cflags or {}).items() if v}
+    parts = [CC, CFLAGS, LDFLAGS, kernels]
+    # Every build records its effective n and ntimes; only runs stored before
+    # it did (n and ntimes NULL) hash without them
+    if n or ntimes:
+        parts += [n or None, ntimes or None]
+    if kernel_cflags:
+        parts.append({'kernel_cflags': kernel_cflags})
+    if run_env:
+        parts.append({'run_env': run_env})
+    if mode:
+        parts.append({'mode': mode})
+    if build_mode:
+        parts.append({'build_mode': build_mode})
+    payload = json.dumps(parts, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def record_run(build: dict, output: dict, host_info: dict = None, workspace: str = None,
+               run_env: dict = None, mode: str = None):
+    """
+    Store one benchmark run. build is the metadata written at build time
+    (build_hash, CC, CFLAGS, LDFLAGS, kernels, kernel_cflags, n, ntimes, build_mode); output is the parsed JSON
+    printed by the binary; run_env the environment variables (and "taskset" CPU list)
+    the binary ran with; mode RESIDENT_MODE for runs in the resident harness.
+    Returns the new run ID.
+    """
+    kernels = build.get('kernels') or {}
+    kernel_cflags = build.get('kernel_cflags') or {}
+    with _connect() as conn:
+        cursor = conn.execute(
+            "INSERT INTO runs (timestamp, host, workspace, build_hash, config_hash, CC, CFLAGS, LDFLAGS,"
+            " kernels, kernel_cflags, n, ntimes, checksum, host_info, raw, run_env, mode, build_mode)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (time.time(), socket.gethostname(), workspace, build.get('build_hash'),
+             config_hash(build.get('CC'), build.get('CFLAGS'), build.get('LDFLAGS'), kernels,
+                         build.get('n'), build.get('ntimes'), kernel_cflags, run_env, mode,
+                         build.get('build_mode')),
+             build.get('CC'), build.get('CFLAGS'), build.get('LDFLAGS'),
+             json.dumps(kernels), json.dumps(kernel_cflags) if kernel_cflags else None,
+             build.get('n'), build.get('ntimes'), output.get('checksum'),
+             json.dumps(host_info) if host_info is not None else None, json.dumps(output),
+             json.dumps(run_env) if run_env else None, mode, build.get('build_mode'))
+        )
+        run_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO results (run_id, kernel, gb_s) VALUES (?, ?, ?)",
+            [(run_id, key[:-len(KERNEL_SUFFIX)], value) for key, value in output.items()
+             if key.endswith(KERNEL_SUFFIX) and isinstance(value, (int, float))]
+        )
+    conn.close()
+    return run_id
+
+
+def _run_summary(conn, row):
+    results = conn.execute("SELECT kernel, gb_s FROM results WHERE run_id = ?", (row['id'],))
+    return {
+        'run_id': row['id'],
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(row['timestamp'])),
+        'host': row['host'],
+        'build_hash': row['build_hash'],
+        'CC': row['CC'],
+        'CFLAGS': row['CFLAGS'],
+        'LDFLAGS': row['LDFLAGS'],
+        'kernels': json.loads(row['kernels'] or "{}"),
+        'kernel_cflags': json.loads(row['kernel_cflags'] or "{}"),
+        'run_env': json.loads(row['run_env'] or "{}"),
+        'mode': row['mode'],
+        'build_mode': row['build_mode'],
+        'n': row['n'],
+        'ntimes': row['ntimes'],
+        'checksum': row['checksum'],
+        'GB_s': {r['kernel']: r['gb_s'] for r in results},
+    }
+
+
+def top_configs(kernel: str = "triad", k: int = 10, all_hosts: bool = False,
+                n: int = None, ntimes: int = None, mode: str = None):
+    """
+    The k runs measured in mode (None = fresh process) with the highest
+    bandwidth for kernel, best first (each configuration once). Only runs of
+    problem size n and ntimes count when they are given (None = any size).
+    """
+    query = ("SELECT runs.*, MAX(results.gb_s) AS best FROM runs JOIN results ON results.run_id = runs.id"
+             " WHERE results.kernel = ? AND runs.mode IS ?")
+    params = [kernel, mode]
+    if n is not None:
+        query += " AND runs.n = ?"
+        params.append(n)
+    if ntimes is not None:
+        query += " AND runs.ntimes = ?"
+        params.append(ntimes)
+    if not all_hosts:
+        query += " AND runs.host = ?"
+        params.append(socket.gethostname())
+    query += " GROUP BY runs.config_hash, runs.host ORDER BY best DESC LIMIT ?"
+    params.append(k)
+    conn = _connect()
+    try:
+        return [_run_summary(conn, row) for row in conn.execute(query, params)]
+    finally:
+        conn.close()
+
+
+def best_bandwidth(kernel: str, n: int = None, ntimes: int = None, all_hosts: bool = False,
+                   mode: str = None):
+    """Highest bandwidth recorded for kernel at this problem size in mode, or None."""
+    query = ("SELECT MAX(results.gb_s) AS best FROM runs JOIN results ON results.run_id = runs.id"
+             " WHERE results.kernel = ? AND runs.n IS ? AND runs.ntimes IS ? AND runs.mode IS ?")
+    params = [kernel, n or None, ntimes or None, mode]
+    if not all_hosts:
+        query += " AND runs.host = ?"
+        params.append(socket.gethostname())
+    conn = _connect()
+    try:
+        return conn.execute(query, params).fetchone()['best']
+    finally:
+        conn.close()
+
+
+def find_runs(CC: str, CFLAGS: str, LDFLAGS: str, kernels: dict = None, all_hosts: bool = False,
+              n: int = None, ntimes: int = None, kernel_cflags: dict = None,
+              run_env: dict = None, mode: str = None, build_mode: str = None):
+    """All previous runs of exactly this configuration measured in mode and built in build_mode, newest first."""
+    query = "SELECT * FROM runs WHERE config_hash = ?"
+    params = [config_hash(CC, CFLAGS, LDFLAGS, kernels, n, ntimes, kernel_cflags, run_env, mode, build_mode)]
+    if not all_hosts:
+        query += " AND host = ?"
+        params.append(socket.gethostname())
+    query += " ORDER BY timestamp DESC"
+    conn = _connect()
+    try:
+        return [_run_summary(conn, row) for row in conn.execute(query, params)]
+    finally:
+        conn.close()
+
+
+def record_calibration(peaks: dict, details: dict = None):
+    """Store this host's attainable bandwidth per kernel ({kernel: GB/s}) and how it was measured."""
+    with _connect() as conn:
+        conn.execute(
+            "INSERT INTO calibrations (timestamp, host, peaks, details) VALUES (?, ?, ?, ?)",
+            (time.time(), socket.gethostname(), json.dumps(peaks), json.dumps(details or {}))
+        )
+    conn.close()
+
+
+def calibration(host: str = None):
+    """The latest calibration of host (default: this one), or None if it was never calibrated."""
+    conn = _connect()
+    row = conn.execute("SELECT * FROM calibrations WHERE host = ? ORDER BY timestamp DESC LIMIT 1",
+                       (host or socket.gethostname(),)).fetchone()
+    conn.close()
+    if row is None:
+        return None
+    return {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(row['timestamp'])),
+        'host': row['host'],
+        'peak_GB_s': json.loads(row['peaks']),
+        **json.loads(row['details'] or "{}"),
+    }
@@ -1,82 +1,908 @@
+import asyncio
+import copy
+import fcntl
+import functools
+import glob
+import json
+import re
 import subprocess
 import time
 import os
+import uuid
 import sys
 import platform
 import shutil
+import signal
+import statistics
+
+import allocators
+import buildcache
+import compilers
+import experiments
+import kernels as kernel_registry
+import runstats
+
+try:
+    import numpy as np
+except ImportError:  # The reference model falls back to plain Python
+    np = None
 
 # Working directory - use /tmp for Singularity compatibility
-WORK_DIR = "/tmp/benchmark_work"
+WORK_DIR = "/tmp/benchmark_work"  # Root holding one subdirectory per workspace
 SOURCE_DIR = "benchmark"  # Original read-only source location
+DEFAULT_WORKSPACE = "default"
+# Workspace new ones are copied from instead of SOURCE_DIR once it holds a
+# built baseline (set by prewarm), so they start ready to run
+SEED_WORKSPACE = None
+
+# Workspace eviction policy: least recently used workspaces beyond
+# MAX_WORKSPACES, and any idle for longer than WORKSPACE_TTL seconds, are removed
+MAX_WORKSPACES = 64
+WORKSPACE_TTL = 6 * 3600
+
+# flock()ed around every timed run, so separate server processes on one node
+# (e.g. several workers of a coordinator) never measure at the same time.
+# Must be on a node-local filesystem.
+MEASURE_LOCK_FILE = "/tmp/benchmark_measure.lock"
+
+# Default array length: the source's N unless the three arrays would take more
+# than MEMORY_FRACTION of the memory available to this process, or would not
+# each be LLC_FACTOR times the last-level cache capacity
+MEMORY_FRACTION = 0.5
+LLC_FACTOR = 4
+
+_workspace_locks = {}
+# Workspaces kept from eviction while a multi-step operation (a sweep) still needs them
+_pinned_workspaces = set()
+_measure_lock = None
+
+def _workspace_path(workspace):
+    if not re.fullmatch(r"[A-Za-z0-9_.-]+", workspace) or workspace.startswith("."):
+        raise ValueError(f"Invalid workspace name: '{workspace}'")
+    return os.path.join(WORK_DIR, workspace)
 
-def _ensure_work_dir():
+def _ensure_work_dir(workspace=DEFAULT_WORKSPACE):
     """
     Ensure we have a writable working directory with benchmark sources.
-    Copies from /app/benchmark to /tmp/benchmark_work if needed.
+    Each workspace gets its own copy of /app/benchmark under /tmp/benchmark_work,
+    so concurrent sessions never overwrite each other's sources or binaries.
+    Once SEED_WORKSPACE is set, new workspaces copy it instead, prebuilt binary included.
     Works with both Docker (writable /app) and Singularity (read-only /app, writable /tmp).
     """
-    if not os.path.exists(WORK_DIR):
+    work_dir = _workspace_path(workspace)
+    if not os.path.exists(work_dir):
+        source_dir = SOURCE_DIR
+        if SEED_WORKSPACE and SEED_WORKSPACE != workspace and os.path.isdir(_workspace_path(SEED_WORKSPACE)):
+            source_dir = _workspace_path(SEED_WORKSPACE)
+            # Using the seed keeps it from being evicted as idle
+            os.utime(source_dir)
         try:
-            shutil.copytree(SOURCE_DIR, WORK_DIR)
-            print(f"Set up working directory: {WORK_DIR}", file=sys.stderr)
+            shutil.copytree(source_dir, work_dir)
+            print(f"Set up working directory: {work_dir}", file=sys.stderr)
         except Exception as e:
             raise RuntimeError(f"Failed to set up working directory: {e}")
-    return WORK_DIR
+        cleanup_workspaces()
+    # The directory mtime records last use, so eviction survives server restarts
+    os.utime(work_dir)
+    return work_dir
+
+def _existing_work_dir(workspace=DEFAULT_WORKSPACE):
+    """The workspace's directory if it exists (marking it used), else None. Runs never create workspaces."""
+    work_dir = _workspace_path(workspace)
+    if not os.path.isdir(work_dir):
+        return None
+    os.utime(work_dir)
+    return work_dir
+
+def _missing_workspace(workspace):
+    error_msg = f"Failure: Workspace '{workspace}' does not exist; build the benchmark first."
+    print(error_msg, file=sys.stderr)
+    return error_msg
+
+def _workspace_lock(workspace):
+    if workspace not in _workspace_locks:
+        _workspace_locks[workspace] = asyncio.Lock()
+    return _workspace_locks[workspace]
+
+def _workspace_locked(fn):
+    """Serialize builds and runs within one workspace; different workspaces proceed in parallel."""
+    @functools.wraps(fn)
+    async def wrapper(*args, workspace=DEFAULT_WORKSPACE, **kwargs):
+        async with _workspace_lock(workspace):
+            return await fn(*args, workspace=workspace, **kwargs)
+    return wrapper
+
+class _MeasurementLock:
+    """An asyncio lock for this process plus an flock on MEASURE_LOCK_FILE for the node."""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._fd = None
 
-def make_stream_benchmark(CC: str, CFLAGS: str, LDFLAGS: str):
+    def locked(self):
+        return self._lock.locked()
+
+    async def __aenter__(self):
+        await self._lock.acquire()
+        try:
+            self._fd = os.open(MEASURE_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o666)
+        except OSError as e:
+            print(f"Measurement lock file unavailable, locking this process only: {e}", file=sys.stderr)
+            return self
+        try:
+            # Poll rather than block so the event loop keeps serving requests
+            while True:
+                try:
+                    fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return self
+                except BlockingIOError:
+                    await asyncio.sleep(0.05)
+        except BaseException:
+            os.close(self._fd)
+            self._fd = None
+            self._lock.release()
+            raise
+
+    async def __aexit__(self, *exc_info):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._lock.release()
+
+def _measurement_lock():
+    """Held by every timed run so measurements never compete for memory bandwidth."""
+    global _measure_lock
+    if _measure_lock is None:
+        _measure_lock = _MeasurementLock()
+    return _measure_lock
+
+def list_workspaces():
+    workspaces = []
+    if os.path.isdir(WORK_DIR):
+        now = time.time()
+        for name in sorted(os.listdir(WORK_DIR)):
+            path = os.path.join(WORK_DIR, name)
+            if not os.path.isdir(path):
+                continue
+            workspaces.append({
+                'workspace': name,
+                'idle_seconds': round(now - os.path.getmtime(path), 1),
+                'busy': (name in _workspace_locks and _workspace_locks[name].locked()) or name in _pinned_workspaces,
+                'has_binary': os.path.exists(os.path.join(path, "stream_benchmark")),
+            })
+    return workspaces
+
+def release_workspace(workspace: str):
+    """Delete a workspace directory. Refuses while a build or run is using it."""
+    work_dir = _workspace_path(workspace)
+    lock = _workspace_locks.get(workspace)
+    if (lock is not None and lock.locked()) or workspace in _pinned_workspaces:
+        return f"Error: Workspace '{workspace}' is busy."
+    if not os.path.exists(work_dir):
+        return f"Error: Workspace '{workspace}' does not exist."
+    shutil.rmtree(work_dir, ignore_errors=True)
+    _workspace_locks.pop(workspace, None)
+    print(f"Removed working directory: {work_dir}", file=sys.stderr)
+    return True
+
+def cleanup_workspaces():
+    """Apply the eviction policy; busy workspaces are never removed. Returns the evicted names."""
+    workspaces = [w for w in list_workspaces() if not w['busy']]
+    workspaces.sort(key=lambda w: w['idle_seconds'])
+    evicted = []
+    for i, w in enumerate(workspaces):
+        if i >= MAX_WORKSPACES or w['idle_seconds'] > WORKSPACE_TTL:
+            if release_workspace(w['workspace']) is True:
+                evicted.append(w['workspace'])
+    return evicted
+
+async def _run(cmd, cwd, env=None, check=False):
+    """
+    Run a command as an asyncio subprocess so the server's event loop stays
+    responsive while it compiles or benchmarks. Mirrors subprocess.run with
+    capture_output=True, text=True. Cancelling the awaiting task kills the child.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=cwd,
+        env=env,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
     try:
-        work_dir = _ensure_work_dir()
-        result = subprocess.run(
-            ["make", "stream_benchmark", f"CC={CC}", f"CFLAGS={CFLAGS}", f"LDFLAGS={LDFLAGS}"],
-            capture_output=True,
-            text=True,
-            cwd=work_dir
-        )
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+    stdout = stdout.decode(errors="replace")
+    stderr = stderr.decode(errors="replace")
+    if check and process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
 
-        if result.returncode != 0:
-            error_msg = f"Compilation failed:\nSTDOUT: {result.stdout}\nSTDERR: {result.stderr}"
-            print(error_msg, file=sys.stderr)
-            return error_msg
+# Seconds a stopped run gets to exit after SIGTERM before its process group is killed
+STOP_GRACE = 5
+
+async def _stop_process_group(process):
+    """
+    Stop a run started in a session of its own, and everything it started:
+    SIGTERM to its process group first, which the runstats launcher forwards to
+    the benchmark's group (a perf stat in between would otherwise leave the
+    benchmark running), then SIGKILL if it is still there after STOP_GRACE.
+    """
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            break
+        try:
+            await asyncio.wait_for(process.wait(), STOP_GRACE)
+            break
+        except asyncio.TimeoutError:
+            pass
+    await process.wait()
+
+async def _run_streaming(cmd, cwd, on_line, timeout: float = None, env=None):
+    """
+    Run a command like _run, but hand each JSON line the child writes to stderr
+    to the coroutine on_line as soon as it arrives. If on_line returns a reason
+    string, or the command exceeds timeout seconds, the child and its process
+    group are stopped (see _stop_process_group).
+    Returns (CompletedProcess, abort reason or None); stderr holds the non-JSON lines.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=cwd,
+        env=env,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        limit=2**20,
+        start_new_session=True
+    )
+    stdout_task = asyncio.ensure_future(process.stdout.read())
+    deadline = time.monotonic() + timeout if timeout else None
+    other_lines = []
+    reason = None
+    try:
+        while True:
+            remaining = deadline - time.monotonic() if deadline else None
+            try:
+                line = await asyncio.wait_for(process.stderr.readline(), remaining)
+            except asyncio.TimeoutError:
+                reason = f"timed out after {timeout:.3g} s"
+                break
+            if not line:
+                break
+            line = line.decode(errors="replace")
+            try:
+                update = json.loads(line)
+            except ValueError:
+                other_lines.append(line)
+                continue
+            reason = await on_line(update)
+            if reason:
+                break
+        if reason:
+            await _stop_process_group(process)
+        await process.wait()
+        stdout = (await stdout_task).decode(errors="replace")
+    except asyncio.CancelledError:
+        if process.returncode is None:
+            await _stop_process_group(process)
+        stdout_task.cancel()
+        raise
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, "".join(other_lines)), reason
+
+async def _run_instrumented(cmd, cwd, on_line, timeout: float = None, env=None, perf: bool = False):
+    """
+    _run_streaming through the runstats launcher. Returns (CompletedProcess,
+    abort reason or None, run statistics): the process's rusage, host load and
+    memory before and after, and with perf, perf stat counters if available.
+    """
+    rusage = {}
+
+    async def on_update(update: dict):
+        if 'rusage' in update:
+            rusage.update(update['rusage'])
+            return None
+        return await on_line(update)
+
+    perf_output = None
+    if perf and await runstats.perf_available():
+        perf_output = os.path.join(cwd, runstats.PERF_OUTPUT)
+        if os.path.exists(perf_output):
+            os.remove(perf_output)
+    before = runstats.snapshot()
+    result, reason = await _run_streaming(runstats.launcher_command(cmd, perf_output), cwd, on_update,
+                                          timeout, env)
+    stats = {'rusage': rusage or None, **runstats.system_delta(before, runstats.snapshot())}
+    if perf:
+        stats['perf'] = runstats.parse_perf(perf_output) if perf_output else None
+        if perf_output is None:
+            stats['perf_error'] = "perf stat is not available on this host"
+    stats['diagnostics'] = runstats.diagnose(stats, cpu_topology().get('cpus_usable'))
+    return result, reason, stats
+
+# Regions of benchmark/stream_benchmark.c; optional kernels add their own (see kernels.py)
+KERNEL_REGIONS = ["allocation"] + kernel_registry.stream_kernels()
+
+def _write_build_info(work_dir: str, info: dict, info_file: str = "build.json"):
+    with open(os.path.join(work_dir, info_file), "w") as f:
+        json.dump(info, f)
+
+def _read_build_info(work_dir: str, info_file: str = "build.json"):
+    """Metadata of the binary currently in work_dir, or None if unknown."""
+    try:
+        with open(os.path.join(work_dir, info_file), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _splice_source(source: str, overrides: dict):
+    """Replace the // <REGION>_START ... // <REGION>_END blocks named in overrides (e.g. 'copy')."""
+    for region, code in overrides.items():
+        if not code:
+            continue
+        start_marker = f"// {region.upper()}_START"
+        end_marker = f"// {region.upper()}_END"
+        start = source.find(start_marker)
+        end = source.find(end_marker)
+        if start != -1 and end != -1:
+            source = source[:start] + start_marker + "\n" + code + "\n" + end_marker + source[end+len(end_marker):]
+    return source
+
+def _add_kernels(source: str, names: list):
+    """
+    Insert the optional registered kernels named in names into the harness:
+    their default code as // NAME_START regions (so overrides can be spliced
+    in), a timed loop each, and their samples and check values in the output.
+    """
+    regions, runs, samples, values = [], [], [], []
+    for name in names:
+        kernel = kernel_registry.REGISTRY[name]
+        regions.append(f"// {name.upper()}_START\n{kernel.code}\n// {name.upper()}_END\n")
+        block = f"""    double {name}_times[NTIMES], {name}_value = 0.0;
+    int {name}_guard;
+    {{
+        reset_arrays();
+        {kernel.setup}
+        double result = 0.0;
+        for (int k = 0; k < NTIMES; k++) {{
+            clock_gettime(CLOCK_MONOTONIC, &start);
+            {kernel.call};
+            clock_gettime(CLOCK_MONOTONIC, &end);
+            {name}_times[k] = elapsed(&start, &end);
+            {name}_value += {kernel.probe};
+            report_progress("{name}", k, {kernel.bytes_moved}, {name}_times[k]);
+        }}
+        (void)result;
+        {name}_guard = guard_intact();
+        {kernel.teardown}
+    }}"""
+        runs.append("\n".join(line for line in block.splitlines() if line.strip()))
+        samples.append(f"""    printf(", ");
+    print_samples("{name}", {kernel.bytes_moved}, {name}_times);""")
+        prefix = ", " if values else ', "values": {'
+        fmt = f'{prefix}"{name}": {{"value": %.17g, "guard_intact": %d}}'
+        values.append(f"    printf({json.dumps(fmt)}, {name}_value, {name}_guard);")
+    if not names:
+        return source
+    runs.append("    reset_arrays();")
+    values.append('    printf("}");')
+    for marker, code in (("EXTRA_KERNELS", "".join(regions)), ("EXTRA_RUNS", "\n".join(runs)),
+                         ("EXTRA_SAMPLES", "\n".join(samples)), ("EXTRA_VALUES", "\n".join(values))):
+        start = source.find(f"// {marker}_START")
+        start = source.find("\n", start) + 1
+        end = source.find(f"// {marker}_END")
+        # Keep the end marker's indentation
+        end = source.rfind("\n", 0, end) + 1
+        source = source[:start] + code.rstrip("\n") + "\n" + source[end:]
+    return source
 
+def _stream_bytes_error(source: str):
+    """
+    Error message if the harness's <KERNEL>_BYTES figures for the STREAM
+    kernels disagree with their bytes_moved in the registry, else None.
+    """
+    for name in kernel_registry.stream_kernels():
+        found = re.search(rf"#define {name.upper()}_BYTES \((.*)\)\n", source)
+        expected = kernel_registry.REGISTRY[name].bytes_moved
+        if not found or found.group(1) != expected:
+            return (f"Error: {name.upper()}_BYTES in stream_benchmark.c does not match "
+                    f"the registry's bytes_moved for '{name}' ({expected}).")
+    return None
+
+def _code_regions():
+    """Every region a caller can supply code for: allocation and all registered kernels."""
+    return ["allocation"] + list(kernel_registry.REGISTRY)
+
+def _optional_kernels(names):
+    """Registered optional kernels among names, in registry order, or an error message."""
+    unknown = set(names) - set(kernel_registry.REGISTRY)
+    if unknown:
+        return f"Error: unknown kernels {sorted(unknown)} (registered: {list(kernel_registry.REGISTRY)})"
+    return [k for k in kernel_registry.optional_kernels() if k in names]
+
+def _kernel_source(source: str, regions: list = ("copy", "scale", "add", "triad")):
+    """
+    A standalone translation unit with just the given kernel regions: the
+    prelude (includes and #defines) followed by each region's code.
+    """
+    prelude = source[:source.find("// ALLOCATION_START")]
+    parts = [prelude]
+    for region in regions:
+        start_marker = f"// {region.upper()}_START"
+        start = source.find(start_marker)
+        end = source.find(f"// {region.upper()}_END")
+        if start != -1 and end != -1:
+            parts.append(source[start:end] + f"// {region.upper()}_END\n")
+    return "\n".join(parts)
+
+def _source_problem_size():
+    """(N, NTIMES) compiled into the benchmark source when not overridden."""
+    with open(os.path.join(SOURCE_DIR, "stream_benchmark.c"), "r") as f:
+        source = f.read()
+    n = re.search(r"#define N (\d+)", source)
+    ntimes = re.search(r"#define NTIMES (\d+)", source)
+    return int(n.group(1)), int(ntimes.group(1))
+
+def _memory_limit():
+    """Bytes this process can still allocate: MemAvailable, capped by a cgroup (container) limit."""
+    available = _meminfo().get('MemAvailable')
+    for limit_file, usage_file in (("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+                                   ("/sys/fs/cgroup/memory/memory.limit_in_bytes",
+                                    "/sys/fs/cgroup/memory/memory.usage_in_bytes")):
+        limit, usage = _read(limit_file), _read(usage_file)
+        if limit and limit.isdigit() and usage and usage.isdigit():
+            free = int(limit) - int(usage)
+            available = min(available, free) if available else free
+            break
+    return available
+
+_problem_size = None
+
+def problem_size_info(refresh: bool = False):
+    """
+    The default array length for this host and how it was chosen. Computed
+    once (or on refresh) so every default-size build uses the same N.
+    """
+    global _problem_size
+    if _problem_size is None or refresh:
+        source_n, source_ntimes = _source_problem_size()
+        caches = _static_topology()['caches']
+        top = max((c['level'] for c in caches if c['type'] != "Instruction"), default=None)
+        llc_bytes = sum((c['size_bytes'] or 0) * c['instances'] for c in caches
+                        if c['level'] == top and c['type'] != "Instruction")
+        memory = _memory_limit()
+        min_n = LLC_FACTOR * llc_bytes // 8 if llc_bytes else 0
+        # Kernels index with int
+        max_n = min(2**31 - 1, int(MEMORY_FRACTION * memory) // 24) if memory else 2**31 - 1
+        if min_n <= source_n <= max_n:
+            n, reason = source_n, "source default fits"
+        elif source_n > max_n:
+            n, reason = max_n, f"three arrays limited to {MEMORY_FRACTION:g} of available memory"
+            if n < min_n:
+                reason += f"; below {LLC_FACTOR}x LLC, so partly cache-resident"
+        else:
+            n, reason = min(min_n, max_n), f"raised to {LLC_FACTOR}x the last-level cache"
+        # Round to a readable size
+        if n >= 10**7:
+            n = n // 10**6 * 10**6
+        _problem_size = {
+            'n': n,
+            'ntimes': source_ntimes,
+            'source_n': source_n,
+            'array_bytes': n * 8,
+            'llc_bytes': llc_bytes or None,
+            'memory_available_bytes': memory,
+            'reason': reason,
+        }
+        if n != source_n:
+            print(f"Default problem size N={n} ({reason})", file=sys.stderr)
+    return _problem_size
+
+def default_problem_size():
+    """(N, NTIMES) used when not overridden: the host-dependent N (see problem_size_info)."""
+    info = problem_size_info()
+    return info['n'], info['ntimes']
+
+def effective_problem_size(n: int = None, ntimes: int = None):
+    """(N, NTIMES) a build actually uses: the overrides, else the host defaults."""
+    default_n, default_ntimes = default_problem_size()
+    return int(n or default_n), int(ntimes or default_ntimes)
+
+def _size_flags(n: int = None, ntimes: int = None):
+    # Always explicit: the default N depends on the host and may change between restarts
+    n, ntimes = effective_problem_size(n, ntimes)
+    return f" -DN={n} -DNTIMES={ntimes}"
+
+def _host_key(*flags: str):
+    """
+    Host CPU identity for the build cache key when flags target the build
+    host (-march=native and friends): the same flags build a different binary
+    on another CPU sharing the cache directory. Empty otherwise.
+    """
+    if not any("native" in f for f in flags if f):
+        return ""
+    return _host_isa()
+
+@functools.lru_cache(maxsize=None)
+def _host_isa():
+    cpuinfo = _proc_cpuinfo()
+    return "\n".join([platform.machine(), cpuinfo.get('model name') or cpuinfo.get('CPU part') or "",
+                      " ".join(sorted((cpuinfo.get('flags') or cpuinfo.get('Features') or "").split()))])
+
+async def _build(work_dir: str, target: str, source: str, CC: str, CFLAGS: str, LDFLAGS: str,
+                 kernels: dict = None, n: int = None, ntimes: int = None,
+                 output: str = "stream_benchmark", info_file: str = "build.json",
+                 extra_kernels: list = None):
+    """
+    Build a Makefile target into work_dir/<output>, restoring the binary
+    from the build cache when this exact compiler, flags and source were built before.
+    kernels holds the custom kernel sources and extra_kernels the optional kernels
+    compiled in, both recorded (in info_file) with later measurements; n and
+    ntimes override the array size and repetition count (None = default), and
+    the values used are recorded either way.
+    Returns True on success, error message otherwise.
+    """
+    rejected = await compilers.reject_flags(CC, CFLAGS, LDFLAGS)
+    if rejected:
+        return rejected
+    n, ntimes = effective_problem_size(n, ntimes)
+    with open(os.path.join(work_dir, "Makefile"), "r") as f:
+        recipe = f"{target}\n{f.read()}"
+    build_flags = CFLAGS + _size_flags(n, ntimes)
+    key = buildcache.build_key(await compilers.compiler_identity(CC), build_flags, LDFLAGS, source, recipe,
+                               _host_key(CFLAGS, LDFLAGS))
+    build_info = {
+        'build_hash': key,
+        'CC': CC,
+        'CFLAGS': CFLAGS,
+        'LDFLAGS': LDFLAGS,
+        'kernels': {k: v for k, v in (kernels or {}).items() if v},
+        'extra_kernels': list(extra_kernels or []),
+        'n': n,
+        'ntimes': ntimes,
+    }
+    if os.path.exists(os.path.join(work_dir, info_file)):
+        os.remove(os.path.join(work_dir, info_file))
+    built = await _make_cached(work_dir, target, output, key, CC, build_flags, LDFLAGS)
+    if built is True:
+        _write_build_info(work_dir, build_info, info_file)
+    return built
+
+async def _make_cached(work_dir: str, target: str, output: str, key: str,
+                       CC: str, CFLAGS: str, LDFLAGS: str, make_vars: dict = None):
+    """
+    Restore work_dir/<output> from the build cache under key, or run the
+    Makefile target (with additional make_vars) and store the result.
+    Returns True on success, error message otherwise.
+    """
+    output_path = os.path.join(work_dir, output)
+    if buildcache.restore(key, output_path):
+        print(f"Build cache hit: {output} {key[:12]}", file=sys.stderr)
         return True
+
+    # Remove the old output so make cannot consider it up to date for new flags
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    result = await _run(
+        ["make", target, f"CC={CC}", f"CFLAGS={CFLAGS}", f"LDFLAGS={LDFLAGS}"]
+        + [f"{k}={v}" for k, v in (make_vars or {}).items()],
+        cwd=work_dir
+    )
+
+    if result.returncode != 0:
+        error_msg = f"Compilation failed:\nSTDOUT: {result.stdout}\nSTDERR: {result.stderr}"
+        print(error_msg, file=sys.stderr)
+        return error_msg
+
+    # Verify binary was created and is executable
+    if not os.path.exists(output_path):
+        return f"Error: {output} not created after compilation"
+
+    if not os.access(output_path, os.X_OK):
+        os.chmod(output_path, 0o755)
+
+    buildcache.store(key, output_path)
+    return True
+
+# Units of an incremental build: the harness (everything outside the kernel
+# regions) and one object per region, each compiled with its own flags.
+# Builds with optional kernels have one more unit per kernel.
+UNITS = ["harness"] + KERNEL_REGIONS
+
+def _unit_declarations(regions: list):
+    """Replaces the regions in the harness unit so main() can call the separately compiled code."""
+    lines = ["extern double *a, *b, *c;", "void allocate_arrays();", "void free_arrays();"]
+    lines += [f"{kernel_registry.REGISTRY[r].signature};" for r in regions if r != "allocation"]
+    return "\n".join(lines) + "\n"
+
+# Region code that refers to these macros must be rebuilt when the problem size changes
+_SIZE_MACROS = re.compile(r"\b(N|NTIMES|GUARD|ACTIVE_N)\b")
+
+def _split_units(source: str, regions: list = KERNEL_REGIONS):
+    """Split a (spliced) benchmark source into {unit: translation unit source}."""
+    prelude = source[:source.find("// ALLOCATION_START")]
+    harness = source[len(prelude):]
+    units = {}
+    for region in regions:
+        start_marker = f"// {region.upper()}_START"
+        end_marker = f"// {region.upper()}_END"
+        start = harness.find(start_marker)
+        end = harness.find(end_marker)
+        if start == -1 or end == -1:
+            raise ValueError(f"Region markers for {region} not found in the benchmark source")
+        units[region] = f"{prelude}{harness[start:end + len(end_marker)]}\n"
+        harness = harness[:start] + harness[end + len(end_marker):]
+    return {'harness': prelude + _unit_declarations(regions) + harness, **units}
+
+async def _build_incremental(work_dir: str, source: str, CC: str, CFLAGS: str, LDFLAGS: str,
+                             kernels: dict = None, kernel_cflags: dict = None,
+                             n: int = None, ntimes: int = None, extra_kernels: list = None):
+    """
+    Build work_dir/stream_benchmark from one object per unit (see UNITS, plus
+    one per optional kernel in extra_kernels). Each object is keyed by its own
+    source and flags; objects already present in work_dir or the build cache
+    are reused and only changed ones are compiled, concurrently, before the
+    link. kernel_cflags maps a unit to flags appended to CFLAGS for that unit
+    only. Returns True on success, error message otherwise.
+    """
+    extra_kernels = list(extra_kernels or [])
+    unit_names = UNITS + extra_kernels
+    kernel_cflags = {k: v for k, v in (kernel_cflags or {}).items() if v}
+    unknown = set(kernel_cflags) - set(unit_names)
+    if unknown:
+        return f"Error: unknown units in kernel_cflags: {sorted(unknown)} (valid: {unit_names})"
+    rejected = await compilers.reject_flags(CC, CFLAGS, LDFLAGS, kernel_cflags)
+    if rejected:
+        return rejected
+    n, ntimes = effective_problem_size(n, ntimes)
+    binary_path = os.path.join(work_dir, "stream_benchmark")
+    info_path = os.path.join(work_dir, "build.json")
+    manifest_path = os.path.join(work_dir, "objects.json")
+    for stale in (binary_path, info_path):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    compiler_id = await compilers.compiler_identity(CC)
+    with open(os.path.join(work_dir, "Makefile"), "r") as f:
+        makefile = f.read()
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    units = _split_units(source, KERNEL_REGIONS + extra_kernels)
+    prelude_length = source.find("// ALLOCATION_START")
+    object_keys = {}
+    pending = []
+    for unit, unit_source in units.items():
+        unit_flags = " ".join(f for f in (CFLAGS, kernel_cflags.get(unit)) if f)
+        # Kernels that never mention the size macros are shared across problem sizes
+        if unit in ("harness", "allocation") or _SIZE_MACROS.search(unit_source[prelude_length:]):
+            unit_flags += _size_flags(n, ntimes)
+        key = buildcache.build_key(compiler_id, unit_flags, "", unit_source, f"object\n{makefile}",
+                                   _host_key(unit_flags))
+        object_keys[unit] = key
+        if manifest.get(unit) == key and os.path.exists(os.path.join(work_dir, f"unit_{unit}.o")):
+            continue
+        with open(os.path.join(work_dir, f"unit_{unit}.c"), "w") as f:
+            f.write(unit_source)
+        manifest.pop(unit, None)
+        pending.append((unit, unit_flags))
+
+    built = await asyncio.gather(*[
+        _make_cached(work_dir, f"unit_{unit}.o", f"unit_{unit}.o", object_keys[unit], CC, unit_flags, LDFLAGS)
+        for unit, unit_flags in pending
+    ])
+    for (unit, _), result in zip(pending, built):
+        if result is True:
+            manifest[unit] = object_keys[unit]
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    for result in built:
+        if result is not True:
+            return result
+    print(f"Incremental build: compiled or restored {[u for u, _ in pending] or 'nothing'}, "
+          f"reused {len(units) - len(pending)} objects", file=sys.stderr)
+
+    link_flags = CFLAGS + _size_flags(n, ntimes)
+    key = buildcache.build_key(compiler_id, link_flags, LDFLAGS,
+                               "\n".join(object_keys[u] for u in unit_names), f"link\n{makefile}",
+                               _host_key(link_flags, LDFLAGS))
+    result = await _make_cached(work_dir, "link", "stream_benchmark", key, CC, link_flags, LDFLAGS,
+                                {'UNITS': " ".join(f"unit_{u}.o" for u in unit_names)})
+    if result is not True:
+        return result
+    _write_build_info(work_dir, {
+        'build_hash': key,
+        'CC': CC,
+        'CFLAGS': CFLAGS,
+        'LDFLAGS': LDFLAGS,
+        'kernels': {k: v for k, v in (kernels or {}).items() if v},
+        'kernel_cflags': kernel_cflags,
+        'extra_kernels': extra_kernels,
+        'n': n,
+        'ntimes': ntimes,
+        'build_mode': experiments.UNITS_BUILD,
+    })
+    return True
+
+@_workspace_locked
+async def make_stream_benchmark(CC: str, CFLAGS: str, LDFLAGS: str,
+                                n: int = None, ntimes: int = None,
+                                extra_kernels: list = None,
+                                workspace: str = DEFAULT_WORKSPACE):
+    try:
+        work_dir = _ensure_work_dir(workspace)
+        with open(os.path.join(work_dir, "stream_benchmark.c"), "r") as f:
+            source = f.read()
+        bytes_error = _stream_bytes_error(source)
+        if bytes_error:
+            return bytes_error
+        if not extra_kernels:
+            return await _build(work_dir, "stream_benchmark", source, CC, CFLAGS, LDFLAGS,
+                                n=n, ntimes=ntimes)
+        extra_kernels = _optional_kernels(extra_kernels)
+        if isinstance(extra_kernels, str):
+            return extra_kernels
+        source = _add_kernels(source, extra_kernels)
+        with open(os.path.join(work_dir, "stream_benchmark_custom.c"), "w") as f:
+            f.write(source)
+        return await _build(work_dir, "custom", source, CC, CFLAGS, LDFLAGS,
+                            n=n, ntimes=ntimes, extra_kernels=extra_kernels)
     except FileNotFoundError:
         error_msg = "Error: 'make' not found."
         print(error_msg, file=sys.stderr)
         return error_msg
 
 
-def test_correctness():
-    work_dir = _ensure_work_dir()
+# Correctness builds use a small odd-sized problem so remainder loops are
+# exercised, and GUARD trailing elements the kernels must not touch
+CHECK_N = 10007
+CHECK_NTIMES = 2
+CHECK_GUARD = 8
+
+def _reference_model(n: int, active_n: int, ntimes: int, indices: list):
+    """
+    Independent model of the benchmark: a, b, c at the given indices and the
+    checksum after ntimes each of copy, scale, add and triad over active_n elements.
+    """
+    if np is not None:
+        a, b, c = np.full(n, 1.0), np.full(n, 2.0), np.zeros(n)
+        x = slice(0, active_n)
+        for _ in range(ntimes):
+            a[x] = b[x]
+        for _ in range(ntimes):
+            b[x] = 2.0 * a[x]
+        for _ in range(ntimes):
+            c[x] = a[x] + b[x]
+        for _ in range(ntimes):
+            a[x] = b[x] + 3.0 * c[x]
+        idx = np.asarray(indices)
+        return a[idx].tolist(), b[idx].tolist(), c[idx].tolist(), float((a + b + c).sum())
+
+    a, b, c = [1.0] * n, [2.0] * n, [0.0] * n
+    for _ in range(ntimes):
+        a[:active_n] = b[:active_n]
+    for _ in range(ntimes):
+        b[:active_n] = [2.0 * x for x in a[:active_n]]
+    for _ in range(ntimes):
+        c[:active_n] = [x + y for x, y in zip(a[:active_n], b[:active_n])]
+    for _ in range(ntimes):
+        a[:active_n] = [y + 3.0 * z for y, z in zip(b[:active_n], c[:active_n])]
+    checksum = sum(x + y + z for x, y, z in zip(a, b, c))
+    return [a[i] for i in indices], [b[i] for i in indices], [c[i] for i in indices], checksum
+
+def _validate_output(output: dict, ntimes: int, rel_tol: float = 1e-9):
+    """Compare the correctness build's output with the reference model. Returns a list of errors."""
+    check = output.get('check')
+    if not check:
+        return ["Binary did not report sampled values (was it built from the benchmark harness?)"]
+    indices = check['indices']
+    expected = _reference_model(check['n'], check['active_n'], ntimes, indices)
+    errors = []
+    for name, got, want in zip("abc", (check['a'], check['b'], check['c']), expected[:3]):
+        for i, g, w in zip(indices, got, want):
+            if abs(g - w) > rel_tol * max(1.0, abs(w)):
+                where = "; out-of-bounds write into guard element" if i >= check['active_n'] else ""
+                errors.append(f"{name}[{i}] = {g}, expected {w}{where}")
+    checksum, want = output.get('checksum'), expected[3]
+    # The harness prints the checksum with one decimal
+    if checksum is None or abs(checksum - want) > max(0.05, 1e-9 * abs(want)):
+        errors.append(f"checksum = {checksum}, expected {want}")
+
+    # Optional kernels run on freshly reset arrays and report the sum of their probe values
+    n, active_n = check['n'], check['active_n']
+    for name, got in (output.get('values') or {}).items():
+        kernel = kernel_registry.REGISTRY.get(name)
+        if kernel is None:
+            errors.append(f"{name}: kernel is not registered")
+            continue
+        want = kernel.reference([1.0] * n, [2.0] * n, [0.0] * n, active_n, ntimes)
+        if abs(got['value'] - want) > rel_tol * max(1.0, abs(want)):
+            errors.append(f"{name}: check value {got['value']}, expected {want}")
+        if not got['guard_intact']:
+            errors.append(f"{name}: out-of-bounds write into guard elements")
+    return errors
+
+@_workspace_locked
+async def test_correctness(workspace: str = DEFAULT_WORKSPACE):
+    """
+    Rebuild the workspace's current configuration at a small odd-sized N with
+    guard elements, run it, and validate the checksum and sampled array values
+    against the reference model. Takes milliseconds rather than a full run.
+    """
+    work_dir = _existing_work_dir(workspace)
+    if work_dir is None:
+        return _missing_workspace(workspace)
     executable_name = os.path.join(work_dir, "stream_benchmark")
     if not os.path.exists(executable_name):
         print(f"Error: Executable '{executable_name}' not found after build.", file=sys.stderr)
         return "Failure: Executable not found."
+    build = _read_build_info(work_dir)
+    if build is None:
+        return "Failure: Build information missing; rebuild the benchmark first."
 
+    check_workspace = f"{workspace}-check"
+    check_cflags = f"{build['CFLAGS']} -DGUARD={CHECK_GUARD}"
+    kernels = build.get('kernels') or {}
+    kernel_cflags = build.get('kernel_cflags') or {}
+    extra_kernels = build.get('extra_kernels') or []
+    # Pinned until released, so eviction cannot remove the check build before it runs
+    _pinned_workspaces.add(check_workspace)
     try:
-        result = subprocess.run(
-            ["make", "test-correctness"],
-            check=True,
-            capture_output=True,
-            text=True,
-            cwd=work_dir
-        )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        error_msg = f"Correctness test failed:\n{e.stdout}\n{e.stderr}"
-        print(error_msg, file=sys.stderr)
-        return error_msg
-    except FileNotFoundError:
-        print("Error: 'make' not found.", file=sys.stderr)
-        return "Failure: 'make' command not found."
+        if kernels or kernel_cflags:
+            built = await make_custom_benchmark(
+                build['CC'], check_cflags, build['LDFLAGS'],
+                n=CHECK_N, ntimes=CHECK_NTIMES, kernel_cflags=kernel_cflags,
+                kernel_code=kernels, extra_kernels=extra_kernels,
+                workspace=check_workspace)
+        else:
+            built = await make_stream_benchmark(
+                build['CC'], check_cflags, build['LDFLAGS'],
+                n=CHECK_N, ntimes=CHECK_NTIMES, extra_kernels=extra_kernels,
+                workspace=check_workspace)
+        if built is not True:
+            return json.dumps({"correctness": "FAIL", "errors": [f"Correctness build failed: {built}"]})
+
+        try:
+            result = await _run(
+                ["make", "test-correctness"],
+                cwd=_workspace_path(check_workspace),
+                check=True
+            )
+        except subprocess.CalledProcessError as e:
+            error_msg = f"Correctness test failed:\n{e.stdout}\n{e.stderr}"
+            print(error_msg, file=sys.stderr)
+            return json.dumps({"correctness": "FAIL", "errors": [error_msg]})
+        except FileNotFoundError:
+            print("Error: 'make' not found.", file=sys.stderr)
+            return "Failure: 'make' command not found."
 
+        output = _parse_output(result.stdout)
+        errors = _validate_output(output, CHECK_NTIMES) if output else [f"Unparseable output: {result.stdout}"]
+        return json.dumps({
+            "correctness": "FAIL" if errors else "PASS",
+            "n": CHECK_N,
+            "errors": errors[:20],
+        })
+    finally:
+        _pinned_workspaces.discard(check_workspace)
+        if os.path.exists(_workspace_path(check_workspace)):
+            release_workspace(check_workspace)
 
-def make_clean():
+
+@_workspace_locked
+async def make_clean(workspace: str = DEFAULT_WORKSPACE):
     try:
-        work_dir = _ensure_work_dir()
-        result = subprocess.run(
+        work_dir = _ensure_work_dir(workspace)
+        result = await _run(
             ["make", "clean"],
-            capture_output=True,
-            text=True,
             cwd=work_dir
         )
 
@@ -92,29 +918,356 @@ def make_clean():
         return error_msg
 
 
-def test_speed():
-    work_dir = _ensure_work_dir()
+# Two-sided 95% Student t quantiles by degrees of freedom; 1.96 beyond the table
+_T95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+def _summarize(samples: list):
+    """min/median/max/mean/stddev and a 95% confidence interval of the mean."""
+    n = len(samples)
+    mean = statistics.fmean(samples)
+    stddev = statistics.stdev(samples) if n > 1 else 0.0
+    t = _T95[n - 2] if 2 <= n <= len(_T95) + 1 else 1.96
+    half_width = t * stddev / n ** 0.5 if n > 1 else float("inf")
+    return {
+        'n': n,
+        'min': round(min(samples), 3),
+        'median': round(statistics.median(samples), 3),
+        'max': round(max(samples), 3),
+        'mean': round(mean, 3),
+        'stddev': round(stddev, 3),
+        'ci95_low': round(mean - half_width, 3) if n > 1 else None,
+        'ci95_high': round(mean + half_width, 3) if n > 1 else None,
+        'rel_ci95': round(half_width / mean, 4) if n > 1 and mean > 0 else None,
+    }
+
+# Measured iterations a kernel needs before abort_below may kill its run
+ABORT_MIN_SAMPLES = 3
+
+def _speed_summary(samples: dict, checksum: float, runs: int):
+    """
+    test_speed result: per-kernel mean GB/s at the top level plus full
+    statistics, and each mean as a percentage of the host's calibrated peak.
+    """
+    stats = {kernel: _summarize(values) for kernel, values in samples.items()}
+    summary = {f"{kernel}{experiments.KERNEL_SUFFIX}": round(s['mean'], 2) for kernel, s in stats.items()}
+    summary['checksum'] = checksum
+    summary['runs'] = runs
+    summary['stats'] = stats
+    try:
+        calibration = experiments.calibration()
+    except Exception as e:
+        print(f"Calibration lookup failed: {e}", file=sys.stderr)
+        calibration = None
+    if calibration:
+        peaks = calibration['peak_GB_s']
+        summary['percent_of_peak'] = {kernel: round(100 * s['mean'] / peaks[kernel], 1)
+                                      for kernel, s in stats.items() if peaks.get(kernel)}
+    return summary
+
+def _benchmark_command(work_dir: str, cpus: str = None):
+    """Command line running the workspace's binary, pinned to cpus with taskset; or an error message."""
     executable_name = os.path.join(work_dir, "stream_benchmark")
     if not os.path.exists(executable_name):
         print(f"Error: Executable '{executable_name}' not found after build.", file=sys.stderr)
         return "Failure: Executable not found."
+    command = [executable_name]
+    if cpus:
+        if shutil.which("taskset") is None:
+            return "Failure: taskset not found; cannot restrict the run to CPUs."
+        command = ["taskset", "-c", cpus] + command
+    return command
+
+@_workspace_locked
+async def test_speed(workspace: str = DEFAULT_WORKSPACE,
+                     repeats: int = 1,
+                     warmup_runs: int = 0,
+                     warmup_iterations: int = 1,
+                     adaptive: bool = False,
+                     target_rel_ci: float = 0.01,
+                     max_repeats: int = 20,
+                     abort_below: float = None,
+                     abort_kernels: list = None,
+                     time_budget: float = None,
+                     progress=None,
+                     env: dict = None,
+                     cpus: str = None,
+                     perf: bool = False,
+                     record: bool = True):
+    """
+    Run the benchmark repeats times (after warmup_runs discarded runs), drop the
+    first warmup_iterations timed iterations of each kernel per run, and pool the
+    rest. In adaptive mode, keep repeating (up to max_repeats) until every
+    kernel's 95% confidence interval is within target_rel_ci of its mean.
+
+    Every timed iteration is passed to the progress coroutine as it completes.
+    With abort_below, the run is killed once a kernel (of abort_kernels, default
+    all) has ABORT_MIN_SAMPLES measured iterations and even the fastest is below
+    that fraction of the best bandwidth recorded for it at this problem size;
+    time_budget bounds the whole call in seconds. Aborted measurements return
+    their partial statistics with an "aborted" reason and are not recorded.
+    env adds environment variables for the benchmark (e.g. OMP_NUM_THREADS)
+    and cpus restricts it to a CPU list (e.g. "0-11,24-35") with taskset; both
+    are recorded with the run. record=False keeps the measurement out of the
+    experiment database. Each execution's OS-level statistics (see
+    _run_instrumented; perf adds perf stat counters) are returned in run_stats.
+    """
+    work_dir = _existing_work_dir(workspace)
+    if work_dir is None:
+        return _missing_workspace(workspace)
+    command = _benchmark_command(work_dir, cpus)
+    if isinstance(command, str):
+        return command
+    env = {k: str(v) for k, v in (env or {}).items()}
+    run_env = {**env, 'taskset': cpus} if cpus else env
+
+    repeats = max(1, repeats)
+    max_runs = max(repeats, max_repeats) if adaptive else repeats
+    samples = {}
+    runs = 0
+    run_stats = []
+    build = _read_build_info(work_dir) or {}
+    best_known = {}
+    current = {}  # Measured iterations of the run in progress, per kernel
+    started = time.monotonic()
+
+    async def on_progress(update: dict):
+        if progress is not None:
+            try:
+                await progress(update)
+            except Exception as e:
+                print(f"Progress notification failed: {e}", file=sys.stderr)
+        kernel = update.get('progress')
+        if runs < warmup_runs or update.get('iteration', 0) < warmup_iterations:
+            return None
+        current.setdefault(kernel, []).append(update['GB_s'])
+        if not abort_below or (abort_kernels and kernel not in abort_kernels):
+            return None
+        if kernel not in best_known:
+            try:
+                best_known[kernel] = experiments.best_bandwidth(kernel, build.get('n'), build.get('ntimes'))
+            except Exception as e:
+                print(f"Best-known lookup failed: {e}", file=sys.stderr)
+                best_known[kernel] = None
+        best = best_known[kernel]
+        pooled = samples.get(kernel, []) + current[kernel]
+        if best and len(pooled) >= ABORT_MIN_SAMPLES and max(pooled) < abort_below * best:
+            return (f"{kernel}: fastest of {len(pooled)} iterations is {max(pooled):.2f} GB/s, "
+                    f"below {abort_below:g} x the best known {best:.2f} GB/s")
+        return None
 
+    aborted = None
     try:
-        result = subprocess.run(
-            ["make", "test-speed"],
-            check=True,
-            capture_output=True,
-            text=True,
-            cwd=work_dir
-        )
-        return result.stdout.strip()
+        while True:
+            current = {}
+            async with _measurement_lock():
+                remaining = time_budget - (time.monotonic() - started) if time_budget else None
+                if remaining is not None and remaining <= 0:
+                    aborted = f"time budget of {time_budget:g} s exceeded"
+                    break
+                result, aborted, stats = await _run_instrumented(command, work_dir, on_progress, remaining,
+                                                                 env={**os.environ, **env} if env else None,
+                                                                 perf=perf)
+            run_stats.append({'run': len(run_stats), 'warmup': runs < warmup_runs, **stats})
+            if aborted and time_budget and time.monotonic() - started >= time_budget:
+                aborted = f"time budget of {time_budget:g} s exceeded"
+            if aborted:
+                # Keep the iterations measured before the kill for the partial statistics
+                for kernel, values in current.items():
+                    samples.setdefault(kernel, []).extend(values)
+                break
+            if result.returncode != 0:
+                raise subprocess.CalledProcessError(result.returncode, result.args, result.stdout, result.stderr)
+            output = _parse_output(result.stdout)
+            if output is None:
+                return result.stdout.strip()
+            runs += 1
+            if runs <= warmup_runs:
+                continue
+            checksum = output.get('checksum')
+            # Fall back to the whole-run mean for binaries without per-iteration samples
+            run_samples = output.get('samples') or {
+                key[:-len(experiments.KERNEL_SUFFIX)]: [value] for key, value in output.items()
+                if key.endswith(experiments.KERNEL_SUFFIX)
+            }
+            for kernel, values in run_samples.items():
+                samples.setdefault(kernel, []).extend(values[warmup_iterations:] or values)
+
+            measured = runs - warmup_runs
+            if measured >= max_runs:
+                break
+            if measured >= repeats:
+                if not adaptive:
+                    break
+                summaries = [_summarize(values) for values in samples.values()]
+                if all(s['rel_ci95'] is not None and s['rel_ci95'] <= target_rel_ci for s in summaries):
+                    break
     except subprocess.CalledProcessError as e:
         error_msg = f"Speed test failed:\n{e.stdout}\n{e.stderr}"
         print(error_msg, file=sys.stderr)
         return error_msg
-    except FileNotFoundError:
-        print("Error: 'make' not found.", file=sys.stderr)
-        return "Failure: 'make' command not found."
+    except OSError as e:
+        print(f"Error: cannot run the benchmark: {e}", file=sys.stderr)
+        return f"Failure: cannot run the benchmark: {e}"
+
+    if aborted:
+        print(f"Speed test aborted: {aborted}", file=sys.stderr)
+        summary = _speed_summary(samples, None, max(0, runs - warmup_runs))
+        summary['aborted'] = aborted
+        summary['run_stats'] = run_stats
+        return json.dumps(summary)
+    summary = _speed_summary(samples, checksum, runs - warmup_runs)
+    if run_env:
+        summary['run_env'] = run_env
+    summary['run_stats'] = run_stats
+    if record:
+        _record_run(work_dir, workspace, summary, run_env)
+    return json.dumps(summary)
+
+
+def _parse_output(stdout: str):
+    """The JSON result line printed by the benchmark binary, or None."""
+    for line in reversed(stdout.strip().splitlines()):
+        line = line.strip()
+        if line.startswith("{"):
+            try:
+                return json.loads(line)
+            except ValueError:
+                return None
+    return None
+
+def _record_run(work_dir: str, workspace: str, output: dict, run_env: dict = None):
+    """Store a measurement in the experiment database; failures are logged, never raised."""
+    build = _read_build_info(work_dir)
+    if build is None:
+        return None
+    try:
+        return experiments.record_run(build, output, cpu_topology(), workspace, run_env)
+    except Exception as e:
+        print(f"Failed to record run: {e}", file=sys.stderr)
+        return None
+
+# Working-set sweep: array sizes per octave of working set, and the smallest
+# working set as a fraction of the L1 data cache
+SWEEP_POINTS_PER_OCTAVE = 2
+SWEEP_L1_FRACTION = 0.25
+# Bytes of working set per element: the three arrays a, b and c
+_SWEEP_BYTES_PER_N = 3 * 8
+
+def _cache_levels(parallel: bool):
+    """Data cache capacities from L1 up: per instance, or summed over instances for parallel runs."""
+    levels = []
+    for cache in cpu_topology()['caches']:
+        if cache['type'] == "Instruction" or not cache['size_bytes']:
+            continue
+        size = cache['size_bytes'] * (cache['instances'] if parallel else 1)
+        levels.append({'level': f"L{cache['level']}", 'bytes': size})
+    return levels
+
+def sweep_sizes(min_bytes: int, max_bytes: int, points_per_octave: int = SWEEP_POINTS_PER_OCTAVE):
+    """Geometric series of array lengths (whole cache lines) whose working sets span min_bytes..max_bytes."""
+    sizes = []
+    step = 2 ** (1 / max(1, points_per_octave))
+    working_set = max(_SWEEP_BYTES_PER_N * 8, min_bytes)
+    while True:
+        n = max(8, int(working_set / _SWEEP_BYTES_PER_N) // 8 * 8)
+        if n * _SWEEP_BYTES_PER_N > max_bytes:
+            break
+        if not sizes or n > sizes[-1]:
+            sizes.append(n)
+        working_set *= step
+    largest = max_bytes // _SWEEP_BYTES_PER_N
+    if not sizes or largest > sizes[-1]:
+        sizes.append(largest)
+    return sizes
+
+@_workspace_locked
+async def working_set_sweep(workspace: str = DEFAULT_WORKSPACE,
+                            points_per_octave: int = SWEEP_POINTS_PER_OCTAVE,
+                            min_bytes: int = None,
+                            max_bytes: int = None,
+                            env: dict = None,
+                            cpus: str = None,
+                            perf: bool = False):
+    """
+    Run the STREAM kernels of the workspace's binary over a geometric range of
+    working sets, from a fraction of the L1 data cache (min_bytes) up to the
+    built array size (max_bytes), in one process (stream_benchmark --sweep).
+    Repetitions per sample are scaled so each lasts at least a millisecond.
+    Returns a bandwidth-vs-size curve per kernel whose points are marked with
+    the cache level the three arrays fit in, plus the median bandwidth per level,
+    and the run's OS-level statistics. Sweeps are not recorded in the experiment database.
+    """
+    work_dir = _existing_work_dir(workspace)
+    if work_dir is None:
+        return _missing_workspace(workspace)
+    command = _benchmark_command(work_dir, cpus)
+    if isinstance(command, str):
+        return command
+    env = {k: str(v) for k, v in (env or {}).items()}
+    build = _read_build_info(work_dir) or {}
+    n_max = build.get('n') or default_problem_size()[0]
+    parallel = "openmp" in f"{build.get('CFLAGS', '')} {build.get('LDFLAGS', '')}"
+    levels = _cache_levels(parallel)
+    if min_bytes is None:
+        min_bytes = int(levels[0]['bytes'] * SWEEP_L1_FRACTION) if levels else 16 * 2**10
+    max_bytes = min(max_bytes or n_max * _SWEEP_BYTES_PER_N, n_max * _SWEEP_BYTES_PER_N)
+    sizes = sweep_sizes(min_bytes, max_bytes, points_per_octave)
+
+    async def on_progress(update: dict):
+        return None
+
+    try:
+        async with _measurement_lock():
+            result, _, run_stats = await _run_instrumented(
+                command + ["--sweep"] + [str(n) for n in sizes], work_dir, on_progress,
+                env={**os.environ, **env} if env else None, perf=perf)
+    except OSError as e:
+        print(f"Error: cannot run the benchmark: {e}", file=sys.stderr)
+        return f"Failure: cannot run the benchmark: {e}"
+    if result.returncode != 0:
+        error_msg = f"Sweep failed:\n{result.stdout}\n{result.stderr}"
+        print(error_msg, file=sys.stderr)
+        return error_msg
+    output = _parse_output(result.stdout)
+    if output is None or 'sweep' not in output:
+        return "Failure: This binary has no sweep mode (built from an older source); rebuild it."
+
+    def resident(working_set):
+        return next((level['level'] for level in levels if working_set <= level['bytes']), "DRAM")
+
+    curves = {}
+    for point in output['sweep']:
+        working_set = point['n'] * _SWEEP_BYTES_PER_N
+        for kernel in kernel_registry.stream_kernels():
+            stats = _summarize(point[kernel]['GB_s'])
+            curves.setdefault(kernel, []).append({
+                'n': point['n'],
+                'working_set_bytes': working_set,
+                'resident': resident(working_set),
+                'GB_s': round(stats['mean'], 2),
+                'ci95': [stats['ci95_low'], stats['ci95_high']],
+                'reps': point[kernel]['reps'],
+            })
+    plateaus = {}
+    for kernel, points in curves.items():
+        by_level = {}
+        for p in points:
+            by_level.setdefault(p['resident'], []).append(p['GB_s'])
+        plateaus[kernel] = {level: round(statistics.median(values), 2) for level, values in by_level.items()}
+    summary = {
+        'cache_levels': levels,
+        'parallel': parallel,
+        'ntimes': output.get('ntimes'),
+        'curves': curves,
+        'plateaus': plateaus,
+        'run_stats': run_stats,
+    }
+    if env or cpus:
+        summary['run_env'] = {**env, 'taskset': cpus} if cpus else env
+    return json.dumps(summary)
+
 
 
 def get_source_code():
@@ -126,74 +1279,56 @@ def get_source_code():
         return "Error: Source file not found."
 
 
-def make_custom_benchmark(CC: str, CFLAGS: str, LDFLAGS: str,
+@_workspace_locked
+async def make_custom_benchmark(CC: str, CFLAGS: str, LDFLAGS: str,
                                 allocation_code: str = None,
                                 copy_code: str = None,
                                 scale_code: str = None,
                                 add_code: str = None,
-                                triad_code: str = None):
+                                triad_code: str = None,
+                                n: int = None, ntimes: int = None,
+                                kernel_cflags: dict = None,
+                                kernel_code: dict = None,
+                                extra_kernels: list = None,
+                                allocation: str = None,
+                                workspace: str = DEFAULT_WORKSPACE):
     try:
-        work_dir = _ensure_work_dir()
+        work_dir = _ensure_work_dir(workspace)
         source_file = os.path.join(work_dir, "stream_benchmark.c")
 
         with open(source_file, "r") as f:
             source = f.read()
+        bytes_error = _stream_bytes_error(source)
+        if bytes_error:
+            return bytes_error
 
-        if allocation_code:
-            start = source.find("// ALLOCATION_START")
-            end = source.find("// ALLOCATION_END")
-            if start != -1 and end != -1:
-                source = source[:start] + "// ALLOCATION_START\n" + allocation_code + "\n// ALLOCATION_END" + source[end+len("// ALLOCATION_END"):]
-
-        if copy_code:
-            start = source.find("// COPY_START")
-            end = source.find("// COPY_END")
-            if start != -1 and end != -1:
-                source = source[:start] + "// COPY_START\n" + copy_code + "\n// COPY_END" + source[end+len("// COPY_END"):]
-
-        if scale_code:
-            start = source.find("// SCALE_START")
-            end = source.find("// SCALE_END")
-            if start != -1 and end != -1:
-                source = source[:start] + "// SCALE_START\n" + scale_code + "\n// SCALE_END" + source[end+len("// SCALE_END"):]
-
-        if add_code:
-            start = source.find("// ADD_START")
-            end = source.find("// ADD_END")
-            if start != -1 and end != -1:
-                source = source[:start] + "// ADD_START\n" + add_code + "\n// ADD_END" + source[end+len("// ADD_END"):]
-
-        if triad_code:
-            start = source.find("// TRIAD_START")
-            end = source.find("// TRIAD_END")
-            if start != -1 and end != -1:
-                source = source[:start] + "// TRIAD_START\n" + triad_code + "\n// TRIAD_END" + source[end+len("// TRIAD_END"):]
+        # kernel_code covers every registered kernel; the named arguments take precedence
+        kernels = {k: v for k, v in (kernel_code or {}).items() if v}
+        if allocation:
+            if allocation_code or kernels.get('allocation'):
+                return "Error: pass either allocation (a built-in strategy) or allocation_code, not both."
+            allocation_code = allocators.allocation_code(
+                allocation, _meminfo().get('Hugepagesize'), _static_topology()['numa_nodes'])
+            if allocation_code.startswith("Error"):
+                return allocation_code
+        extras = _optional_kernels(set(extra_kernels or []) | (set(kernels) - set(KERNEL_REGIONS)))
+        if isinstance(extras, str):
+            return extras
+        kernels.update({
+            'allocation': allocation_code or kernels.get('allocation'),
+            'copy': copy_code or kernels.get('copy'),
+            'scale': scale_code or kernels.get('scale'),
+            'add': add_code or kernels.get('add'),
+            'triad': triad_code or kernels.get('triad'),
+        })
+        source = _splice_source(_add_kernels(source, extras), kernels)
 
         custom_file = os.path.join(work_dir, "stream_benchmark_custom.c")
         with open(custom_file, "w") as f:
             f.write(source)
 
-        result = subprocess.run(
-            ["make", "custom", f"CC={CC}", f"CFLAGS={CFLAGS}", f"LDFLAGS={LDFLAGS}"],
-            capture_output=True,
-            text=True,
-            cwd=work_dir
-        )
-
-        if result.returncode != 0:
-            error_msg = f"Compilation failed:\nSTDOUT: {result.stdout}\nSTDERR: {result.stderr}"
-            print(error_msg, file=sys.stderr)
-            return error_msg
-
-        # Verify binary was created and is executable
-        binary_path = os.path.join(work_dir, "stream_benchmark")
-        if not os.path.exists(binary_path):
-            return "Error: Binary not created after compilation"
-
-        if not os.access(binary_path, os.X_OK):
-            os.chmod(binary_path, 0o755)
-
-        return True
+        return await _build_incremental(work_dir, source, CC, CFLAGS, LDFLAGS, kernels,
+                                        kernel_cflags, n=n, ntimes=ntimes, extra_kernels=extras)
     except subprocess.CalledProcessError as e:
         error_msg = f"Compilation failed:\n{e.stderr}"
         print(error_msg, file=sys.stderr)
@@ -201,9 +1336,125 @@ def make_custom_benchmark(CC: str, CFLAGS: str, LDFLAGS: str,
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         return str(e)
-    
-def list_cpu_info():
-    cpu_info = {
+
+# SIMD extensions worth knowing about when picking vector widths, widest first
+_SIMD_FLAGS = [
+    ("avx512f", 512), ("avx2", 256), ("avx", 256), ("fma", 256), ("sse4_2", 128), ("sse2", 128),
+    ("sve2", None), ("sve", None), ("asimd", 128), ("neon", 128),
+]
+
+def _read(path: str):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _parse_cpulist(text: str):
+    """Expand a kernel CPU list such as "0-3,8,10-11" into a list of ints."""
+    cpus = []
+    for part in (text or "").split(","):
+        if "-" in part:
+            lo, hi = part.split("-")
+            cpus.extend(range(int(lo), int(hi) + 1))
+        elif part.strip():
+            cpus.append(int(part))
+    return cpus
+
+def _parse_size(text: str):
+    """Convert sysfs sizes like "48K" or "2048K" to bytes."""
+    if not text:
+        return None
+    units = {"K": 2**10, "M": 2**20, "G": 2**30}
+    if text[-1] in units:
+        return int(text[:-1]) * units[text[-1]]
+    return int(text)
+
+def _meminfo(path: str = "/proc/meminfo"):
+    """Fields of a meminfo file in bytes (per-node files prefix lines with "Node N")."""
+    info = {}
+    for line in (_read(path) or "").splitlines():
+        key, _, value = line.partition(":")
+        parts = value.split()
+        if parts:
+            info[key.split()[-1]] = int(parts[0]) * (1024 if parts[1:] == ["kB"] else 1)
+    return info
+
+def _proc_cpuinfo():
+    info = {}
+    for line in (_read("/proc/cpuinfo") or "").splitlines():
+        key, _, value = line.partition(":")
+        key = key.strip()
+        if key and key not in info:
+            info[key] = value.strip()
+    return info
+
+def _simd_info(cpuinfo: dict):
+    flags = set((cpuinfo.get('flags') or cpuinfo.get('Features') or "").split())
+    extensions = [name for name, _ in _SIMD_FLAGS if name in flags]
+    vector_bits = next((bits for name, bits in _SIMD_FLAGS if name in flags and bits), None)
+    if "sve" in flags:
+        # Default SVE vector length in bytes, e.g. 64 (512-bit) on A64FX
+        sve_bytes = _read("/proc/sys/abi/sve_default_vector_length")
+        if sve_bytes and sve_bytes.isdigit():
+            vector_bits = max(vector_bits or 0, int(sve_bytes) * 8)
+    return {'extensions': extensions, 'vector_bits': vector_bits}
+
+def _cache_info():
+    """One entry per distinct cache (level, type), with the number of instances in the system."""
+    caches = {}
+    for cpu_dir in glob.glob("/sys/devices/system/cpu/cpu[0-9]*/cache/index[0-9]*"):
+        level, kind = _read(f"{cpu_dir}/level"), _read(f"{cpu_dir}/type")
+        shared = _read(f"{cpu_dir}/shared_cpu_list")
+        if level is None or kind is None:
+            continue
+        entry = caches.setdefault((int(level), kind), {
+            'level': int(level),
+            'type': kind,
+            'size_bytes': _parse_size(_read(f"{cpu_dir}/size")),
+            'line_bytes': int(_read(f"{cpu_dir}/coherency_line_size") or 0) or None,
+            'cpus_per_instance': len(_parse_cpulist(shared)),
+            'instances': set(),
+        })
+        entry['instances'].add(shared)
+    result = []
+    for key in sorted(caches):
+        entry = caches[key]
+        entry['instances'] = len(entry['instances'])
+        result.append(entry)
+    return result
+
+def _numa_info():
+    nodes = []
+    for node_dir in sorted(glob.glob("/sys/devices/system/node/node[0-9]*"),
+                           key=lambda p: int(p.rsplit("node", 1)[1])):
+        mem = _meminfo(f"{node_dir}/meminfo")
+        nodes.append({
+            'node': int(node_dir.rsplit("node", 1)[1]),
+            'cpus': _parse_cpulist(_read(f"{node_dir}/cpulist")),
+            'memory_total_bytes': mem.get('MemTotal'),
+        })
+    return nodes
+
+def _core_info():
+    cores, sockets, threads_per_core = set(), set(), 1
+    for topo in glob.glob("/sys/devices/system/cpu/cpu[0-9]*/topology"):
+        package, core = _read(f"{topo}/physical_package_id"), _read(f"{topo}/core_id")
+        siblings = _parse_cpulist(_read(f"{topo}/thread_siblings_list"))
+        cores.add((package, core))
+        sockets.add(package)
+        threads_per_core = max(threads_per_core, len(siblings))
+    return {
+        'sockets': len(sockets) or None,
+        'cores_physical': len(cores) or None,
+        'threads_per_core': threads_per_core,
+    }
+
+@functools.lru_cache(maxsize=None)
+def _static_topology():
+    cpuinfo = _proc_cpuinfo()
+    return {
+        'hostname': platform.node(),
         'architecture': platform.machine(),
         'processor': platform.processor(),
         'system': platform.system(),
@@ -211,5 +1462,158 @@ def list_cpu_info():
         'version': platform.version(),
         'machine': platform.machine(),
         'cores_logical': os.cpu_count(),
+        'model_name': cpuinfo.get('model name') or cpuinfo.get('CPU part'),
+        'cpus_usable': len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count(),
+        **_core_info(),
+        'simd': _simd_info(cpuinfo),
+        'caches': _cache_info(),
+        'numa_nodes': _numa_info(),
     }
-    return str(cpu_info)
\ No newline at end of file
+
+def cpu_topology():
+    """
+    Host description: platform strings, core/SMT layout, SIMD extensions,
+    cache hierarchy and NUMA nodes (discovered once and cached), plus the
+    current total/available memory.
+    """
+    meminfo = _meminfo()
+    return {
+        **copy.deepcopy(_static_topology()),
+        'memory': {
+            'total_bytes': meminfo.get('MemTotal'),
+            'available_bytes': meminfo.get('MemAvailable'),
+        },
+    }
+
+def list_cpu_info():
+    cpu_info = cpu_topology()
+    cpu_info['problem_size'] = problem_size_info()
+    try:
+        cpu_info['calibration'] = experiments.calibration()
+    except Exception as e:
+        print(f"Calibration lookup failed: {e}", file=sys.stderr)
+    return json.dumps(cpu_info)
+
+
+async def _sweep_build(candidate: dict, workspace: str, semaphore, n: int = None, ntimes: int = None):
+    async with semaphore:
+        kernels = {k: candidate.get(f"{k}_code") for k in _code_regions() if candidate.get(f"{k}_code")}
+        if kernels or candidate.get('kernel_cflags') or candidate.get('allocation'):
+            return await make_custom_benchmark(
+                candidate.get('CC', "gcc"), candidate.get('CFLAGS', ""), candidate.get('LDFLAGS', ""),
+                n=n, ntimes=ntimes, kernel_cflags=candidate.get('kernel_cflags'),
+                kernel_code=kernels, extra_kernels=candidate.get('extra_kernels'),
+                allocation=candidate.get('allocation'), workspace=workspace)
+        return await make_stream_benchmark(
+            candidate.get('CC', "gcc"), candidate.get('CFLAGS', ""), candidate.get('LDFLAGS', ""),
+            n=n, ntimes=ntimes, extra_kernels=candidate.get('extra_kernels'), workspace=workspace)
+
+async def sweep_build_configs(candidates: list, rank_by: str = "triad",
+                              max_parallel_builds: int = None,
+                              n: int = None, ntimes: int = None,
+                              abort_below: float = None,
+                              workspace: str = DEFAULT_WORKSPACE):
+    """
+    Build every candidate concurrently, each in its own scratch workspace, then
+    time the successful builds one at a time under the measurement lock.
+    n and ntimes set the array size and repetitions for all candidates; with
+    abort_below, a candidate's run is killed as soon as its rank_by kernel
+    falls below that fraction of the best known (see test_speed).
+    Returns one row per candidate, ranked by the rank_by kernel's bandwidth.
+    """
+    semaphore = asyncio.Semaphore(max_parallel_builds or os.cpu_count() or 1)
+    # Unique per call, so concurrent sweeps of one session never share scratch directories
+    call_id = uuid.uuid4().hex[:8]
+    sweep_workspaces = [f"{workspace}-sweep{call_id}-{i}" for i in range(len(candidates))]
+    # Pinned until measured, so creating other workspaces cannot evict a built candidate
+    _pinned_workspaces.update(sweep_workspaces)
+    try:
+        builds = await asyncio.gather(*[
+            _sweep_build(candidate, sweep_workspaces[i], semaphore, n, ntimes)
+            for i, candidate in enumerate(candidates)
+        ], return_exceptions=True)
+
+        rows = []
+        for i, (candidate, built) in enumerate(zip(candidates, builds)):
+            row = {
+                'index': i,
+                'CC': candidate.get('CC', "gcc"),
+                'CFLAGS': candidate.get('CFLAGS', ""),
+                'LDFLAGS': candidate.get('LDFLAGS', ""),
+                'kernels': [k for k in _code_regions() if candidate.get(f"{k}_code")],
+            }
+            if candidate.get('kernel_cflags'):
+                row['kernel_cflags'] = candidate['kernel_cflags']
+            if candidate.get('extra_kernels'):
+                row['extra_kernels'] = candidate['extra_kernels']
+            if candidate.get('allocation'):
+                row['allocation'] = candidate['allocation']
+            if built is not True:
+                row['status'] = "build_failed"
+                row['error'] = str(built)[-2000:]
+            else:
+                output = await test_speed(workspace=sweep_workspaces[i], abort_below=abort_below,
+                                          abort_kernels=[rank_by])
+                result = _parse_output(output)
+                if result is None:
+                    row['status'] = "run_failed"
+                    row['error'] = output[-2000:]
+                elif result.get('aborted'):
+                    row['status'] = "aborted"
+                    row['error'] = result['aborted']
+                else:
+                    row['status'] = "ok"
+                    row.update(result)
+            rows.append(row)
+    finally:
+        _pinned_workspaces.difference_update(sweep_workspaces)
+        for name in sweep_workspaces:
+            if os.path.exists(_workspace_path(name)):
+                release_workspace(name)
+
+    key = f"{rank_by}{experiments.KERNEL_SUFFIX}"
+    rows.sort(key=lambda r: -r[key] if r['status'] == "ok" and isinstance(r.get(key), (int, float))
+              else float("inf"))
+    for rank, row in enumerate(rows, 1):
+        row['rank'] = rank
+    return rows
+
+async def successive_halving(candidates: list, rank_by: str = "triad",
+                             min_n: int = 10000000, eta: int = 3,
+                             screening_ntimes: int = 5,
+                             max_parallel_builds: int = None,
+                             workspace: str = DEFAULT_WORKSPACE):
+    """
+    Screen candidates at low fidelity and promote the best 1/eta of each rung
+    to an eta times larger array, until the survivors run at the full default
+    size and repetition count. Failed candidates are dropped at the rung where
+    they fail. Returns the final ranked rung and a summary of every rung.
+    """
+    full_n, _ = default_problem_size()
+    eta = max(2, eta)
+    n = min(min_n, full_n)
+    survivors = list(range(len(candidates)))
+    rungs = []
+    while survivors:
+        full = n >= full_n
+        rows = await sweep_build_configs(
+            [candidates[i] for i in survivors], rank_by, max_parallel_builds,
+            n=None if full else n, ntimes=None if full else screening_ntimes,
+            workspace=workspace)
+        # Map sweep-local indices back to positions in the caller's list
+        for row in rows:
+            row['index'] = survivors[row['index']]
+        key = f"{rank_by}{experiments.KERNEL_SUFFIX}"
+        rungs.append({
+            'n': full_n if full else n,
+            'ntimes': None if full else screening_ntimes,
+            'evaluated': len(rows),
+            'results': [{'index': r['index'], 'status': r['status'], key: r.get(key)} for r in rows],
+        })
+        if full:
+            return {'best': rows[0] if rows and rows[0]['status'] == "ok" else None,
+                    'ranking': rows, 'rungs': rungs}
+        ok = [r['index'] for r in rows if r['status'] == "ok"]
+        survivors = ok[:max(1, -(-len(ok) // eta))]
+        n = min(n * eta, full_n)
+    return {'best': None, 'ranking': [], 'rungs': rungs}
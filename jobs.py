@@ -0,0 +1,130 @@
+import asyncio
+import os
+import sys
+import time
+import uuid
+from collections import OrderedDict
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# Campaign jobs executing at once unless configured otherwise
+DEFAULT_MAX_CAMPAIGNS = 2
+
+
+class JobScheduler:
+    """
+    Runs build/run coroutines as asyncio tasks and tracks them by job ID.
+
+    At most max_concurrent jobs execute at once; the rest wait in the queue.
+    Jobs whose kind is in campaign_kinds (long searches and sweeps that run
+    many builds and measurements) have a pool of their own, max_campaigns
+    slots, so a background campaign never holds up short build and run calls.
+    Finished jobs are kept (oldest evicted first) so their results can be
+    fetched later with result().
+    """
+
+    def __init__(self, max_concurrent: int = None, max_finished: int = 256,
+                 max_campaigns: int = None, campaign_kinds=()):
+        self.max_concurrent = max_concurrent or os.cpu_count() or 1
+        self.max_campaigns = max_campaigns or DEFAULT_MAX_CAMPAIGNS
+        self.campaign_kinds = frozenset(campaign_kinds)
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._semaphores = {}
+
+    def _get_semaphore(self, kind: str):
+        # Created lazily so they bind to the server's running event loop
+        pool = "campaign" if kind in self.campaign_kinds else "call"
+        if pool not in self._semaphores:
+            self._semaphores[pool] = asyncio.Semaphore(
+                self.max_campaigns if pool == "campaign" else self.max_concurrent)
+        return self._semaphores[pool]
+
+    def submit(self, kind: str, fn, *args, **kwargs):
+        """Schedule fn(*args, **kwargs) (a coroutine function) and return its job ID."""
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            'job_id': job_id,
+            'kind': kind,
+            'state': QUEUED,
+            'submitted': time.time(),
+            'started': None,
+            'finished': None,
+            'result': None,
+            'error': None,
+        }
+        job['task'] = asyncio.get_running_loop().create_task(
+            self._execute(job, fn, args, kwargs))
+        self._jobs[job_id] = job
+        self._evict()
+        return job_id
+
+    async def _execute(self, job, fn, args, kwargs):
+        try:
+            async with self._get_semaphore(job['kind']):
+                job['state'] = RUNNING
+                job['started'] = time.time()
+                job['result'] = await fn(*args, **kwargs)
+                job['state'] = DONE
+        except asyncio.CancelledError:
+            job['state'] = CANCELLED
+        except Exception as e:
+            job['state'] = FAILED
+            job['error'] = f"{type(e).__name__}: {e}"
+            print(f"Job {job['job_id']} ({job['kind']}) failed: {job['error']}", file=sys.stderr)
+        finally:
+            job['finished'] = time.time()
+        return job['result']
+
+    def _evict(self):
+        finished = [j for j in self._jobs.values() if j['state'] in (DONE, FAILED, CANCELLED)]
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job['job_id']]
+
+    def status(self, job_id: str):
+        """Return a JSON-serializable summary of a job, or None if unknown."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        now = time.time()
+        started = job['started']
+        return {
+            'job_id': job['job_id'],
+            'kind': job['kind'],
+            'state': job['state'],
+            'queued_seconds': round((started or job['finished'] or now) - job['submitted'], 3),
+            'run_seconds': round((job['finished'] or now) - started, 3) if started else None,
+            'error': job['error'],
+        }
+
+    def list_jobs(self):
+        return [self.status(job_id) for job_id in self._jobs]
+
+    def result(self, job_id: str):
+        """Return the result of a finished job, or its status if it is not done."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if job['state'] == DONE:
+            return job['result']
+        return self.status(job_id)
+
+    async def wait(self, job_id: str):
+        """Wait for a job to finish and return its result (or status on failure)."""
+        job = self._jobs[job_id]
+        # Shield so a disconnecting caller does not kill a job others may poll
+        await asyncio.shield(job['task'])
+        return self.result(job_id)
+
+    def cancel(self, job_id: str):
+        """Cancel a queued or running job. Returns False if it already finished."""
+        job = self._jobs.get(job_id)
+        if job is None or job['state'] in (DONE, FAILED, CANCELLED):
+            return False
+        job['task'].cancel()
+        return True
@@ -0,0 +1,279 @@
+import re
+
+# Registry of benchmark kernels. The four STREAM kernels are compiled into
+# every build and checked by the STREAM reference model; every other entry is
+# optional, compiled in when a build asks for it, and timed on arrays reset
+# to a = 1, b = 2, c = 0 (of length N, with the kernel working on ACTIVE_N).
+#
+# An entry declares:
+#   signature   C prototype of the function the kernel code must define
+#   code        default implementation (the body of the // NAME_START region)
+#   bytes_moved C expression in ACTIVE_N: bytes the kernel must move per call
+#               (for the STREAM kernels, equal to <NAME>_BYTES in the harness)
+#   call        C statement timed in the harness; may assign the double `result`
+#   probe       C expression accumulated after every call, printed as the
+#               kernel's check value (keep it cheap: it runs NTIMES times)
+#   setup, teardown  C statements run once around the timed loop
+#   reference   Python function (a, b, c, active_n, ntimes) -> expected sum of
+#               probe values, given lists holding the reset arrays
+
+
+class Kernel:
+    def __init__(self, name: str, signature: str, code: str, bytes_moved: str,
+                 call: str = None, probe: str = None, reference=None,
+                 setup: str = "", teardown: str = "", description: str = "",
+                 stream: bool = False):
+        self.name = name
+        self.signature = signature
+        self.code = code
+        self.bytes_moved = bytes_moved
+        self.call = call
+        self.probe = probe
+        self.reference = reference
+        self.setup = setup
+        self.teardown = teardown
+        self.description = description
+        self.stream = stream
+
+    def describe(self):
+        return {
+            'name': self.name,
+            'description': self.description,
+            'signature': self.signature,
+            'default_code': self.code,
+            'bytes_moved': self.bytes_moved,
+            'optional': not self.stream,
+        }
+
+
+REGISTRY = {}
+
+_RESERVED = {"allocation", "harness"}
+
+
+def register_kernel(kernel: Kernel):
+    """Add (or replace) a kernel. Build, run and check tools pick it up by name."""
+    if not re.fullmatch(r"[a-z][a-z0-9_]*", kernel.name) or kernel.name in _RESERVED \
+            or kernel.name.startswith("extra"):
+        raise ValueError(f"Invalid kernel name: {kernel.name!r}")
+    if not kernel.stream and (kernel.call is None or kernel.probe is None or kernel.reference is None):
+        raise ValueError(f"Kernel {kernel.name!r} needs call, probe and reference")
+    REGISTRY[kernel.name] = kernel
+    return kernel
+
+
+def stream_kernels():
+    return [name for name, k in REGISTRY.items() if k.stream]
+
+
+def optional_kernels():
+    return [name for name, k in REGISTRY.items() if not k.stream]
+
+
+def list_kernels():
+    return [k.describe() for k in REGISTRY.values()]
+
+
+# --- STREAM (defined in benchmark/stream_benchmark.c) ---
+
+register_kernel(Kernel(
+    "copy", "void copy_kernel(double *a, double *b, int n)", """void copy_kernel(double *a, double *b, int n) {
+    for (int i = 0; i < n; i++) {
+        a[i] = b[i];
+    }
+}""", "2.0 * ACTIVE_N * sizeof(double)", description="a[i] = b[i]", stream=True))
+
+register_kernel(Kernel(
+    "scale", "void scale_kernel(double *b, double *a, int n)", """void scale_kernel(double *b, double *a, int n) {
+    for (int i = 0; i < n; i++) {
+        b[i] = 2.0 * a[i];
+    }
+}""", "2.0 * ACTIVE_N * sizeof(double)", description="b[i] = 2.0 * a[i]", stream=True))
+
+register_kernel(Kernel(
+    "add", "void add_kernel(double *c, double *a, double *b, int n)", """void add_kernel(double *c, double *a, double *b, int n) {
+    for (int i = 0; i < n; i++) {
+        c[i] = a[i] + b[i];
+    }
+}""", "3.0 * ACTIVE_N * sizeof(double)", description="c[i] = a[i] + b[i]", stream=True))
+
+register_kernel(Kernel(
+    "triad", "void triad_kernel(double *a, double *b, double *c, int n)", """void triad_kernel(double *a, double *b, double *c, int n) {
+    for (int i = 0; i < n; i++) {
+        a[i] = b[i] + 3.0 * c[i];
+    }
+}""", "3.0 * ACTIVE_N * sizeof(double)", description="a[i] = b[i] + 3.0 * c[i]", stream=True))
+
+
+# --- Optional kernels ---
+
+# Index pattern for gather/scatter: a permutation of 0..n-1 whenever n is not a multiple of 7919
+_INDEX_SETUP = """int *idx = malloc(ACTIVE_N * sizeof(int));
+        for (long i = 0; i < ACTIVE_N; i++) {
+            idx[i] = (int)((i * 7919) % ACTIVE_N);
+            b[i] = (double)i;
+        }"""
+
+
+def _index_setup(b: list, n: int):
+    for i in range(n):
+        b[i] = float(i)
+    return [(i * 7919) % n for i in range(n)]
+
+
+def _dot_reference(a, b, c, n, ntimes):
+    return ntimes * sum(x * y for x, y in zip(a[:n], b[:n]))
+
+
+register_kernel(Kernel(
+    "dot", "double dot_kernel(double *a, double *b, int n)", """double dot_kernel(double *a, double *b, int n) {
+    double sum = 0.0;
+    for (int i = 0; i < n; i++) {
+        sum += a[i] * b[i];
+    }
+    return sum;
+}""", "2.0 * ACTIVE_N * sizeof(double)",
+    call="result = dot_kernel(a, b, ACTIVE_N)", probe="result", reference=_dot_reference,
+    description="Reduction: returns the sum of a[i] * b[i]"))
+
+
+def _strided_reference(a, b, c, n, ntimes):
+    total = 0.0
+    for _ in range(ntimes):
+        for i in range(0, n, 8):
+            a[i] += b[i]
+        total += a[0] + a[(n - 1) // 8 * 8]
+    return total
+
+
+register_kernel(Kernel(
+    "strided", "void strided_kernel(double *a, double *b, int n)", """void strided_kernel(double *a, double *b, int n) {
+    for (int i = 0; i < n; i += 8) {
+        a[i] += b[i];
+    }
+}""", "3.0 * ((ACTIVE_N + 7) / 8) * sizeof(double)",
+    call="strided_kernel(a, b, ACTIVE_N)", probe="a[0] + a[(ACTIVE_N - 1) / 8 * 8]",
+    reference=_strided_reference,
+    description="a[i] += b[i] for every 8th element (one double per cache line); "
+                "bytes count only the elements used"))
+
+
+def _gather_reference(a, b, c, n, ntimes):
+    idx = _index_setup(b, n)
+    total = 0.0
+    for _ in range(ntimes):
+        for i in range(n):
+            a[i] = b[idx[i]]
+        total += a[1] + a[n // 2] + a[n - 1]
+    return total
+
+
+register_kernel(Kernel(
+    "gather", "void gather_kernel(double *a, double *b, int *idx, int n)", """void gather_kernel(double *a, double *b, int *idx, int n) {
+    for (int i = 0; i < n; i++) {
+        a[i] = b[idx[i]];
+    }
+}""", "ACTIVE_N * (2.0 * sizeof(double) + sizeof(int))",
+    call="gather_kernel(a, b, idx, ACTIVE_N)", probe="a[1] + a[ACTIVE_N / 2] + a[ACTIVE_N - 1]",
+    setup=_INDEX_SETUP, teardown="free(idx);", reference=_gather_reference,
+    description="a[i] = b[idx[i]] with idx[i] = i * 7919 mod n"))
+
+
+def _scatter_reference(a, b, c, n, ntimes):
+    idx = _index_setup(b, n)
+    total = 0.0
+    for _ in range(ntimes):
+        for i in range(n):
+            a[idx[i]] = b[i]
+        total += a[1] + a[n // 2] + a[n - 1]
+    return total
+
+
+register_kernel(Kernel(
+    "scatter", "void scatter_kernel(double *a, double *b, int *idx, int n)", """void scatter_kernel(double *a, double *b, int *idx, int n) {
+    for (int i = 0; i < n; i++) {
+        a[idx[i]] = b[i];
+    }
+}""", "ACTIVE_N * (2.0 * sizeof(double) + sizeof(int))",
+    call="scatter_kernel(a, b, idx, ACTIVE_N)", probe="a[1] + a[ACTIVE_N / 2] + a[ACTIVE_N - 1]",
+    setup=_INDEX_SETUP, teardown="free(idx);", reference=_scatter_reference,
+    description="a[idx[i]] = b[i] with idx[i] = i * 7919 mod n"))
+
+_RAMP_SETUP = """for (long i = 0; i < ACTIVE_N; i++) {
+            a[i] = (double)(i % 17);
+        }"""
+
+
+def _ramp_setup(a: list, n: int):
+    for i in range(n):
+        a[i] = float(i % 17)
+
+
+def _stencil1d_reference(a, b, c, n, ntimes):
+    _ramp_setup(a, n)
+    total = 0.0
+    for _ in range(ntimes):
+        for i in range(1, n - 1):
+            c[i] = 0.25 * a[i - 1] + 0.5 * a[i] + 0.25 * a[i + 1]
+        total += c[1] + c[n // 2] + c[n - 2]
+    return total
+
+
+register_kernel(Kernel(
+    "stencil1d", "void stencil1d_kernel(double *c, double *a, int n)", """void stencil1d_kernel(double *c, double *a, int n) {
+    for (int i = 1; i < n - 1; i++) {
+        c[i] = 0.25 * a[i-1] + 0.5 * a[i] + 0.25 * a[i+1];
+    }
+}""", "2.0 * ACTIVE_N * sizeof(double)",
+    call="stencil1d_kernel(c, a, ACTIVE_N)", probe="c[1] + c[ACTIVE_N / 2] + c[ACTIVE_N - 2]",
+    setup=_RAMP_SETUP, reference=_stencil1d_reference,
+    description="3-point stencil c[i] = 0.25 * a[i-1] + 0.5 * a[i] + 0.25 * a[i+1]"))
+
+
+def _stencil2d_reference(a, b, c, n, ntimes):
+    _ramp_setup(a, n)
+    w = 1024
+    rows = n // w
+    total = 0.0
+    for _ in range(ntimes):
+        for i in range(1, rows - 1):
+            for j in range(1, w - 1):
+                c[i*w + j] = 0.5 * a[i*w + j] + 0.125 * (a[(i-1)*w + j] + a[(i+1)*w + j]
+                                                         + a[i*w + j - 1] + a[i*w + j + 1])
+        total += c[w + 1] + c[rows // 2 * w + w // 2]
+    return total
+
+
+register_kernel(Kernel(
+    "stencil2d", "void stencil2d_kernel(double *c, double *a, int n)", """void stencil2d_kernel(double *c, double *a, int n) {
+    const int w = 1024;
+    int rows = n / w;
+    for (int i = 1; i < rows - 1; i++) {
+        for (int j = 1; j < w - 1; j++) {
+            c[i*w + j] = 0.5 * a[i*w + j]
+                       + 0.125 * (a[(i-1)*w + j] + a[(i+1)*w + j] + a[i*w + j - 1] + a[i*w + j + 1]);
+        }
+    }
+}""", "2.0 * ACTIVE_N * sizeof(double)",
+    call="stencil2d_kernel(c, a, ACTIVE_N)", probe="c[1024 + 1] + c[ACTIVE_N / 1024 / 2 * 1024 + 512]",
+    setup=_RAMP_SETUP, reference=_stencil2d_reference,
+    description="5-point stencil over the array viewed as rows of 1024 doubles (interior points only)"))
+
+
+def _fill_reference(a, b, c, n, ntimes):
+    total = 0.0
+    for _ in range(ntimes):
+        c[:n] = [3.0] * n
+        total += c[n // 2] + c[n - 1]
+    return total
+
+
+register_kernel(Kernel(
+    "fill", "void fill_kernel(double *a, double value, int n)", """void fill_kernel(double *a, double value, int n) {
+    for (int i = 0; i < n; i++) {
+        a[i] = value;
+    }
+}""", "1.0 * ACTIVE_N * sizeof(double)",
+    call="fill_kernel(c, 3.0, ACTIVE_N)", probe="c[ACTIVE_N / 2] + c[ACTIVE_N - 1]",
+    reference=_fill_reference,
+    description="a[i] = value; write-only, so non-temporal stores avoid the read-for-ownership traffic"))
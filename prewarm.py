@@ -0,0 +1,89 @@
+import inspect
+import sys
+import time
+
+import experiments
+import implementation
+
+PREWARM_WORKSPACE = "prewarm"
+
+# Baseline build: the Makefile's defaults
+BASELINE_CC = "gcc"
+BASELINE_CFLAGS = "-O2 -Wall"
+BASELINE_LDFLAGS = ""
+
+# Startup phases, in order; "measure" includes "build"
+LEVELS = ("off", "build", "measure")
+
+_state = {'state': "off", 'started': None, 'finished': None, 'steps': {}}
+
+
+async def _step(name: str, fn, *args, **kwargs):
+    """Run one phase, recording its outcome and duration in the status. Returns its result or None."""
+    step = _state['steps'][name] = {'state': "running", 'seconds': None}
+    start = time.time()
+    try:
+        result = fn(*args, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+    except Exception as e:
+        result = f"Error: {type(e).__name__}: {e}"
+    step['seconds'] = round(time.time() - start, 3)
+    if isinstance(result, str) and result.startswith(("Error", "Failure")):
+        step.update(state="failed", error=result[-1000:])
+        print(f"Prewarm step {name} failed: {result[-200:]}", file=sys.stderr)
+        return None
+    step['state'] = "done"
+    return result
+
+
+def _host_info():
+    implementation.problem_size_info()
+    # Opens (and if need be creates) the experiment database
+    return {
+        'topology': implementation.cpu_topology(),
+        'calibration': experiments.calibration(),
+    }
+
+
+async def prewarm(level: str = "measure", repeats: int = 1, CC: str = BASELINE_CC,
+                  CFLAGS: str = BASELINE_CFLAGS, LDFLAGS: str = BASELINE_LDFLAGS):
+    """
+    Bring the server to a warm state: set up a work directory, discover the
+    host, build the baseline binary and, at level "measure", record a baseline
+    measurement. Once the build is ready, new workspaces are seeded with it
+    (see implementation.SEED_WORKSPACE) and identical builds hit the build cache.
+    Returns the status (see status()).
+    """
+    if level not in LEVELS:
+        return f"Error: unknown prewarm level '{level}' (available: {list(LEVELS)})"
+    if level == "off":
+        return status()
+    _state.update(state="running", started=time.time(), finished=None, steps={})
+    await _step("work_dir", implementation._ensure_work_dir, PREWARM_WORKSPACE)
+    await _step("host", _host_info)
+    built = await _step("build", implementation.make_stream_benchmark, CC, CFLAGS, LDFLAGS,
+                        workspace=PREWARM_WORKSPACE)
+    if built is True:
+        implementation.SEED_WORKSPACE = PREWARM_WORKSPACE
+        _state['baseline'] = {'CC': CC, 'CFLAGS': CFLAGS, 'LDFLAGS': LDFLAGS}
+        if level == "measure":
+            output = await _step("measure", implementation.test_speed, workspace=PREWARM_WORKSPACE,
+                                 repeats=repeats)
+            _state['baseline_result'] = implementation._parse_output(output) if output else None
+    failed = [name for name, step in _state['steps'].items() if step['state'] == "failed"]
+    _state.update(state="failed" if failed else "done", finished=time.time())
+    print(f"Prewarm {_state['state']} after {_state['finished'] - _state['started']:.1f}s", file=sys.stderr)
+    return status()
+
+
+def status():
+    """
+    Progress of the startup prewarm: {"state": "off" | "running" | "done" |
+    "failed", "steps": {name: {"state", "seconds", "error"}}, "baseline",
+    "baseline_result", "seconds"}.
+    """
+    result = {k: v for k, v in _state.items() if k not in ("started", "finished")}
+    if _state['started']:
+        result['seconds'] = round((_state['finished'] or time.time()) - _state['started'], 3)
+    return result
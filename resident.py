@@ -0,0 +1,169 @@
+import asyncio
+import json
+import os
+import shutil
+import sys
+import uuid
+
+import experiments
+import implementation
+
+# The resident harness is built here once per server, separate from any workspace
+RESIDENT_DIR = "/tmp/benchmark_resident"
+HARNESS_CC = "gcc"
+HARNESS_CFLAGS = "-O2"
+
+
+class ResidentHarness:
+    """
+    A long-lived resident_harness process holding the benchmark arrays.
+    Candidates are loaded as shared objects, so each evaluation skips the
+    allocation and first-touch page faults of a fresh process.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.process = None
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self):
+        shutil.copytree(implementation.SOURCE_DIR, RESIDENT_DIR, dirs_exist_ok=True)
+        result = await implementation._run(
+            ["make", "resident_harness", f"CC={HARNESS_CC}", f"CFLAGS={HARNESS_CFLAGS}"],
+            cwd=RESIDENT_DIR
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Building the resident harness failed:\n{result.stdout}\n{result.stderr}")
+        self.process = await asyncio.create_subprocess_exec(
+            os.path.join(RESIDENT_DIR, "resident_harness"), str(self.n),
+            cwd=RESIDENT_DIR,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=2**24
+        )
+        ready = await self._read()
+        if 'ready' not in ready:
+            await self.stop()
+            raise RuntimeError(f"Resident harness failed to start: {ready}")
+        print(f"Resident harness ready with N={self.n}", file=sys.stderr)
+
+    async def _read(self):
+        line = await self.process.stdout.readline()
+        if not line:
+            await self.process.wait()
+            raise RuntimeError(f"Resident harness exited with code {self.process.returncode}"
+                               " (a loaded kernel probably crashed)")
+        return json.loads(line)
+
+    async def command(self, line: str):
+        """Send one command and return the harness's JSON reply."""
+        try:
+            self.process.stdin.write(f"{line}\n".encode())
+            await self.process.stdin.drain()
+            return await self._read()
+        except asyncio.CancelledError:
+            # A half-finished command would desynchronize the protocol
+            await self.stop()
+            raise
+
+    async def stop(self):
+        if self.alive:
+            self.process.kill()
+            await self.process.wait()
+        self.process = None
+
+
+_harness = None
+
+
+async def _get_harness(n: int):
+    """The server's harness, (re)started if it died or holds arrays of another size."""
+    global _harness
+    if _harness is None or not _harness.alive or _harness.n != n:
+        if _harness is not None:
+            await _harness.stop()
+        _harness = ResidentHarness(n)
+        await _harness.start()
+    return _harness
+
+
+async def stop_harness():
+    """Stop the resident harness and free its arrays. Returns False if none was running."""
+    global _harness
+    if _harness is None or not _harness.alive:
+        return False
+    async with implementation._measurement_lock():
+        await _harness.stop()
+    _harness = None
+    return True
+
+
+@implementation._workspace_locked
+async def test_speed_resident(CC: str, CFLAGS: str, LDFLAGS: str,
+                              copy_code: str = None,
+                              scale_code: str = None,
+                              add_code: str = None,
+                              triad_code: str = None,
+                              n: int = None, ntimes: int = None,
+                              repeats: int = 1, warmup_iterations: int = 1,
+                              workspace: str = implementation.DEFAULT_WORKSPACE):
+    """
+    Compile the kernels (default or custom) into a shared object and time them
+    in the resident harness. Returns the same JSON summary as test_speed.
+    """
+    if ntimes is not None and ntimes < 2:
+        return "Error: ntimes must be at least 2 (a warm-up iteration and a timed one)."
+    work_dir = implementation._ensure_work_dir(workspace)
+    with open(os.path.join(work_dir, "stream_benchmark.c"), "r") as f:
+        source = f.read()
+    kernels = {'copy': copy_code, 'scale': scale_code, 'add': add_code, 'triad': triad_code}
+    kernel_source = implementation._kernel_source(implementation._splice_source(source, kernels))
+    with open(os.path.join(work_dir, "stream_kernels.c"), "w") as f:
+        f.write(kernel_source)
+
+    try:
+        built = await implementation._build(work_dir, "kernels.so", kernel_source, CC, CFLAGS, LDFLAGS,
+                                            kernels, n=n, ntimes=ntimes,
+                                            output="kernels.so", info_file="kernels.json")
+    except FileNotFoundError:
+        return "Error: 'make' not found."
+    if built is not True:
+        return built
+
+    default_n, default_ntimes = implementation.default_problem_size()
+    # dlopen caches by path, so every candidate is loaded from a fresh file name
+    os.makedirs(RESIDENT_DIR, exist_ok=True)
+    so_path = os.path.join(RESIDENT_DIR, f"kernels-{uuid.uuid4().hex[:12]}.so")
+    shutil.copy2(os.path.join(work_dir, "kernels.so"), so_path)
+    samples = {}
+    try:
+        async with implementation._measurement_lock():
+            harness = await _get_harness(n or default_n)
+            reply = await harness.command(f"load {so_path}")
+            if 'error' in reply:
+                return f"Failure: {reply['error']}"
+            for _ in range(max(1, repeats)):
+                output = await harness.command(f"run {ntimes or default_ntimes}")
+                if 'error' in output:
+                    return f"Failure: {output['error']}"
+                for kernel, values in output['samples'].items():
+                    samples.setdefault(kernel, []).extend(values[warmup_iterations:] or values)
+    except RuntimeError as e:
+        print(f"Resident run failed: {e}", file=sys.stderr)
+        return f"Failure: {e}"
+    finally:
+        os.remove(so_path)
+
+    summary = implementation._speed_summary(samples, output['checksum'], max(1, repeats))
+    summary['mode'] = "resident"
+    build = implementation._read_build_info(work_dir, "kernels.json")
+    if build is not None:
+        try:
+            experiments.record_run(build, summary, implementation.cpu_topology(), workspace,
+                                   mode=experiments.RESIDENT_MODE)
+        except Exception as e:
+            print(f"Failed to record run: {e}", file=sys.stderr)
+    return json.dumps(summary)
@@ -0,0 +1,201 @@
+# OS-level statistics of one benchmark execution. The benchmark is started
+# through this file as a launcher (python3 runstats.py cmd ...), which waits
+# for it with wait4() and reports its rusage as a JSON line on stderr, next to
+# the benchmark's own progress lines. Load and memory are sampled before and
+# after the run, and perf stat counters are added when perf works here.
+import asyncio
+import ctypes
+import json
+import os
+import shutil
+import signal
+import sys
+import time
+
+# Counters collected with perf stat; unsupported ones are reported as null
+PERF_EVENTS = ["task-clock", "context-switches", "cpu-migrations", "page-faults",
+               "cycles", "instructions", "cache-references", "cache-misses"]
+PERF_OUTPUT = "perf_stat.csv"
+
+# Diagnostics thresholds: involuntary context switches per second of run time,
+# and load average per usable CPU, above which a run is flagged as disturbed.
+# Preemption is only flagged from INVOLUNTARY_SWITCH_MIN switches on, since a
+# few scheduler ticks already give a short run a high rate.
+INVOLUNTARY_SWITCH_RATE = 100
+INVOLUNTARY_SWITCH_MIN = 100
+LOAD_PER_CPU = 0.75
+
+_perf_ok = None
+
+
+def launcher_command(cmd: list, perf_output: str = None):
+    """cmd run through the launcher, and through perf stat writing CSV to perf_output if given."""
+    if perf_output:
+        cmd = ["perf", "stat", "-x", ",", "-o", perf_output, "-e", ",".join(PERF_EVENTS), "--"] + cmd
+    return [sys.executable, os.path.abspath(__file__)] + cmd
+
+
+async def perf_available():
+    """Whether perf stat can count here (it is often missing or blocked by perf_event_paranoid in containers)."""
+    global _perf_ok
+    if _perf_ok is None:
+        _perf_ok = False
+        if shutil.which("perf"):
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    "perf", "stat", "-x", ",", "-e", "task-clock", "--", "true",
+                    stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+                _perf_ok = await process.wait() == 0
+            except OSError:
+                pass
+    return _perf_ok
+
+
+def _read_fields(path: str):
+    fields = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.replace(":", " ").split()
+                if len(parts) >= 2 and parts[1].isdigit():
+                    fields[parts[0]] = int(parts[1])
+    except OSError:
+        pass
+    return fields
+
+
+def snapshot():
+    """Load average, free memory and swap/fault counters of the host right now."""
+    meminfo = _read_fields("/proc/meminfo")
+    vmstat = _read_fields("/proc/vmstat")
+    try:
+        loadavg = [round(x, 2) for x in os.getloadavg()]
+    except OSError:
+        loadavg = None
+    return {
+        'loadavg': loadavg,
+        'mem_available_bytes': meminfo['MemAvailable'] * 1024 if 'MemAvailable' in meminfo else None,
+        'mem_free_bytes': meminfo['MemFree'] * 1024 if 'MemFree' in meminfo else None,
+        'swap_free_bytes': meminfo['SwapFree'] * 1024 if 'SwapFree' in meminfo else None,
+        'vmstat': {k: vmstat.get(k) for k in ("pswpin", "pswpout", "pgmajfault")},
+    }
+
+
+def system_delta(before: dict, after: dict):
+    """Before/after host state plus the host-wide swap traffic during the run."""
+    delta = {}
+    for key in ("pswpin", "pswpout"):
+        if before['vmstat'][key] is not None and after['vmstat'][key] is not None:
+            delta[key] = after['vmstat'][key] - before['vmstat'][key]
+    return {
+        'system_before': {k: v for k, v in before.items() if k != "vmstat"},
+        'system_after': {k: v for k, v in after.items() if k != "vmstat"},
+        'swap_in_pages': delta.get('pswpin'),
+        'swap_out_pages': delta.get('pswpout'),
+    }
+
+
+def parse_perf(path: str):
+    """Counters from a perf stat -x, output file, or None if it is missing."""
+    try:
+        with open(path, "r") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    counters = {}
+    for line in lines:
+        fields = line.strip().split(",")
+        if not line.strip() or line.startswith("#") or len(fields) < 3:
+            continue
+        value, event = fields[0], fields[2]
+        try:
+            number = float(value)
+            counters[event] = int(number) if number.is_integer() else number
+        except ValueError:
+            counters[event] = None  # <not supported> or <not counted>
+    if counters.get('cycles') and counters.get('instructions') is not None:
+        counters['ipc'] = round(counters['instructions'] / counters['cycles'], 3)
+    return counters
+
+
+def diagnose(stats: dict, cpus_usable: int = None):
+    """Plain-language hints at OS effects that can make a run slow."""
+    hints = []
+    rusage = stats.get('rusage') or {}
+    if rusage.get('major_faults'):
+        hints.append(f"{rusage['major_faults']} major page faults: pages were read from disk or swap")
+    if stats.get('swap_in_pages') or stats.get('swap_out_pages'):
+        hints.append(f"the host swapped during the run ({stats.get('swap_in_pages')} pages in, "
+                     f"{stats.get('swap_out_pages')} out)")
+    wall = rusage.get('wall_seconds')
+    switches = rusage.get('involuntary_switches', 0)
+    if wall and switches >= INVOLUNTARY_SWITCH_MIN and switches / wall > INVOLUNTARY_SWITCH_RATE:
+        hints.append(f"{rusage['involuntary_switches']} involuntary context switches in {wall:.2f} s: "
+                     "the benchmark was preempted by other work")
+    loadavg = (stats.get('system_before') or {}).get('loadavg')
+    if loadavg and cpus_usable and loadavg[0] > LOAD_PER_CPU * cpus_usable:
+        hints.append(f"load average {loadavg[0]} on {cpus_usable} usable CPUs before the run: the host was busy")
+    migrations = (stats.get('perf') or {}).get('cpu-migrations')
+    if migrations:
+        hints.append(f"{migrations} CPU migrations: pin threads (OMP_PROC_BIND, taskset) for stable results")
+    return hints
+
+
+def _rusage(ru, wall_seconds: float):
+    return {
+        'wall_seconds': round(wall_seconds, 4),
+        'user_seconds': round(ru.ru_utime, 4),
+        'system_seconds': round(ru.ru_stime, 4),
+        'max_rss_bytes': ru.ru_maxrss * 1024,
+        'major_faults': ru.ru_majflt,
+        'minor_faults': ru.ru_minflt,
+        'voluntary_switches': ru.ru_nvcsw,
+        'involuntary_switches': ru.ru_nivcsw,
+    }
+
+
+def main(cmd: list):
+    """Launcher: run cmd as a child, wait4() for it, print its rusage, exit like it did."""
+    parent = os.getpid()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            # Die with the launcher, so killing an aborted run kills the benchmark too (PR_SET_PDEATHSIG)
+            ctypes.CDLL(None, use_errno=True).prctl(1, signal.SIGKILL)
+        except (OSError, AttributeError):
+            pass
+        if os.getppid() != parent:
+            os._exit(1)
+        # A process group of its own: with perf stat in between, the benchmark is
+        # the child's child, which only signals to the whole group reach
+        os.setpgid(0, 0)
+        try:
+            os.execvp(cmd[0], cmd)
+        except OSError as e:
+            print(f"{cmd[0]}: {e}", file=sys.stderr, flush=True)
+            os._exit(127)
+    try:
+        # Also set here, so a signal arriving before the child has run finds the group
+        os.setpgid(pid, pid)
+    except OSError:
+        pass
+
+    def forward(signum, frame):
+        try:
+            os.killpg(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(sig, forward)
+    start = time.monotonic()
+    _, status, ru = os.wait4(pid, 0)
+    print(json.dumps({'rusage': _rusage(ru, time.monotonic() - start)}), file=sys.stderr, flush=True)
+    if os.WIFSIGNALED(status):
+        signal.signal(os.WTERMSIG(status), signal.SIG_DFL)
+        os.kill(os.getpid(), os.WTERMSIG(status))
+    sys.exit(os.WEXITSTATUS(status))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,141 @@
+import os
+import sys
+
+import experiments
+import implementation
+
+# A kernel saturates at the smallest thread count reaching this fraction of its best bandwidth
+SATURATION_FRACTION = 0.95
+
+# OpenMP placement policies; "numa_round_robin" also pins the process with taskset
+POLICIES = {
+    'spread': {'OMP_PROC_BIND': "spread", 'OMP_PLACES': "cores"},
+    'close': {'OMP_PROC_BIND': "close", 'OMP_PLACES': "cores"},
+    'numa_round_robin': {'OMP_PROC_BIND': "close", 'OMP_PLACES': "threads"},
+    'unbound': {'OMP_PROC_BIND': "false"},
+}
+
+
+def _cpu_order(topology: dict):
+    """
+    Usable CPUs dealt round-robin over the NUMA nodes, one per physical core
+    first and SMT siblings after, so the first k CPUs spread k threads evenly.
+    """
+    usable = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else \
+        list(range(os.cpu_count() or 1))
+    nodes = [[c for c in node['cpus'] if c in usable] for node in topology.get('numa_nodes') or []]
+    nodes = [node for node in nodes if node] or [usable]
+    primary, secondary = [], []
+    for node in nodes:
+        first, rest = [], []
+        for cpu in node:
+            siblings = implementation._parse_cpulist(implementation._read(
+                f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list"))
+            (first if not siblings or min(siblings) == cpu else rest).append(cpu)
+        primary.append(first)
+        secondary.append(rest)
+    order = []
+    for groups in (primary, secondary):
+        for i in range(max(len(g) for g in groups)):
+            order += [g[i] for g in groups if i < len(g)]
+    return order
+
+
+def _cpulist(cpus: list):
+    return ",".join(str(c) for c in sorted(cpus))
+
+
+def default_thread_counts(topology: dict):
+    """Powers of two, multiples of the cores per NUMA node, all cores and all usable CPUs."""
+    usable = topology.get('cpus_usable') or os.cpu_count() or 1
+    cores = min(usable, max(1, usable // (topology.get('threads_per_core') or 1)))
+    counts = set()
+    k = 1
+    while k < cores:
+        counts.add(k)
+        k *= 2
+    nodes = len(topology.get('numa_nodes') or []) or 1
+    per_node = max(1, cores // nodes)
+    counts.update(per_node * i for i in range(1, nodes + 1))
+    counts.update({cores, usable})
+    return sorted(c for c in counts if 1 <= c <= usable)
+
+
+async def thread_scaling(thread_counts: list = None, policies: list = None, repeats: int = 1,
+                         record: bool = True, workspace: str = implementation.DEFAULT_WORKSPACE):
+    """
+    Run the workspace's current binary at each thread count under each
+    placement policy (see POLICIES). Returns per-kernel scaling curves, the
+    saturation thread count of every curve, and the best placement per kernel.
+    """
+    work_dir = implementation._existing_work_dir(workspace)
+    if work_dir is None:
+        return implementation._missing_workspace(workspace)
+    build = implementation._read_build_info(work_dir)
+    if build is None or not os.path.exists(os.path.join(work_dir, "stream_benchmark")):
+        return "Error: No build in this workspace; build an OpenMP binary first."
+    if "openmp" not in f"{build['CFLAGS']} {build['LDFLAGS']} {build.get('kernel_cflags') or ''}":
+        return ("Error: The build in this workspace does not use OpenMP, so the thread count has no effect; "
+                "rebuild with -fopenmp in CFLAGS and LDFLAGS.")
+    policies = policies or list(POLICIES)
+    unknown = set(policies) - set(POLICIES)
+    if unknown:
+        return f"Error: unknown policies {sorted(unknown)} (available: {list(POLICIES)})"
+
+    topology = implementation.cpu_topology()
+    thread_counts = sorted(set(thread_counts or default_thread_counts(topology)))
+    order = _cpu_order(topology)
+    curves = {}
+    errors = []
+    # Pinned so eviction cannot remove the binary between points, and checked
+    # after every point so a rebuild cannot mix two binaries in one curve
+    pinned = workspace not in implementation._pinned_workspaces
+    implementation._pinned_workspaces.add(workspace)
+    try:
+        for policy in policies:
+            for threads in thread_counts:
+                env = {**POLICIES[policy], 'OMP_NUM_THREADS': threads}
+                cpus = _cpulist(order[:threads]) if policy == "numa_round_robin" else None
+                if cpus is not None and threads > len(order):
+                    continue
+                output = await implementation.test_speed(workspace=workspace, repeats=repeats,
+                                                         env=env, cpus=cpus, record=record)
+                current = implementation._read_build_info(work_dir) or {}
+                if current.get('build_hash') != build.get('build_hash'):
+                    return ("Error: The workspace was rebuilt during the scaling sweep, so its curves "
+                            "would mix two binaries; rerun it once the build is done.")
+                result = implementation._parse_output(output)
+                if result is None:
+                    errors.append({'policy': policy, 'threads': threads, 'error': output[-1000:]})
+                    print(f"Scaling run failed ({policy}, {threads} threads): {output[-200:]}", file=sys.stderr)
+                    continue
+                for kernel, stats in result['stats'].items():
+                    curves.setdefault(kernel, {}).setdefault(policy, []).append({
+                        'threads': threads,
+                        'GB_s': result[f"{kernel}{experiments.KERNEL_SUFFIX}"],
+                        'ci95': [stats['ci95_low'], stats['ci95_high']],
+                    })
+    finally:
+        if pinned:
+            implementation._pinned_workspaces.discard(workspace)
+
+    saturation, best = {}, {}
+    for kernel, by_policy in curves.items():
+        saturation[kernel] = {}
+        for policy, points in by_policy.items():
+            peak = max(p['GB_s'] for p in points)
+            saturation[kernel][policy] = min(p['threads'] for p in points
+                                             if p['GB_s'] >= SATURATION_FRACTION * peak)
+        policy, point = max(((policy, p) for policy, points in by_policy.items() for p in points),
+                            key=lambda x: x[1]['GB_s'])
+        env = {**POLICIES[policy], 'OMP_NUM_THREADS': point['threads']}
+        best[kernel] = {'policy': policy, 'threads': point['threads'], 'GB_s': point['GB_s'], 'env': env}
+        if policy == "numa_round_robin":
+            best[kernel]['taskset'] = _cpulist(order[:point['threads']])
+    return {
+        'thread_counts': thread_counts,
+        'curves': curves,
+        'saturation': saturation,
+        'best': best,
+        'errors': errors,
+    }
@@ -1,6 +1,23 @@
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import FastMCP, Context
+import allocators
+import autotune as autotune_search
+import buildcache
+import calibration
+import codegen
+import compilers
+import coordinator
+import experiments
 import implementation
+import jobs
+import kernels
+import prewarm
+import resident
+import scaling
+import asyncio
+import contextlib
 import sys
+import uuid
+import weakref
 
 # Parse arguments early to configure server
 import argparse
@@ -11,14 +28,115 @@ parser.add_argument("--host", default="0.0.0.0",
                     help="Host to bind to (for SSE transport)")
 parser.add_argument("--port", type=int, default=8000,
                     help="Port to bind to (for SSE transport)")
+parser.add_argument("--max-jobs", type=int, default=None,
+                    help="Maximum number of build/run jobs executing at once (default: CPU count)")
+parser.add_argument("--max-campaigns", type=int, default=jobs.DEFAULT_MAX_CAMPAIGNS,
+                    help="Maximum number of long campaigns (autotune, sweeps, calibration, prewarm...) "
+                         "executing at once; they do not count against --max-jobs")
+parser.add_argument("--work-dir", default=implementation.WORK_DIR,
+                    help="Directory holding one work directory per workspace")
+parser.add_argument("--max-workspaces", type=int, default=implementation.MAX_WORKSPACES,
+                    help="Number of idle per-session work directories kept before the least recently used are removed")
+parser.add_argument("--workspace-ttl", type=float, default=implementation.WORKSPACE_TTL,
+                    help="Seconds after which an idle work directory is removed")
+parser.add_argument("--cache-dir", default=buildcache.CACHE_DIR,
+                    help="Build cache directory; point it at a mounted volume to keep binaries across container restarts")
+parser.add_argument("--cache-max-mb", type=float, default=buildcache.CACHE_MAX_BYTES / 2**20,
+                    help="Size limit of the build cache in MiB; least recently used binaries are evicted first")
+parser.add_argument("--db", default=experiments.DB_PATH,
+                    help="SQLite file recording every measurement; use a persistent path to keep results across restarts")
+parser.add_argument("--memory-fraction", type=float, default=implementation.MEMORY_FRACTION,
+                    help="Largest share of available memory the default-size arrays may take")
+parser.add_argument("--flag-probes", default=compilers.PROBE_CACHE_FILE,
+                    help="JSON file caching which flags each compiler accepts")
+parser.add_argument("--workers", default="",
+                    help="Comma-separated URLs of worker servers (e.g. http://node1:8000) for distributed_sweep")
+parser.add_argument("--measure-lock", default=implementation.MEASURE_LOCK_FILE,
+                    help="Lock file serializing measurements across all servers on this node")
+parser.add_argument("--prewarm", choices=prewarm.LEVELS, default="off",
+                    help="Warm up in the background at startup: set up a work directory, discover the host "
+                         "and build the baseline ('build'), plus record a baseline measurement ('measure')")
 args = parser.parse_args()
 
+implementation.WORK_DIR = args.work_dir
+implementation.MAX_WORKSPACES = args.max_workspaces
+implementation.WORKSPACE_TTL = args.workspace_ttl
+buildcache.CACHE_DIR = args.cache_dir
+buildcache.CACHE_MAX_BYTES = int(args.cache_max_mb * 2**20)
+experiments.DB_PATH = args.db
+implementation.MEASURE_LOCK_FILE = args.measure_lock
+compilers.PROBE_CACHE_FILE = args.flag_probes
+implementation.MEMORY_FRACTION = args.memory_fraction
+for url in filter(None, (u.strip() for u in args.workers.split(","))):
+    coordinator.add_worker(url)
+
+_prewarm_job = None
+
+@contextlib.asynccontextmanager
+async def _lifespan(server):
+    """Start the prewarm as a job once the event loop runs, without holding up the handshake."""
+    global _prewarm_job
+    # HTTP transports enter the lifespan once per session; prewarm only once
+    if args.prewarm != "off" and _prewarm_job is None:
+        _prewarm_job = scheduler.submit("prewarm", prewarm.prewarm, args.prewarm)
+    yield {}
+
 # Initialize the MCP server for the autotune hackathon
 mcp = FastMCP("autotune_hackathon", host=args.host, port=args.port,
-              json_response=True)
+              json_response=True, lifespan=_lifespan)
+
+# Builds and runs go through the job scheduler so they never block the event loop
+# Long campaigns get their own slots, so one of them never blocks the short tool calls
+CAMPAIGN_KINDS = ("prewarm", "calibrate", "thread_scaling", "sweep_build_configs",
+                  "screen_configs", "autotune", "distributed_sweep")
+scheduler = jobs.JobScheduler(max_concurrent=args.max_jobs, max_campaigns=args.max_campaigns,
+                              campaign_kinds=CAMPAIGN_KINDS)
+
+async def _dispatch(kind, background, fn, *fn_args, **fn_kwargs):
+    """Submit fn to the scheduler; return the job ID if background, else wait for the result."""
+    job_id = scheduler.submit(kind, fn, *fn_args, **fn_kwargs)
+    if background:
+        return {"job_id": job_id}
+    return await scheduler.wait(job_id)
+
+def _progress(ctx: Context, background: bool):
+    """Coroutine relaying per-iteration benchmark results as MCP progress notifications."""
+    if ctx is None or background:
+        return None
+    done = 0
+
+    async def report(update: dict):
+        nonlocal done
+        done += 1
+        await ctx.report_progress(
+            done, message=f"{update['progress']} {update['iteration'] + 1}/{update['of']}: "
+                          f"{update['GB_s']:.2f} GB/s")
+    return report
+
+# Each MCP session gets its own work directory unless it names one explicitly
+_session_workspaces = weakref.WeakKeyDictionary()
+
+async def _workspace(ctx: Context, workspace: str):
+    if workspace:
+        return workspace
+    session = ctx.session
+    if session not in _session_workspaces:
+        name = f"session-{uuid.uuid4().hex[:8]}"
+        # Created up front (from the prewarmed baseline if there is one), since runs never create
+        # workspaces, and in a thread: copying the sources would block every other session
+        _session_workspaces[session] = (name, asyncio.ensure_future(
+            asyncio.to_thread(implementation._ensure_work_dir, name)))
+    name, created = _session_workspaces[session]
+    # Shielded: a caller disconnecting must not cancel the copy other calls of the session wait for
+    await asyncio.shield(created)
+    return name
 
 @mcp.tool()
-async def make_stream_benchmark(CC: str, CFLAGS: str, LDFLAGS: str):
+async def make_stream_benchmark(CC: str, CFLAGS: str, LDFLAGS: str,
+                                n: int = 0, ntimes: int = 0,
+                                extra_kernels: list[str] = None,
+                                workspace: str = "", background: bool = False,
+                                ctx: Context = None):
     """
     Compile the STREAM memory bandwidth benchmark.
 
@@ -26,32 +144,64 @@ async def make_stream_benchmark(CC: str, CFLAGS: str, LDFLAGS: str):
         CC (str): C compiler (e.g., "gcc", "clang")
         CFLAGS (str): Compiler flags (e.g., "-O3 -march=native")
         LDFLAGS (str): Linker flags (e.g., "-lm")
+        n (int): Array length (default: sized to the host, see list_cpu_info's problem_size).
+            Smaller values give cheap low-fidelity builds for screening.
+        ntimes (int): Timed repetitions of each kernel (default: 20)
+        extra_kernels (list[str]): Optional registered kernels to compile and time
+            in addition to copy/scale/add/triad (see list_kernels), e.g. ["dot", "gather"]
+        workspace (str): Work directory to use. Defaults to one private to this
+            MCP session; pass the same name from several calls or sessions to share it
+        background (bool): If True, return {"job_id": ...} immediately and fetch
+            the outcome later with job_status/job_result
 
     Returns:
         bool: True if compilation succeeds, False otherwise
     """
-    success = implementation.make_stream_benchmark(CC, CFLAGS, LDFLAGS)
+    success = await _dispatch("make_stream_benchmark", background,
+                              implementation.make_stream_benchmark, CC, CFLAGS, LDFLAGS,
+                              n=n or None, ntimes=ntimes or None,
+                              extra_kernels=extra_kernels or None,
+                              workspace=await _workspace(ctx, workspace))
     return success
 
 @mcp.tool()
-async def test_correctness():
+async def test_correctness(workspace: str = "", background: bool = False,
+                           ctx: Context = None):
     """
     Verify benchmark correctness against reference implementation.
 
+    Rebuilds the current configuration (same compiler, flags and custom
+    kernels) with a small odd-sized array whose last elements must stay
+    untouched, runs it in milliseconds, and compares the checksum and sampled
+    array values with an independent model of copy/scale/add/triad. This
+    catches remainder-loop bugs and out-of-bounds writes in unrolled kernels.
+
+    Args:
+        workspace (str): Work directory to use. Defaults to one private to this
+            MCP session; pass the same name from several calls or sessions to share it
+        background (bool): If True, return {"job_id": ...} immediately and fetch
+            the outcome later with job_status/job_result
+
     Returns:
-        str: JSON with correctness result {"correctness": "PASS"} or {"correctness": "FAIL"}
+        str: JSON with correctness result {"correctness": "PASS" or "FAIL", "n": ..., "errors": [...]}
     """
-    success = implementation.test_correctness()
+    success = await _dispatch("test_correctness", background,
+                              implementation.test_correctness,
+                              workspace=await _workspace(ctx, workspace))
     return success
 
 @mcp.tool()
-async def make_clean():
+async def make_clean(workspace: str = "", ctx: Context = None):
     """
     Clean up compiled artifacts and temporary files.
 
     This removes the compiled benchmark executable and any object files
     created during compilation, allowing for a fresh build.
 
+    Args:
+        workspace (str): Work directory to use. Defaults to one private to this
+            MCP session; pass the same name from several calls or sessions to share it
+
     Returns:
         str: Success message indicating cleanup completion
 
@@ -59,20 +209,195 @@ async def make_clean():
         Call this before trying a new set of compiler flags to ensure
         a clean compilation environment
     """
-    success = implementation.make_clean()
+    success = await _dispatch("make_clean", False, implementation.make_clean,
+                              workspace=await _workspace(ctx, workspace))
     return success
 
 @mcp.tool()
-async def test_speed():
+async def test_speed(repeats: int = 1,
+                     warmup_runs: int = 0,
+                     warmup_iterations: int = 1,
+                     adaptive: bool = False,
+                     target_rel_ci: float = 0.01,
+                     max_repeats: int = 20,
+                     abort_below: float = 0,
+                     abort_kernels: list[str] = None,
+                     time_budget: float = 0,
+                     env: dict[str, str] = None,
+                     cpus: str = "",
+                     sweep: bool = False,
+                     points_per_octave: int = 2,
+                     perf: bool = False,
+                     workspace: str = "", background: bool = False,
+                     ctx: Context = None):
     """
     Measure memory bandwidth.
 
+    The benchmark times every iteration of each kernel separately. The first
+    warmup_iterations of each run are discarded as cold, and the remaining
+    samples from all runs are pooled into per-kernel statistics. Use repeats
+    or adaptive mode to tell real improvements from noise: two configurations
+    whose confidence intervals overlap are not meaningfully different.
+
+    Each successful run is recorded in the experiment database together with
+    the flags and kernel code of the build (see best_result, top_configs).
+
+    Every timed iteration is sent as an MCP progress notification while the
+    run is in progress (unless background). A run that cannot win can be cut
+    short: with abort_below, it is killed once a kernel's fastest iteration
+    (after 3 measured ones) is below that fraction of the best bandwidth
+    recorded for the kernel at this problem size; time_budget caps the whole
+    call. Aborted results carry "aborted" with the reason and are not recorded.
+
+    Args:
+        repeats (int): Number of measured runs of the binary
+        warmup_runs (int): Additional runs executed first and discarded
+        warmup_iterations (int): Iterations discarded at the start of every run
+        adaptive (bool): If True, keep repeating beyond repeats until every
+            kernel's 95% confidence interval is within target_rel_ci of its mean
+        target_rel_ci (float): Relative CI half-width at which adaptive mode stops (0.01 = 1%)
+        max_repeats (int): Upper bound on measured runs in adaptive mode
+        abort_below (float): Abort threshold as a fraction of the best known result,
+            e.g. 0.9 kills runs that cannot reach 90% of it (0 = never abort)
+        abort_kernels (list[str]): Kernels the threshold applies to (default: all)
+        time_budget (float): Wall-clock limit for the whole measurement in seconds (0 = none)
+        env (dict[str, str]): Extra environment variables for the runs, e.g.
+            {"OMP_NUM_THREADS": "8", "OMP_PROC_BIND": "spread", "OMP_PLACES": "cores"}
+        cpus (str): CPU list to pin the runs to with taskset, e.g. "0-7" or "0,2,4,6"
+        sweep (bool): If True, map bandwidth across the cache hierarchy instead:
+            run copy/scale/add/triad over a geometric range of array sizes, from a
+            quarter of the L1 data cache up to the built array size, repeating each
+            kernel per sample so even L1-sized runs last a millisecond. Returns
+            {"cache_levels": [{"level", "bytes"}],
+             "curves": {kernel: [{"n", "working_set_bytes", "resident", "GB_s", "ci95", "reps"}]},
+             "plateaus": {kernel: {"L1" | "L2" | ... | "DRAM": median GB/s}}}
+            where resident is the smallest cache holding all three arrays (cache
+            sizes summed over instances for OpenMP builds). Sweeps are not recorded.
+        points_per_octave (int): Sizes per doubling of the working set in a sweep
+        perf (bool): If True, also collect perf stat counters (cycles, instructions,
+            cache misses, CPU migrations, ...) when perf works on this host
+        workspace (str): Work directory to use. Defaults to one private to this
+            MCP session; pass the same name from several calls or sessions to share it
+        background (bool): If True, return {"job_id": ...} immediately and fetch
+            the outcome later with job_status/job_result
+
+    Returns:
+        str: JSON with the mean bandwidth in GB/s for each kernel plus statistics:
+            {"copy_GB_s": ..., "scale_GB_s": ..., "add_GB_s": ..., "triad_GB_s": ...,
+             "checksum": ..., "runs": ...,
+             "stats": {"triad": {"n", "min", "median", "max", "mean", "stddev",
+                                 "ci95_low", "ci95_high", "rel_ci95"}, ...},
+             "percent_of_peak": {"triad": ..., ...}}
+            plus "aborted": reason if the run was cut short. percent_of_peak
+            (present once the host is calibrated, see calibrate) compares each
+            mean to the host's attainable bandwidth; far above 100 means the
+            arrays fit in cache. Runs with env or cpus carry them in "run_env",
+            which is also recorded with the run.
+            "run_stats" has one entry per execution of the binary (warm-up runs
+            included) with OS-level statistics: {"run", "warmup",
+            "rusage": {"wall_seconds", "user_seconds", "system_seconds",
+                       "max_rss_bytes", "major_faults", "minor_faults",
+                       "voluntary_switches", "involuntary_switches"},
+            "system_before"/"system_after": {"loadavg", "mem_available_bytes",
+                                             "mem_free_bytes", "swap_free_bytes"},
+            "swap_in_pages", "swap_out_pages", "perf": {event: count, "ipc"},
+            "diagnostics": ["...involuntary context switches...", ...]}.
+            A slow result with major faults, swapping, preemption or CPU
+            migrations listed in diagnostics was disturbed by the OS, not the code.
+    """
+    if sweep:
+        return await _dispatch("test_speed", background, implementation.working_set_sweep,
+                               workspace=await _workspace(ctx, workspace),
+                               points_per_octave=points_per_octave,
+                               env=env or None,
+                               cpus=cpus or None,
+                               perf=perf)
+    result = await _dispatch("test_speed", background, implementation.test_speed,
+                             workspace=await _workspace(ctx, workspace),
+                             repeats=repeats,
+                             warmup_runs=warmup_runs,
+                             warmup_iterations=warmup_iterations,
+                             adaptive=adaptive,
+                             target_rel_ci=target_rel_ci,
+                             max_repeats=max_repeats,
+                             abort_below=abort_below or None,
+                             abort_kernels=abort_kernels or None,
+                             time_budget=time_budget or None,
+                             env=env or None,
+                             cpus=cpus or None,
+                             perf=perf,
+                             progress=_progress(ctx, background))
+    return result
+
+@mcp.tool()
+async def test_speed_resident(CC: str, CFLAGS: str, LDFLAGS: str,
+                              copy_code: str = "",
+                              scale_code: str = "",
+                              add_code: str = "",
+                              triad_code: str = "",
+                              n: int = 0,
+                              ntimes: int = 0,
+                              repeats: int = 1,
+                              warmup_iterations: int = 1,
+                              workspace: str = "", background: bool = False,
+                              ctx: Context = None):
+    """
+    Build and measure kernels in one step using a long-lived resident harness.
+
+    The harness keeps the arrays allocated and paged in between calls; each
+    candidate is compiled into a shared object and loaded into it, so an
+    evaluation costs only the kernel compile and the timed iterations instead
+    of a full build and the allocation and first touch of the arrays. Use it for fast
+    iteration on kernels and flags, then confirm the winner with
+    make_custom_benchmark + test_speed. Custom allocation code is not supported
+    in this mode (the harness owns the arrays). The harness is restarted when n
+    changes or a loaded kernel crashes.
+
+    Args:
+        CC (str): C compiler (e.g., "gcc", "clang")
+        CFLAGS (str): Compiler flags for the kernels (-shared -fPIC are added)
+        LDFLAGS (str): Linker flags (e.g., "-lm")
+        copy_code (str): Custom copy kernel implementation (optional, same signature as make_custom_benchmark)
+        scale_code (str): Custom scale kernel implementation (optional)
+        add_code (str): Custom add kernel implementation (optional)
+        triad_code (str): Custom triad kernel implementation (optional)
+        n (int): Array length (default: sized to the host, see list_cpu_info)
+        ntimes (int): Timed iterations of each kernel per run, at least 2 (default: 20)
+        repeats (int): Number of measured runs
+        warmup_iterations (int): Iterations discarded at the start of every run
+        workspace (str): Work directory to use. Defaults to one private to this
+            MCP session; pass the same name from several calls or sessions to share it
+        background (bool): If True, return {"job_id": ...} immediately and fetch
+            the outcome later with job_status/job_result
+
     Returns:
-        str: JSON with bandwidth in GB/s for each kernel: {"copy_GB_s": ..., "scale_GB_s": ..., "add_GB_s": ..., "triad_GB_s": ...}
+        str: JSON in the same format as test_speed plus "mode": "resident",
+            or an error message
     """
-    result = implementation.test_speed()
+    result = await _dispatch("test_speed_resident", background, resident.test_speed_resident,
+                             CC, CFLAGS, LDFLAGS,
+                             copy_code or None,
+                             scale_code or None,
+                             add_code or None,
+                             triad_code or None,
+                             n=n or None,
+                             ntimes=ntimes or None,
+                             repeats=repeats,
+                             warmup_iterations=warmup_iterations,
+                             workspace=await _workspace(ctx, workspace))
     return result
 
+@mcp.tool()
+async def stop_resident_harness():
+    """
+    Stop the resident harness used by test_speed_resident and free its arrays.
+    It is started again on the next test_speed_resident call.
+
+    Returns:
+        bool: True if a harness was running
+    """
+    return await _dispatch("stop_resident_harness", False, resident.stop_harness)
+
 @mcp.tool()
 async def get_source_code():
     """
@@ -87,16 +412,60 @@ async def get_source_code():
     result = implementation.get_source_code()
     return result
 
+@mcp.tool()
+async def list_kernels():
+    """
+    List the registered benchmark kernels.
+
+    copy, scale, add and triad are always built. The optional kernels (reductions,
+    strided and gather/scatter access, stencils, fills) are compiled and timed
+    when named in extra_kernels or given code through kernel_code; each starts
+    from arrays reset to a = 1, b = 2, c = 0 and is checked by test_correctness
+    against its own reference model. Results appear as "<name>_GB_s" in
+    test_speed and can be ranked on like the STREAM kernels.
+
+    Returns:
+        list: One entry per kernel with {"name", "description", "signature",
+            "default_code", "bytes_moved", "optional"}
+    """
+    return kernels.list_kernels()
+
+@mcp.tool()
+async def list_allocators():
+    """
+    List the built-in allocation strategies accepted by make_custom_benchmark's
+    allocation argument (and as "allocation" in sweep candidates and autotune spaces).
+
+    Returns:
+        list: [{"name", "description"}, ...]
+    """
+    return allocators.list_allocators()
+
 @mcp.tool()
 async def make_custom_benchmark(CC: str, CFLAGS: str, LDFLAGS: str,
                                 allocation_code: str = "",
                                 copy_code: str = "",
                                 scale_code: str = "",
                                 add_code: str = "",
-                                triad_code: str = ""):
+                                triad_code: str = "",
+                                n: int = 0,
+                                ntimes: int = 0,
+                                kernel_cflags: dict[str, str] = None,
+                                kernel_code: dict[str, str] = None,
+                                extra_kernels: list[str] = None,
+                                allocation: str = "",
+                                workspace: str = "",
+                                background: bool = False,
+                                ctx: Context = None):
     """
     Compile STREAM benchmark with custom kernel implementations.
 
+    The harness and each kernel region are compiled as separate objects that
+    are cached by their own source and flags, so changing one kernel only
+    recompiles that kernel before the link. Since kernels are no longer in the
+    same translation unit as main(), add -flto to CFLAGS and LDFLAGS if you
+    want cross-unit inlining.
+
     Allows you to provide optimized implementations for any of the kernels or allocation.
     Use get_source_code() first to see the default implementations and required function signatures.
 
@@ -140,6 +509,24 @@ async def make_custom_benchmark(CC: str, CFLAGS: str, LDFLAGS: str,
         scale_code (str): Custom scale kernel implementation (optional)
         add_code (str): Custom add kernel implementation (optional)
         triad_code (str): Custom triad kernel implementation (optional)
+        n (int): Array length (default: sized to the host, see list_cpu_info's problem_size).
+            Smaller values give cheap low-fidelity builds for screening.
+        ntimes (int): Timed repetitions of each kernel (default: 20)
+        kernel_cflags (dict[str, str]): Extra flags for individual units, appended
+            to CFLAGS when compiling that unit only. Keys: "harness", "allocation",
+            "copy", "scale", "add", "triad" (or an optional kernel), e.g. {"triad": "-funroll-loops"}
+        kernel_code (dict[str, str]): Custom code for any registered kernel by name,
+            e.g. {"dot": "double dot_kernel(...) {...}"}; see list_kernels for the
+            signatures. Giving code for an optional kernel also builds it.
+        extra_kernels (list[str]): Optional registered kernels to build with their
+            default code (see list_kernels)
+        allocation (str): Built-in allocation strategy used instead of allocation_code:
+            "aligned", "thp", "hugetlbfs", "numa_interleave" or "first_touch_parallel"
+            (see list_allocators)
+        workspace (str): Work directory to use. Defaults to one private to this
+            MCP session; pass the same name from several calls or sessions to share it
+        background (bool): If True, return {"job_id": ...} immediately and fetch
+            the outcome later with job_status/job_result
 
     Returns:
         bool or str: True if compilation succeeds, error message otherwise
@@ -159,37 +546,671 @@ async def make_custom_benchmark(CC: str, CFLAGS: str, LDFLAGS: str,
 }'''
         )
     """
-    result = implementation.make_custom_benchmark(
+    result = await _dispatch(
+        "make_custom_benchmark", background,
+        implementation.make_custom_benchmark,
         CC, CFLAGS, LDFLAGS,
         allocation_code if allocation_code else None,
         copy_code if copy_code else None,
         scale_code if scale_code else None,
         add_code if add_code else None,
-        triad_code if triad_code else None
+        triad_code if triad_code else None,
+        n=n or None,
+        ntimes=ntimes or None,
+        kernel_cflags=kernel_cflags or None,
+        kernel_code=kernel_code or None,
+        extra_kernels=extra_kernels or None,
+        allocation=allocation or None,
+        workspace=await _workspace(ctx, workspace)
     )
     return result
 
 
+@mcp.tool()
+async def codegen_report(kernels: list[str] = None, disassembly: bool = True,
+                         workspace: str = "", background: bool = False, ctx: Context = None):
+    """
+    Show what the compiler made of each kernel in the last build: whether its
+    loop was vectorized and at what width, how many instructions it spends
+    per element, and whether it uses non-temporal (streaming) stores or
+    software prefetches.
+
+    Args:
+        kernels (list[str]): Kernels to report (default: all in the last build)
+        disassembly (bool): Include the hot loop's instructions
+        workspace (str): Work directory to use. Defaults to this session's workspace.
+        background (bool): If True, return {"job_id": ...} immediately and fetch
+            the outcome later with job_status/job_result
+
+    Returns:
+        dict: {"CC", "CFLAGS", "kernel_cflags", "kernels": {name: {
+            "remarks": {"optimized": [...], "missed": [...]} - the compiler's
+                vectorization remarks (gcc -fopt-info-vec, clang -Rpass), as
+                "line:column: text" with lines counted within the kernel's code,
+            "codegen": {"instructions", "loops", "streaming_stores" (bool),
+                "prefetches" (bool), "hot_loop": {"instructions", "vector_bits",
+                "elements_per_iteration", "instructions_per_element",
+                "bytes_loaded_per_iteration", "bytes_stored_per_iteration",
+                "streaming_stores", "prefetches", "start", "disassembly"},
+                "other_loops": [...]}}}}
+            The hot loop is the innermost loop with the widest vectors; element
+            counts assume arrays of doubles.
+    """
+    result = await _dispatch("codegen_report", background, codegen.codegen_report,
+                             kernels or None, disassembly, workspace=await _workspace(ctx, workspace))
+    return result
+
+@mcp.tool()
+async def calibrate(force: bool = False, n: int = 0, ntimes: int = 0, repeats: int = 3,
+                    background: bool = True):
+    """
+    Measure the memory bandwidth this host can attain, to judge results against.
+
+    Builds reference STREAM kernels (OpenMP on all cores with pinned threads,
+    parallel first touch, and on x86 non-temporal stores) and keeps each
+    kernel's best mean as the host's peak. Done once per host: later calls
+    return the stored calibration unless force is set. Afterwards test_speed
+    reports "percent_of_peak" and list_cpu_info includes the calibration.
+
+    Args:
+        force (bool): Measure again even if the host is already calibrated
+        n (int): Array length (default: the benchmark's default size; keep it
+            well beyond the last-level cache)
+        ntimes (int): Timed repetitions of each kernel (default: 20)
+        repeats (int): Runs per reference build and thread placement
+        background (bool): If True (default), return {"job_id": ...} immediately
+
+    Returns:
+        dict: {"timestamp", "host", "peak_GB_s": {"copy", "scale", "add", "triad"},
+            "best": {kernel: {"variant", "CFLAGS", "env"}}, "trials": [...], "n", "ntimes", "CC"}
+    """
+    result = await _dispatch("calibrate", background, calibration.calibrate,
+                             force, n or None, ntimes or None, repeats)
+    return result
+
+@mcp.tool()
+async def thread_scaling(thread_counts: list[int] = None,
+                         policies: list[str] = None,
+                         repeats: int = 1,
+                         workspace: str = "", background: bool = True,
+                         ctx: Context = None):
+    """
+    Measure how the current OpenMP build scales with threads and their placement.
+
+    Runs the binary built in the workspace (it must be built with -fopenmp)
+    at each thread count under each placement policy:
+    "spread" (OMP_PROC_BIND=spread, OMP_PLACES=cores), "close"
+    (OMP_PROC_BIND=close, OMP_PLACES=cores), "numa_round_robin" (taskset to
+    CPUs dealt round-robin over the NUMA nodes, one per physical core before
+    SMT siblings) and "unbound" (OMP_PROC_BIND=false). Every run is recorded
+    with its environment (see test_speed's run_env). Rebuilding the workspace
+    while the sweep runs makes it fail rather than mix two binaries.
+
+    Args:
+        thread_counts (list[int]): Thread counts to run (default: powers of two,
+            multiples of the cores per NUMA node, all cores and all usable CPUs)
+        policies (list[str]): Placement policies to compare (default: all)
+        repeats (int): Runs per thread count and policy
+        workspace (str): Work directory holding the build
+        background (bool): If True (default), return {"job_id": ...} immediately
+
+    Returns:
+        dict: {"thread_counts": [...],
+               "curves": {kernel: {policy: [{"threads", "GB_s", "ci95"}, ...]}},
+               "saturation": {kernel: {policy: threads}},
+               "best": {kernel: {"policy", "threads", "GB_s", "env", "taskset"}},
+               "errors": [...]}
+            where saturation is the fewest threads reaching 95% of the policy's
+            best bandwidth: adding threads beyond it buys little.
+    """
+    result = await _dispatch("thread_scaling", background, scaling.thread_scaling,
+                             thread_counts or None, policies or None, repeats,
+                             workspace=await _workspace(ctx, workspace))
+    return result
+
 @mcp.tool()
 async def list_cpu_info():
     """
-    Retrieve basic CPU and operating system information from the current machine.
+    Retrieve CPU, memory and operating system information from the current machine.
+
+    Use it to pick vector widths, thread counts and array sizes that fit the
+    host (e.g. SVE-512 and 4 NUMA nodes of 12 cores on A64FX).
 
     Returns:
-        dict: A JSON-serializable dictionary containing:
-            - architecture (str): CPU architecture reported by the system.
-            - processor (str): Processor model name or identifier.
-            - system (str): Operating system type (e.g., Windows, Linux, Darwin).
-            - release (str): OS kernel release version.
-            - version (str): Full OS version string.
-            - machine (str): Machine hardware type.
-            - cores_logical (int): Number of logical CPU cores (includes hyperthreading).
+        str: JSON object containing:
+            - architecture, processor, system, release, version, machine (str):
+              Platform strings as reported by Python's platform module.
+            - cores_logical (int): Number of logical CPUs (includes SMT threads).
+            - cpus_usable (int): Logical CPUs this process may run on (affinity mask).
+            - model_name (str): CPU model from /proc/cpuinfo.
+            - sockets, cores_physical, threads_per_core (int): Core/SMT layout.
+            - simd: {"extensions": e.g. ["avx512f", "avx2", ...] or ["sve", "asimd"],
+              "vector_bits": widest vector register in bits}.
+            - caches: [{"level", "type", "size_bytes", "line_bytes",
+              "cpus_per_instance", "instances"}, ...] from L1 to LLC.
+            - numa_nodes: [{"node", "cpus", "memory_total_bytes"}, ...].
+            - memory: {"total_bytes", "available_bytes"} (read on every call).
+            - calibration: the host's measured peak bandwidth (see calibrate), or null.
+            - problem_size: {"n", "ntimes", "source_n", "array_bytes", "llc_bytes",
+              "memory_available_bytes", "reason"}: the default array length, chosen
+              so each array is at least 4x the last-level cache and the three
+              arrays take at most half of the available (cgroup-limited) memory.
 
-    This tool takes no input parameters.
+    The static parts are discovered once and cached. This tool takes no input parameters.
     """
     cpu_info = implementation.list_cpu_info()
     return cpu_info
 
+@mcp.tool()
+async def list_compilers(background: bool = False):
+    """
+    Discover the C compilers installed on the server (gcc, clang, fcc, icx, ...,
+    including versioned names such as gcc-13).
+
+    Args:
+        background (bool): If True, return {"job_id": ...} immediately and fetch
+            the outcome later with job_status/job_result
+
+    Returns:
+        list: One entry per distinct compiler executable: {"CC": name to pass as CC,
+            "aliases": other names on PATH for the same executable, "path",
+            "version": first line of --version, "target": target triple
+            (e.g. "aarch64-linux-gnu"), "identity": hash keying cached flag probes}
+    """
+    return await _dispatch("list_compilers", background, compilers.list_compilers)
+
+@mcp.tool()
+async def check_flags(CC: str = "gcc", CFLAGS: str = "", LDFLAGS: str = "", background: bool = False):
+    """
+    Check which flags a compiler accepts before spending a build on them.
+
+    Each flag is tried alone on a tiny program (compile and link); results are
+    cached per compiler version, so repeated checks are free. Builds run the
+    same check and fail fast, naming the rejected flags.
+
+    Args:
+        CC (str): C compiler
+        CFLAGS (str): Compiler flags to check, e.g. "-O3 -mavx512f -fopenmp"
+        LDFLAGS (str): Linker flags, checked together
+        background (bool): If True, return {"job_id": ...} immediately and fetch
+            the outcome later with job_status/job_result
+
+    Returns:
+        dict: {"CC", "identity", "ok": False if any flag is unsupported,
+            "flags": [{"flag", "status", "message"}]} where status is "ok",
+            "warning" (accepted but diagnosed, typically ignored, e.g. clang's
+            "optimization flag ... is not supported") or "unsupported"
+    """
+    return await _dispatch("check_flags", background, compilers.check_flags, CC, CFLAGS, LDFLAGS)
+
+@mcp.tool()
+async def sweep_build_configs(candidates: list[dict], rank_by: str = "triad",
+                              max_parallel_builds: int = 0,
+                              n: int = 0, ntimes: int = 0,
+                              abort_below: float = 0,
+                              workspace: str = "", background: bool = False,
+                              ctx: Context = None):
+    """
+    Build and measure many configurations in one call.
+
+    All candidates are compiled concurrently (each in its own scratch work
+    directory), then timed one at a time so runs don't disturb each other's
+    bandwidth. Every measurement is recorded in the experiment database.
+
+    Args:
+        candidates (list[dict]): Configurations to try. Each dict takes the
+            arguments of make_custom_benchmark: "CC" (default "gcc"), "CFLAGS",
+            "LDFLAGS" and optionally "allocation_code", "copy_code",
+            "scale_code", "add_code", "triad_code", "kernel_cflags", "extra_kernels"
+            and "allocation"; code for an optional kernel is passed as "<name>_code".
+        rank_by (str): Kernel whose bandwidth orders the table ("copy", "scale", "add", "triad")
+        max_parallel_builds (int): Concurrent compiles (default: CPU count)
+        n (int): Array length for every candidate (default: sized to the host, see list_cpu_info's problem_size).
+            Smaller values give cheap low-fidelity builds for screening.
+        ntimes (int): Timed repetitions of each kernel (default: 20)
+        abort_below (float): Kill a candidate's run once its rank_by kernel cannot
+            reach this fraction of the best known result (0 = measure everything)
+        workspace (str): Prefix for the scratch work directories. Defaults to this session's workspace.
+        background (bool): If True, return {"job_id": ...} immediately and fetch
+            the outcome later with job_status/job_result
+
+    Returns:
+        list: One row per candidate, best first: {"rank", "index", "CC", "CFLAGS",
+            "LDFLAGS", "kernels", "status", "copy_GB_s", "scale_GB_s", "add_GB_s",
+            "triad_GB_s", "checksum"}. status is "ok", "build_failed", "run_failed"
+            or "aborted" (with "error" holding the message or abort reason).
+
+    Example:
+        sweep_build_configs(candidates=[
+            {"CFLAGS": "-O2"},
+            {"CFLAGS": "-O3 -march=native"},
+            {"CFLAGS": "-O3 -march=native -fopenmp", "LDFLAGS": "-fopenmp"},
+        ])
+    """
+    result = await _dispatch("sweep_build_configs", background,
+                             implementation.sweep_build_configs,
+                             candidates, rank_by, max_parallel_builds or None,
+                             n=n or None, ntimes=ntimes or None,
+                             abort_below=abort_below or None,
+                             workspace=await _workspace(ctx, workspace))
+    return result
+
+@mcp.tool()
+async def screen_configs(candidates: list[dict], rank_by: str = "triad",
+                         min_n: int = 10000000, eta: int = 3,
+                         screening_ntimes: int = 5,
+                         max_parallel_builds: int = 0,
+                         workspace: str = "", background: bool = False,
+                         ctx: Context = None):
+    """
+    Find the best of many configurations with successive halving.
+
+    All candidates are first built and timed with a small array (min_n) and
+    few repetitions. Only the best 1/eta advance to the next rung, which uses
+    an eta times larger array, until the survivors are measured at the full
+    default size. Far cheaper than sweep_build_configs for large candidate lists.
+
+    Args:
+        candidates (list[dict]): Same format as sweep_build_configs
+        rank_by (str): Kernel whose bandwidth decides promotion
+        min_n (int): Array length of the first rung. Keep it well above the
+            last-level cache so screening still measures memory bandwidth.
+        eta (int): Reduction factor per rung (keep the top 1/eta, grow N by eta)
+        screening_ntimes (int): Repetitions used on the reduced-size rungs
+        max_parallel_builds (int): Concurrent compiles (default: CPU count)
+        workspace (str): Prefix for the scratch work directories. Defaults to this session's workspace.
+        background (bool): If True, return {"job_id": ...} immediately and fetch
+            the outcome later with job_status/job_result
+
+    Returns:
+        dict: {"best": row of the winner at full size (see sweep_build_configs) or None,
+            "ranking": full-size rows, best first,
+            "rungs": [{"n", "ntimes", "evaluated", "results"}, ...]}
+    """
+    result = await _dispatch("screen_configs", background,
+                             implementation.successive_halving,
+                             candidates, rank_by, min_n, eta, screening_ntimes,
+                             max_parallel_builds or None,
+                             workspace=await _workspace(ctx, workspace))
+    return result
+
+@mcp.tool()
+async def autotune(search_space: dict[str, list[str]] = None,
+                   budget: int = 30,
+                   population: int = 8,
+                   rank_by: str = "triad",
+                   CC: str = "gcc",
+                   LDFLAGS: str = "",
+                   base_cflags: str = "",
+                   allocation_code: str = "",
+                   copy_code: str = "",
+                   scale_code: str = "",
+                   add_code: str = "",
+                   triad_code: str = "",
+                   n: int = 0,
+                   ntimes: int = 0,
+                   reuse_measurements: bool = True,
+                   seed: int = None,
+                   abort_below: float = 0,
+                   stop_at_peak: float = 0,
+                   workspace: str = "", background: bool = True,
+                   ctx: Context = None):
+    """
+    Search the compiler flag space on the server with a genetic algorithm and
+    return the best configuration found, without a model round trip per probe.
+
+    Each generation is compiled in parallel and timed one candidate at a time.
+    Configurations already measured at full size (in the experiment database)
+    are reused rather than re-run. Runs in the background by default; poll
+    with job_status and fetch the outcome with job_result.
+
+    Args:
+        search_space (dict[str, list[str]]): Dimensions to search, each a list of
+            mutually exclusive flag choices ("" = leave out), e.g.
+            {"opt": ["-O2", "-O3"], "unroll": ["", "-funroll-loops"]}.
+            A dimension named "<unit>:<name>" applies only to that unit (see
+            kernel_cflags of make_custom_benchmark), e.g.
+            {"triad:unroll": ["", "-funroll-loops"]} tunes triad's flags alone.
+            A dimension named "allocation" picks a built-in allocation strategy,
+            e.g. {"allocation": ["", "thp", "numa_interleave"]}.
+            Default: optimization level, -march/-mcpu/-mtune=native, unrolling,
+            vectorization, -fprefetch-loop-arrays and OpenMP/auto-parallelization.
+        budget (int): Maximum number of configurations evaluated
+        population (int): Configurations per generation
+        rank_by (str): Kernel whose bandwidth is maximized
+        CC (str): C compiler
+        LDFLAGS (str): Linker flags used for every candidate
+        base_cflags (str): Flags prepended to every candidate's CFLAGS
+        allocation_code, copy_code, scale_code, add_code, triad_code (str):
+            Optional custom kernels (as for make_custom_benchmark) kept fixed while flags are tuned
+        n (int): Array length override (0 = default size)
+        ntimes (int): Repetition override (0 = default)
+        reuse_measurements (bool): Reuse earlier full-size results from the experiment database
+        seed (int): Random seed for a reproducible search
+        abort_below (float): Kill runs that cannot reach this fraction of the best
+            known rank_by result (0 = measure every candidate fully)
+        stop_at_peak (float): End the search once a configuration reaches this
+            fraction of the calibrated rank_by peak, e.g. 0.95 (0 = use the whole budget)
+        workspace (str): Prefix for the scratch work directories. Defaults to this session's workspace.
+        background (bool): If True (default), return {"job_id": ...} immediately
+
+    Returns:
+        dict: {"best": {"CC", "CFLAGS", "LDFLAGS", "status", "<kernel>_GB_s", ...},
+            "evaluations", "generations": [{"generation", "evaluated", "best"}],
+            "top": up to 10 best configurations, "dropped_flags": choices removed
+            from the space because the compiler rejects them, "stopped": why the
+            search ended early (stop_at_peak), or null}
+    """
+    kernels = {
+        'allocation': allocation_code,
+        'copy': copy_code,
+        'scale': scale_code,
+        'add': add_code,
+        'triad': triad_code,
+    }
+    result = await _dispatch("autotune", background, autotune_search.autotune,
+                             search_space, budget, population, rank_by, CC, LDFLAGS,
+                             base_cflags, kernels, n or None, ntimes or None,
+                             reuse_measurements, seed, abort_below or None,
+                             stop_at_peak or None,
+                             workspace=await _workspace(ctx, workspace))
+    return result
+
+@mcp.tool()
+async def register_worker(url: str):
+    """
+    Add a worker server for distributed_sweep. A worker is another instance of
+    this server started with --transport http.
+
+    Args:
+        url (str): Worker address, e.g. "http://node1:8000" ("/mcp" is appended
+            when no path is given)
+
+    Returns:
+        dict: {"url", "host", "healthy", "busy", "evaluated", "last_error", "topology"}
+            where topology is the worker's list_cpu_info
+    """
+    return await _dispatch("register_worker", False, coordinator.register_worker, url)
+
+@mcp.tool()
+async def list_workers(refresh: bool = False):
+    """
+    List the registered worker servers.
+
+    Args:
+        refresh (bool): If True, contact every idle worker again to update its
+            health and topology
+
+    Returns:
+        list: One entry per worker, as returned by register_worker
+    """
+    return await coordinator.list_workers(refresh)
+
+@mcp.tool()
+async def remove_worker(url: str):
+    """
+    Stop sending work to a worker server.
+
+    Args:
+        url (str): Worker address as given to register_worker
+
+    Returns:
+        bool: True if the worker was registered
+    """
+    return coordinator.remove_worker(url)
+
+@mcp.tool()
+async def distributed_sweep(candidates: list[dict], rank_by: str = "triad",
+                            n: int = 0, ntimes: int = 0,
+                            abort_below: float = 0, batch_size: int = 0,
+                            background: bool = False):
+    """
+    Run sweep_build_configs across all registered worker servers.
+
+    Candidates are split into batches handed out from a shared queue, so
+    faster nodes take more of them. Each worker builds its batch concurrently
+    and measures it serially; servers on the same node share a lock, so only
+    one measurement runs per node at a time. A worker that fails is dropped
+    and its batch given to the others. Measurements are recorded in each
+    worker's own experiment database.
+
+    Args:
+        candidates (list[dict]): Configurations, as for sweep_build_configs
+        rank_by (str): Kernel whose bandwidth orders the merged table
+        n (int): Array length for every candidate (default: the workers' default)
+        ntimes (int): Timed repetitions of each kernel (default: 20)
+        abort_below (float): Early-abort fraction passed to each worker (0 = off)
+        batch_size (int): Candidates per batch (default: enough for two batches per worker)
+        background (bool): If True, return {"job_id": ...} immediately and fetch
+            the outcome later with job_status/job_result
+
+    Returns:
+        dict: {"best", "ranking", "hosts", "heterogeneous"}. ranking holds the
+            sweep_build_configs rows of all workers, best first, each with the
+            "worker" URL and "host" that measured it; candidates no worker could
+            evaluate have status "worker_failed". hosts maps each host name to
+            its list_cpu_info; heterogeneous is True if the nodes differ (CPU
+            model or core count), in which case bandwidths are not directly comparable.
+    """
+    result = await _dispatch("distributed_sweep", background, coordinator.distributed_sweep,
+                             candidates, rank_by, n=n or None, ntimes=ntimes or None,
+                             abort_below=abort_below or None, batch_size=batch_size or None)
+    return result
+
+@mcp.tool()
+async def prewarm_status():
+    """
+    Report the startup prewarm (server option --prewarm).
+
+    With --prewarm build or measure, the server sets up a work directory,
+    discovers the host and builds the baseline (gcc -O2 -Wall) in the
+    background right after starting; with measure it also records a baseline
+    measurement. Once the baseline is built, new workspaces start with it, so
+    test_speed works without building first.
+
+    Returns:
+        dict: {"state": "off" | "running" | "done" | "failed",
+               "steps": {"work_dir" | "host" | "build" | "measure": {"state", "seconds", "error"}},
+               "baseline": {"CC", "CFLAGS", "LDFLAGS"}, "baseline_result": {...}, "seconds",
+               "job_id": prewarm job for job_status/job_result}
+    """
+    result = prewarm.status()
+    if _prewarm_job is not None:
+        result['job_id'] = _prewarm_job
+    return result
+
+@mcp.tool()
+async def list_workspaces():
+    """
+    List the per-session work directories currently on disk.
+
+    Returns:
+        list: One entry per workspace with {"workspace", "idle_seconds", "busy", "has_binary"}
+    """
+    return implementation.list_workspaces()
+
+@mcp.tool()
+async def release_workspace(workspace: str = "", ctx: Context = None):
+    """
+    Delete a work directory and everything built in it. Idle workspaces are
+    also removed automatically (see --max-workspaces and --workspace-ttl).
+
+    Args:
+        workspace (str): Workspace to remove. Defaults to this session's own.
+
+    Returns:
+        bool or str: True if removed, error message otherwise
+    """
+    return implementation.release_workspace(await _workspace(ctx, workspace))
+
+@mcp.tool()
+async def best_result(kernel: str = "triad", all_hosts: bool = False, resident: bool = False):
+    """
+    Return the best measurement recorded so far for a kernel. Every test_speed
+    run is stored with its build hash, compiler, flags and kernel sources.
+    Only runs at this host's default problem size are considered.
+
+    Args:
+        kernel (str): "copy", "scale", "add" or "triad"
+        all_hosts (bool): If True, include runs from other machines sharing the database
+        resident (bool): If True, consider test_speed_resident runs instead of test_speed runs
+
+    Returns:
+        dict: {"run_id", "timestamp", "host", "build_hash", "CC", "CFLAGS", "LDFLAGS",
+            "kernels", "checksum", "GB_s": {kernel: bandwidth}}, or an error message
+            if nothing was measured yet
+    """
+    runs = experiments.top_configs(kernel, 1, all_hosts, *implementation.default_problem_size(),
+                                   mode=experiments.RESIDENT_MODE if resident else None)
+    if not runs:
+        return f"No measurements recorded for kernel '{kernel}'."
+    return runs[0]
+
+@mcp.tool()
+async def top_configs(kernel: str = "triad", k: int = 10, all_hosts: bool = False,
+                      include_reduced_size: bool = False, resident: bool = False):
+    """
+    Leaderboard of the best distinct configurations measured for a kernel.
+    Runs of another size than this host's default n and ntimes are left out by default.
+
+    Args:
+        kernel (str): "copy", "scale", "add" or "triad"
+        k (int): Number of configurations to return
+        all_hosts (bool): If True, include runs from other machines sharing the database
+        include_reduced_size (bool): If True, rank runs of every n and ntimes
+        resident (bool): If True, rank test_speed_resident runs instead of test_speed runs
+
+    Returns:
+        list: Up to k run records (see best_result), best first
+    """
+    n, ntimes = (None, None) if include_reduced_size else implementation.default_problem_size()
+    return experiments.top_configs(kernel, k, all_hosts, n, ntimes,
+                                   experiments.RESIDENT_MODE if resident else None)
+
+@mcp.tool()
+async def lookup_config(CC: str, CFLAGS: str, LDFLAGS: str,
+                        allocation_code: str = "",
+                        copy_code: str = "",
+                        scale_code: str = "",
+                        add_code: str = "",
+                        triad_code: str = "",
+                        n: int = 0, ntimes: int = 0,
+                        kernel_cflags: dict[str, str] = None,
+                        kernel_code: dict[str, str] = None,
+                        all_hosts: bool = False, resident: bool = False,
+                        custom: bool = False):
+    """
+    Check whether a configuration was already measured, to avoid re-running it.
+    Takes the same arguments as make_custom_benchmark (leave the kernel codes
+    empty for make_stream_benchmark builds).
+
+    Args:
+        CC (str): C compiler
+        CFLAGS (str): Compiler flags
+        LDFLAGS (str): Linker flags
+        allocation_code, copy_code, scale_code, add_code, triad_code (str):
+            Custom kernel implementations, as passed when building
+        n, ntimes (int): Problem size overrides, as passed when building (0 = default)
+        kernel_cflags (dict[str, str]): Per-unit flags, as passed when building
+        kernel_code (dict[str, str]): Code for other registered kernels, as passed when building
+        all_hosts (bool): If True, include runs from other machines sharing the database
+        resident (bool): If True, look for test_speed_resident runs instead of test_speed runs
+        custom (bool): If True, look for make_custom_benchmark builds, which compile the kernels
+            as separate units; implied by kernel code or kernel_cflags
+
+    Returns:
+        dict: {"measured": bool, "runs": [run records, newest first]}
+    """
+    kernels = dict(kernel_code or {})
+    kernels.update({k: v for k, v in {
+        'allocation': allocation_code,
+        'copy': copy_code,
+        'scale': scale_code,
+        'add': add_code,
+        'triad': triad_code,
+    }.items() if v})
+    units = not resident and (custom or kernels or any((kernel_cflags or {}).values()))
+    runs = experiments.find_runs(CC, CFLAGS, LDFLAGS, kernels, all_hosts,
+                                 *implementation.effective_problem_size(n, ntimes), kernel_cflags,
+                                 mode=experiments.RESIDENT_MODE if resident else None,
+                                 build_mode=experiments.UNITS_BUILD if units else None)
+    return {"measured": bool(runs), "runs": runs}
+
+@mcp.tool()
+async def build_cache_info(clear: bool = False):
+    """
+    Report build cache statistics. Builds with a previously seen compiler,
+    CFLAGS, LDFLAGS and final source are restored from the cache instead of
+    recompiled.
+
+    Args:
+        clear (bool): If True, empty the cache before reporting
+
+    Returns:
+        dict: {"cache_dir", "entries", "size_bytes", "max_bytes", "hits",
+            "misses", "stores", "evictions"}
+    """
+    if clear:
+        buildcache.clear()
+    return buildcache.stats()
+
+@mcp.tool()
+async def job_status(job_id: str = ""):
+    """
+    Report the state of a background job, or of all known jobs.
+
+    Args:
+        job_id (str): Job ID returned by a tool called with background=True.
+            Leave empty to list every queued, running and recently finished job.
+
+    Returns:
+        dict: {"job_id", "kind", "state", "queued_seconds", "run_seconds", "error"}
+            where state is one of "queued", "running", "done", "failed", "cancelled".
+            With no job_id, {"jobs": [...]} with one such entry per job.
+    """
+    if not job_id:
+        return {"jobs": scheduler.list_jobs()}
+    status = scheduler.status(job_id)
+    if status is None:
+        return f"Error: Unknown job ID '{job_id}'."
+    return status
+
+@mcp.tool()
+async def job_result(job_id: str, wait: bool = False):
+    """
+    Fetch the result of a background job.
+
+    Args:
+        job_id (str): Job ID returned by a tool called with background=True
+        wait (bool): If True, block until the job finishes instead of
+            returning its current status
+
+    Returns:
+        The value the original tool would have returned once the job is done;
+        otherwise the job status (see job_status).
+    """
+    if scheduler.status(job_id) is None:
+        return f"Error: Unknown job ID '{job_id}'."
+    if wait:
+        return await scheduler.wait(job_id)
+    return scheduler.result(job_id)
+
+@mcp.tool()
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued or running background job. A running compile or benchmark
+    process is killed.
+
+    Args:
+        job_id (str): Job ID returned by a tool called with background=True
+
+    Returns:
+        bool: True if the job was cancelled, False if it had already finished
+    """
+    if scheduler.status(job_id) is None:
+        return f"Error: Unknown job ID '{job_id}'."
+    return scheduler.cancel(job_id)
+
 if __name__ == "__main__":
     if args.transport == "http":
         print(f"Starting MCP server on http://{args.host}:{args.port}")
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Load and latency benchmark for the MCP server over streamable HTTP.
+
+Many simulated clients, each with its own MCP session (and so its own
+workspace), call a weighted mix of cheap tools, compiles and timed runs at
+the same time. Reports per-tool latency percentiles, throughput and the time
+build/run jobs spent queued in the server's job scheduler, and appends the
+results to a JSON lines file, comparing them with the previous run of the
+same configuration to catch regressions.
+
+Usage:
+    python3 utils/load_test.py --start --stub                 # Start a local server, quick run
+    python3 utils/load_test.py http://host:8000 --clients 16  # Load an existing server
+    python3 utils/load_test.py --start --stub --mix cheap=1   # Only cheap calls
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Inexpensive tools that never build or run anything
+CHEAP_TOOLS = [
+    ("list_cpu_info", {}),
+    ("list_kernels", {}),
+    ("get_source_code", {}),
+    ("best_result", {}),
+    ("job_status", {}),
+]
+
+# Flag sets rotated through by the compile workload
+COMPILE_FLAGS = ["-O2", "-O3", "-O3 -march=native", "-O2 -funroll-loops"]
+
+# Problem size with --stub: the binary runs in milliseconds, so the server's own overhead dominates
+STUB_N = 10000
+STUB_NTIMES = 3
+
+# A tool's p50 or p99 latency growing by more than this fraction over the previous run is a regression
+REGRESSION_THRESHOLD = 0.2
+
+
+def _decode(result):
+    """The value a tool returned, from its CallToolResult."""
+    structured = result.structuredContent
+    if structured is not None:
+        return structured['result'] if set(structured) == {'result'} else structured
+    values = []
+    for item in result.content:
+        try:
+            values.append(json.loads(item.text))
+        except (AttributeError, ValueError):
+            values.append(getattr(item, 'text', None))
+    return values[0] if len(values) == 1 else values
+
+
+def _failed(result, value):
+    return result.isError or (isinstance(value, str) and value.startswith(("Error", "Failure")))
+
+
+class Client:
+    """One simulated agent: a long-lived MCP session issuing a random mix of calls."""
+
+    def __init__(self, index: int, session: ClientSession, args, samples: list):
+        self.index = index
+        self.session = session
+        self.args = args
+        self.samples = samples
+        self.rng = random.Random(args.seed + index)
+        self.default_n = None
+
+    def _size(self):
+        if not self.args.stub:
+            return {}
+        return {'n': STUB_N, 'ntimes': STUB_NTIMES}
+
+    async def call(self, tool: str, arguments: dict):
+        start = time.perf_counter()
+        try:
+            result = await self.session.call_tool(tool, arguments)
+            value = _decode(result)
+            error = value if _failed(result, value) else None
+        except Exception as e:
+            value, error = None, f"{type(e).__name__}: {e}"
+        self.samples.append({'tool': tool, 'latency': time.perf_counter() - start, 'queue': None,
+                             'error': str(error)[-300:] if error else None})
+        return value
+
+    async def job(self, tool: str, arguments: dict):
+        """Submit a tool as a background job and poll it; records end-to-end latency and queueing delay."""
+        start = time.perf_counter()
+        error, queue = None, None
+        try:
+            submitted = _decode(await self.session.call_tool(tool, {**arguments, 'background': True}))
+            if not isinstance(submitted, dict) or 'job_id' not in submitted:
+                raise RuntimeError(f"submission failed: {submitted}")
+            while True:
+                status = _decode(await self.session.call_tool("job_status", {'job_id': submitted['job_id']}))
+                if status['state'] in ("done", "failed", "cancelled"):
+                    break
+                await asyncio.sleep(self.args.poll)
+            queue = status['queued_seconds']
+            if status['state'] != "done":
+                error = f"job {status['state']}: {status.get('error')}"
+            else:
+                value = _decode(await self.session.call_tool("job_result", {'job_id': submitted['job_id']}))
+                if isinstance(value, str) and value.startswith(("Error", "Failure")):
+                    error = value
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.samples.append({'tool': tool, 'latency': time.perf_counter() - start, 'queue': queue,
+                             'error': str(error)[-300:] if error else None})
+
+    async def cheap(self):
+        tool, arguments = self.rng.choice(CHEAP_TOOLS)
+        await self.call(tool, arguments)
+
+    async def compile(self):
+        size = self._size()
+        if not self.args.cached_compiles:
+            # A slightly different array length is a distinct build, so it misses the build cache
+            size['n'] = (size.get('n') or self.default_n) + self.rng.randrange(1, 1000)
+        await self.job("make_stream_benchmark", {
+            'CC': "gcc", 'CFLAGS': self.rng.choice(COMPILE_FLAGS), 'LDFLAGS': "", **size})
+
+    async def run(self):
+        await self.job("test_speed", {})
+
+    async def drive(self, deadline: float):
+        info = await self.call("list_cpu_info", {})
+        info = json.loads(info) if isinstance(info, str) else info
+        self.default_n = ((info or {}).get('problem_size') or {}).get('n') or 10**7
+        await self.job("make_stream_benchmark", {'CC': "gcc", 'CFLAGS': "-O2", 'LDFLAGS': "", **self._size()})
+        workloads = list(self.args.mix)
+        weights = [self.args.mix[w] for w in workloads]
+        while time.monotonic() < deadline:
+            await getattr(self, self.rng.choices(workloads, weights)[0])()
+            if self.args.think:
+                await asyncio.sleep(self.rng.expovariate(1 / self.args.think))
+
+
+async def _run_client(index: int, url: str, args, samples: list, deadline: float):
+    try:
+        async with streamablehttp_client(url, timeout=args.timeout) as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await Client(index, session, args, samples).drive(deadline)
+    except Exception as e:
+        print(f"Client {index} failed: {type(e).__name__}: {e}", file=sys.stderr)
+        samples.append({'tool': "session", 'latency': 0.0, 'queue': None, 'error': str(e)[-300:]})
+
+
+def _percentile(values: list, q: float):
+    """Linearly interpolated q-th percentile of a non-empty list."""
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def _distribution_ms(values: list):
+    if not values:
+        return None
+    return {
+        'p50': round(1000 * _percentile(values, 50), 2),
+        'p90': round(1000 * _percentile(values, 90), 2),
+        'p99': round(1000 * _percentile(values, 99), 2),
+        'max': round(1000 * max(values), 2),
+        'mean': round(1000 * sum(values) / len(values), 2),
+    }
+
+
+def summarize(samples: list, wall_seconds: float):
+    tools = {}
+    for tool in sorted({s['tool'] for s in samples}):
+        mine = [s for s in samples if s['tool'] == tool]
+        ok = [s for s in mine if not s['error']]
+        tools[tool] = {
+            'calls': len(mine),
+            'errors': len(mine) - len(ok),
+            'throughput_per_s': round(len(ok) / wall_seconds, 3),
+            'latency_ms': _distribution_ms([s['latency'] for s in ok]),
+            'queue_ms': _distribution_ms([s['queue'] for s in ok if s['queue'] is not None]),
+            'first_error': next((s['error'] for s in mine if s['error']), None),
+        }
+    ok = [s for s in samples if not s['error']]
+    return {
+        'wall_seconds': round(wall_seconds, 3),
+        'calls': len(samples),
+        'errors': len(samples) - len(ok),
+        'throughput_per_s': round(len(ok) / wall_seconds, 3),
+        'latency_ms': _distribution_ms([s['latency'] for s in ok]),
+        'tools': tools,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=REPO_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+
+def compare(report: dict, results_file: str):
+    """Regressions against the latest stored run with the same configuration."""
+    previous = None
+    try:
+        with open(results_file, "r") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry.get('config') == report['config']:
+                    previous = entry
+    except (OSError, ValueError):
+        pass
+    if previous is None:
+        return None
+    regressions = []
+    for tool, stats in report['tools'].items():
+        before = previous['tools'].get(tool)
+        if not before or not before['latency_ms'] or not stats['latency_ms']:
+            continue
+        for key in ("p50", "p99"):
+            old, new = before['latency_ms'][key], stats['latency_ms'][key]
+            if old > 0 and new > old * (1 + REGRESSION_THRESHOLD):
+                regressions.append({'tool': tool, 'metric': key, 'before_ms': old, 'after_ms': new,
+                                    'ratio': round(new / old, 2)})
+    return {'baseline_timestamp': previous['timestamp'], 'baseline_commit': previous.get('commit'),
+            'regressions': regressions}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(scratch: str, extra_args: list):
+    """Start a local HTTP server on a free port with its state in scratch; returns (process, URL)."""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "server.py", "--transport", "http", "--host", "127.0.0.1", "--port", str(port),
+         "--work-dir", os.path.join(scratch, "work"),
+         "--db", os.path.join(scratch, "experiments.db"),
+         "--cache-dir", os.path.join(scratch, "cache"),
+         "--flag-probes", os.path.join(scratch, "flag_probes.json"),
+         "--measure-lock", os.path.join(scratch, "measure.lock")] + extra_args,
+        cwd=REPO_DIR, stdout=subprocess.DEVNULL, stderr=open(os.path.join(scratch, "server.log"), "w"))
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with {process.returncode}, see {scratch}/server.log")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, f"http://127.0.0.1:{port}/mcp"
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Server did not start listening within 30s")
+
+
+def _parse_mix(text: str):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("cheap", "compile", "run"):
+            raise argparse.ArgumentTypeError(f"unknown workload '{name}' (cheap, compile, run)")
+        mix[name.strip()] = float(weight or 1)
+    return {k: v for k, v in mix.items() if v > 0}
+
+
+def _print_report(report: dict):
+    print(f"{report['calls']} calls ({report['errors']} errors) in {report['wall_seconds']}s, "
+          f"{report['throughput_per_s']} calls/s with {report['config']['clients']} clients")
+    print(f"{'tool':<24}{'calls':>7}{'err':>5}{'/s':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}"
+          f"{'queue p50':>11}{'queue p99':>11}")
+    for tool, stats in report['tools'].items():
+        latency = stats['latency_ms'] or {}
+        queue = stats['queue_ms'] or {}
+        print(f"{tool:<24}{stats['calls']:>7}{stats['errors']:>5}{stats['throughput_per_s']:>8}"
+              f"{latency.get('p50', '-'):>10}{latency.get('p90', '-'):>10}{latency.get('p99', '-'):>10}"
+              f"{queue.get('p50', '-'):>11}{queue.get('p99', '-'):>11}")
+    comparison = report.get('comparison')
+    if comparison:
+        print(f"Compared with {comparison['baseline_commit']} ({comparison['baseline_timestamp']}): "
+              f"{len(comparison['regressions'])} regressions")
+        for r in comparison['regressions']:
+            print(f"  {r['tool']} {r['metric']}: {r['before_ms']} -> {r['after_ms']} ms ({r['ratio']}x)")
+
+
+async def main(args):
+    server = None
+    scratch = tempfile.mkdtemp(prefix="mcp-load-")
+    if args.start:
+        server, url = start_server(scratch, ["--max-jobs", str(args.max_jobs)] if args.max_jobs else [])
+    else:
+        url = args.url.rstrip("/")
+        if urlparse(url).path in ("", "/"):
+            url += "/mcp"
+    try:
+        samples = []
+        start = time.monotonic()
+        deadline = start + args.duration
+        await asyncio.gather(*[_run_client(i, url, args, samples, deadline) for i in range(args.clients)])
+        report = {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'commit': _git_commit(),
+            'url': url if not args.start else "local",
+            'config': {'clients': args.clients, 'duration': args.duration, 'mix': args.mix,
+                       'stub': args.stub, 'cached_compiles': args.cached_compiles, 'think': args.think,
+                       'max_jobs': args.max_jobs},
+            **summarize(samples, time.monotonic() - start),
+        }
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+    report['comparison'] = compare(report, args.results)
+    with open(args.results, "a") as f:
+        f.write(json.dumps(report) + "\n")
+    _print_report(report)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    regressions = (report['comparison'] or {}).get('regressions')
+    return 1 if args.fail_on_regression and regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load and latency benchmark for the MCP server")
+    parser.add_argument("url", nargs="?", help="MCP server URL (e.g. http://host:8000)")
+    parser.add_argument("--start", action="store_true",
+                        help="Start a local HTTP server with scratch state instead of using url")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent simulated clients")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds each client keeps issuing calls")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix("cheap=6,compile=2,run=2"),
+                        help="Workload weights, e.g. cheap=6,compile=2,run=2")
+    parser.add_argument("--stub", action="store_true",
+                        help=f"Build with N={STUB_N}, NTIMES={STUB_NTIMES} so timed runs take milliseconds")
+    parser.add_argument("--cached-compiles", action="store_true",
+                        help="Let compiles hit the build cache instead of forcing a fresh build each time")
+    parser.add_argument("--think", type=float, default=0, help="Mean pause between a client's calls in seconds")
+    parser.add_argument("--poll", type=float, default=0.05, help="Polling interval for background jobs in seconds")
+    parser.add_argument("--timeout", type=float, default=60, help="HTTP timeout per request in seconds")
+    parser.add_argument("--max-jobs", type=int, default=None, help="--max-jobs for a server started with --start")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the workload")
+    parser.add_argument("--results", default="load_test_results.jsonl",
+                        help="JSON lines file the report is appended to and compared against")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help=f"Exit with 1 if a tool's p50 or p99 grew by more than {REGRESSION_THRESHOLD:.0%}%")
+    parser.add_argument("--json", action="store_true", help="Also print the full report as JSON")
+    args = parser.parse_args()
+    if not args.start and not args.url:
+        parser.error("give a server URL or --start")
+    sys.exit(asyncio.run(main(args)))
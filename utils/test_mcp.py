@@ -9,11 +9,19 @@ Usage:
 """
 import subprocess
 import json
+import os
 import sys
+import time
 import argparse
 import requests
 from urllib.parse import urlparse
 
+# Array length of the builds exercising jobs and correctness, small so they run in milliseconds
+SMALL_N = 100000
+
+# Session ID the HTTP server assigned at initialization, sent back with every request
+http_session = {}
+
 def send_request_stdio(process, method, params=None, request_id=None):
     """Send a JSON-RPC request via stdio."""
     request = {"jsonrpc": "2.0", "method": method}
@@ -39,12 +47,15 @@ def send_request_http(base_url, method, params=None, request_id=None):
     if params is not None:
         request["params"] = params
 
-    response = requests.post(
-        f"{base_url}/mcp",
-        json=request,
-        headers={"Content-Type": "application/json", "Accept": "application/json, text/event-stream"}
-    )
+    headers = {"Content-Type": "application/json", "Accept": "application/json, text/event-stream"}
+    if "id" in http_session:
+        headers["mcp-session-id"] = http_session["id"]
+    response = requests.post(f"{base_url}/mcp", json=request, headers=headers)
+    if "mcp-session-id" in response.headers:
+        http_session["id"] = response.headers["mcp-session-id"]
 
+    if request_id is None:
+        return None
     if response.status_code == 200:
         return response.json()
     else:
@@ -66,8 +77,53 @@ def call_tool(send_fn, tool_name, arguments, request_id):
         print(f"✗ Error: {response}")
         return None
 
-def run_tests(send_fn):
-    """Run the test suite."""
+def tool_value(result):
+    """The value a tool returned, from the result of call_tool."""
+    if result is None:
+        return None
+    structured = result.get("structuredContent")
+    if structured is not None:
+        return structured["result"] if set(structured) == {"result"} else structured
+    values = []
+    for item in result.get("content", []):
+        try:
+            values.append(json.loads(item.get("text")))
+        except (TypeError, ValueError):
+            values.append(item.get("text"))
+    return values[0] if len(values) == 1 else values
+
+def check(condition, message):
+    """Fail the test run unless condition holds."""
+    if not condition:
+        raise AssertionError(message)
+    print(f"✓ {message}")
+
+def wait_for_job(send_fn, job_id, request_id, timeout=300):
+    """Poll job_status until the job finishes; returns its last status."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        response = send_fn("tools/call", {"name": "job_status", "arguments": {"job_id": job_id}}, request_id)
+        status = tool_value(response.get("result")) if response else None
+        if isinstance(status, dict) and status.get("state") in ("done", "failed", "cancelled"):
+            return status
+        time.sleep(0.5)
+    raise AssertionError(f"job {job_id} did not finish within {timeout}s")
+
+def benchmark_processes():
+    """PIDs of stream_benchmark processes on this host."""
+    pids = []
+    for pid in os.listdir("/proc"):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                argv0 = f.read().split(b"\0")[0]
+        except OSError:
+            continue
+        if os.path.basename(argv0) == b"stream_benchmark":
+            pids.append(int(pid))
+    return pids
+
+def run_tests(send_fn, same_host=False):
+    """Run the test suite. same_host: the server runs here, so its processes can be inspected."""
     try:
         # Initialize
         print("\n1. Initializing MCP server...")
@@ -134,6 +190,84 @@ def run_tests(send_fn):
         call_tool(send_fn, "test_speed", {}, req_id)
         req_id += 1
 
+        print("\nPer-session workspace:")
+        workspaces = tool_value(call_tool(send_fn, "list_workspaces", {}, req_id))
+        req_id += 1
+        # A list comes back as one content item per entry, so a single workspace decodes to a dict
+        workspaces = [workspaces] if isinstance(workspaces, dict) else workspaces
+        check(any(w["workspace"].startswith("session-") for w in workspaces or []),
+              "the session builds in a workspace of its own")
+
+        print("\nBackground build and job polling:")
+        build = {"CC": "gcc", "CFLAGS": "-O2", "LDFLAGS": "-lm", "n": SMALL_N}
+        job = tool_value(call_tool(send_fn, "make_stream_benchmark", {**build, "background": True}, req_id))
+        req_id += 1
+        check(isinstance(job, dict) and "job_id" in job, "a background build returns a job ID")
+        status = wait_for_job(send_fn, job["job_id"], req_id)
+        req_id += 1
+        check(status["state"] == "done", f"the background build finished ({status['state']})")
+        result = tool_value(call_tool(send_fn, "job_result", {"job_id": job["job_id"]}, req_id))
+        req_id += 1
+        check(result is True, "job_result returns the build's outcome")
+
+        print("\nBuild cache:")
+        before = tool_value(call_tool(send_fn, "build_cache_info", {}, req_id))
+        req_id += 1
+        call_tool(send_fn, "make_stream_benchmark", build, req_id)
+        req_id += 1
+        after = tool_value(call_tool(send_fn, "build_cache_info", {}, req_id))
+        req_id += 1
+        check(after["hits"] > before["hits"], "rebuilding the same configuration hits the build cache")
+
+        print("\nCancelling a job:")
+        job = tool_value(call_tool(send_fn, "test_speed", {"repeats": 50, "background": True}, req_id))
+        req_id += 1
+        cancelled = tool_value(call_tool(send_fn, "cancel_job", {"job_id": job["job_id"]}, req_id))
+        req_id += 1
+        check(cancelled is True, "cancel_job stops a running job")
+        status = wait_for_job(send_fn, job["job_id"], req_id)
+        req_id += 1
+        check(status["state"] == "cancelled", f"the job ends cancelled ({status['state']})")
+
+        print("\nStopping runs under perf stat:")
+        if same_host:
+            # Runs of many seconds, so the benchmark (perf's child when perf works) is up when stopped
+            call_tool(send_fn, "make_stream_benchmark", {**build, "n": 10 * SMALL_N, "ntimes": 50000}, req_id)
+            req_id += 1
+            job = tool_value(call_tool(send_fn, "test_speed", {"repeats": 5, "perf": True, "background": True},
+                                       req_id))
+            req_id += 1
+            deadline = time.time() + 60
+            while not benchmark_processes() and time.time() < deadline:
+                time.sleep(0.2)
+            check(benchmark_processes(), "the benchmark is running")
+            call_tool(send_fn, "cancel_job", {"job_id": job["job_id"]}, req_id)
+            req_id += 1
+            wait_for_job(send_fn, job["job_id"], req_id)
+            req_id += 1
+            check(not benchmark_processes(), "cancelling leaves no stream_benchmark process behind")
+            # The server reads the run's output to the end, so a benchmark left running holds the call up
+            started = time.time()
+            call_tool(send_fn, "test_speed", {"perf": True, "time_budget": 1}, req_id)
+            req_id += 1
+            check(time.time() - started < 10 and not benchmark_processes(),
+                  "a run over its time budget stops at once and leaves no stream_benchmark process behind")
+        else:
+            print("(skipped: the server runs on another host)")
+
+        print("\nCorrectness check of a kernel writing out of bounds:")
+        overflowing_copy = '''void copy_kernel(double * restrict a, double * restrict b, int n) {
+    for (int i = 0; i < n + 4; i++) {
+        a[i] = b[i];
+    }
+}'''
+        call_tool(send_fn, "make_custom_benchmark", {**build, "copy_code": overflowing_copy}, req_id)
+        req_id += 1
+        checked = tool_value(call_tool(send_fn, "test_correctness", {}, req_id))
+        req_id += 1
+        check(isinstance(checked, dict) and checked.get("correctness") == "FAIL",
+              "test_correctness reports FAIL for the out-of-bounds copy")
+
         call_tool(send_fn, "make_clean", {}, req_id)
 
         print("\n" + "="*60)
@@ -185,7 +319,7 @@ def test_remote(url):
         def send_fn(method, params=None, request_id=None):
             return send_request_http(base_url, method, params, request_id)
 
-        return run_tests(send_fn)
+        return run_tests(send_fn, same_host=parsed.hostname in ("localhost", "127.0.0.1", "::1"))
 
     else:
         print(f"Unsupported URL scheme: {parsed.scheme}", file=sys.stderr)